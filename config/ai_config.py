@@ -1,10 +1,24 @@
 """
 Configuração e gerenciamento de IA
+
+A configuração ativa fica em cache no processo: cada AIService criado (a cada rerun
+do Streamlit e em cada serviço) e cada is_available() consultavam o banco. O cache é
+invalidado por save_config/delete_config; AI_CONFIG_CACHE_TTL (segundos, padrão: 60,
+0 desativa) limita o tempo em que alterações feitas por outro processo ficam invisíveis.
 """
 from sqlalchemy.orm import Session
 from typing import Optional, Dict, Any
 from models.ai_config import AIConfig
 import os
+import threading
+import time
+
+AI_CONFIG_CACHE_TTL = float(os.getenv('AI_CONFIG_CACHE_TTL', '60'))
+
+# Configuração ativa em cache: (dicionário ou None, instante da leitura)
+_config_lock = threading.Lock()
+_cached_config: Optional[tuple] = None
+_config_generation = 0
 
 
 class AIConfigManager:
@@ -84,6 +98,7 @@ class AIConfigManager:
             db.add(config)
         
         db.commit()
+        AIConfigManager.invalidate_cache()
         db.refresh(config)
         return config
 
@@ -96,6 +111,7 @@ class AIConfigManager:
         if config:
             db.delete(config)
             db.commit()
+            AIConfigManager.invalidate_cache()
             return True
         return False
 
@@ -106,28 +122,56 @@ class AIConfigManager:
         """
         return db.query(AIConfig).all()
 
+    @staticmethod
+    def invalidate_cache() -> None:
+        """
+        Descarta a configuração ativa em cache (a próxima leitura consulta o banco)
+        """
+        global _cached_config, _config_generation
+        with _config_lock:
+            _cached_config = None
+            _config_generation += 1
+
+    @staticmethod
+    def config_generation() -> int:
+        """
+        Contador de invalidações do cache (muda a cada save_config/delete_config)
+        """
+        return _config_generation
+
     @staticmethod
     def is_configured(db: Session) -> bool:
         """
         Verifica se há alguma configuração de IA ativa
         """
-        config = AIConfigManager.get_config(db)
-        return config is not None and config.api_key and config.enabled
+        config = AIConfigManager.get_config_dict(db)
+        return bool(config and config['api_key'] and config['enabled'])
 
     @staticmethod
     def get_config_dict(db: Session) -> Optional[Dict[str, Any]]:
         """
-        Retorna configuração ativa como dicionário
+        Retorna configuração ativa como dicionário (cópia da versão em cache no processo)
         """
+        global _cached_config
+        with _config_lock:
+            cached = _cached_config
+            generation = _config_generation
+        if cached is not None and time.monotonic() - cached[1] < AI_CONFIG_CACHE_TTL:
+            return dict(cached[0]) if cached[0] else None
+
         config = AIConfigManager.get_config(db)
-        if not config:
-            return None
-        
-        return {
-            'provider': config.provider,
-            'api_key': config.api_key,
-            'model': config.model,
-            'base_url': config.base_url,
-            'enabled': config.enabled
-        }
+        config_dict = None
+        if config:
+            config_dict = {
+                'provider': config.provider,
+                'api_key': config.api_key,
+                'model': config.model,
+                'base_url': config.base_url,
+                'enabled': config.enabled
+            }
 
+        with _config_lock:
+            # Não grava leitura anterior a uma invalidação concorrente
+            if generation == _config_generation:
+                _cached_config = (config_dict, time.monotonic())
+        return dict(config_dict) if config_dict else None
@@ -1,10 +1,12 @@
 """
 Configuração do banco de dados SQLite com SQLAlchemy
 """
-from sqlalchemy import create_engine, text, inspect
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import threading
+import time
 
 # Diretório do banco de dados
 DB_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
@@ -13,6 +15,66 @@ os.makedirs(DB_DIR, exist_ok=True)
 # URL do banco de dados SQLite
 DATABASE_URL = f"sqlite:///{os.path.join(DB_DIR, 'contabil.db')}"
 
+# Perfil de desempenho do SQLite, aplicado a cada nova conexão
+# (SQLITE_TUNING=0 desativa e mantém os padrões do SQLite)
+SQLITE_TUNING_ENABLED = os.getenv('SQLITE_TUNING', '1') != '0'
+SQLITE_PRAGMAS = {
+    # WAL: leitores não bloqueiam o escritor (importações) e vice-versa
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    # Negativo = tamanho em KiB (padrão: 64 MB por conexão)
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', '-65536')),
+    'temp_store': os.getenv('SQLITE_TEMP_STORE', 'MEMORY'),
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '10000')),
+}
+# Intervalo (segundos) entre execuções de PRAGMA optimize; 0 desativa
+SQLITE_OPTIMIZE_INTERVAL = int(os.getenv('SQLITE_OPTIMIZE_INTERVAL', '3600'))
+
+
+def configure_sqlite_engine(sqlite_engine, pragmas: dict = None,
+                            optimize_interval: int = None) -> None:
+    """
+    Registra na engine os eventos que aplicam o perfil de desempenho do SQLite:
+    PRAGMAs em cada nova conexão e PRAGMA optimize periódico no checkout
+    """
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+    optimize_interval = SQLITE_OPTIMIZE_INTERVAL if optimize_interval is None else optimize_interval
+    state = {'last_optimize': time.monotonic()}
+    lock = threading.Lock()
+
+    @event.listens_for(sqlite_engine, 'connect')
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            if optimize_interval:
+                # Recomendado na abertura de conexões de longa duração
+                cursor.execute("PRAGMA optimize=0x10002")
+        finally:
+            cursor.close()
+
+    if not optimize_interval:
+        return
+
+    @event.listens_for(sqlite_engine, 'checkout')
+    def _periodic_optimize(dbapi_connection, connection_record, connection_proxy):
+        now = time.monotonic()
+        with lock:
+            if now - state['last_optimize'] < optimize_interval:
+                return
+            state['last_optimize'] = now
+
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA optimize")
+        except Exception as e:
+            print(f"⚠️ Erro ao executar PRAGMA optimize: {e}")
+        finally:
+            cursor.close()
+
+
 # Engine do SQLAlchemy
 engine = create_engine(
     DATABASE_URL,
@@ -20,6 +82,9 @@ engine = create_engine(
     echo=False  # Set to True para debug SQL
 )
 
+if SQLITE_TUNING_ENABLED:
+    configure_sqlite_engine(engine)
+
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -38,78 +103,27 @@ def get_db():
         db.close()
 
 
-def column_exists(table_name: str, column_name: str) -> bool:
-    """Verifica se uma coluna existe em uma tabela"""
-    try:
-        inspector = inspect(engine)
-        if not inspector.has_table(table_name):
-            return False
-        columns = [col['name'] for col in inspector.get_columns(table_name)]
-        return column_name in columns
-    except:
-        return False
-
-
-def run_migrations():
+def init_db():
     """
-    Executa migrações automáticas para adicionar colunas faltantes
+    Inicializa o banco de dados criando todas as tabelas e executando migrações
     """
+    from models import (user, client, transaction, contract, account, group, ai_config,
+                       financial_investment, credit_card, card_machine, inventory, ledger, data_version,
+                       import_batch, import_file, import_job, ai_response_cache)
+    
+    # Cria tabelas e aplica migrações pendentes (só consulta a versão se o esquema estiver em dia)
+    from config.migrations import ensure_schema
+    ensure_schema()
+    
+    # Popula o livro-razão mensal em bancos que ainda não o possuem
+    from services.ledger_service import LedgerService
     db = SessionLocal()
     try:
-        tables_to_update = [
-            'bank_statements',
-            'contracts',
-            'accounts_payable',
-            'accounts_receivable'
-        ]
-        
-        for table in tables_to_update:
-            # Verifica se a tabela existe
-            inspector = inspect(engine)
-            if not inspector.has_table(table):
-                continue
-            
-            # Verifica e adiciona group_id
-            if not column_exists(table, 'group_id'):
-                try:
-                    db.execute(text(f"""
-                        ALTER TABLE {table} 
-                        ADD COLUMN group_id INTEGER REFERENCES groups(id)
-                    """))
-                    db.commit()
-                    print(f"✅ Migração: Coluna group_id adicionada à tabela {table}")
-                except Exception as e:
-                    db.rollback()
-                    print(f"⚠️ Erro ao adicionar group_id à {table}: {e}")
-            
-            # Verifica e adiciona subgroup_id
-            if not column_exists(table, 'subgroup_id'):
-                try:
-                    db.execute(text(f"""
-                        ALTER TABLE {table} 
-                        ADD COLUMN subgroup_id INTEGER REFERENCES subgroups(id)
-                    """))
-                    db.commit()
-                    print(f"✅ Migração: Coluna subgroup_id adicionada à tabela {table}")
-                except Exception as e:
-                    db.rollback()
-                    print(f"⚠️ Erro ao adicionar subgroup_id à {table}: {e}")
-        
+        LedgerService.ensure_built(db)
     except Exception as e:
-        print(f"⚠️ Erro durante migrações automáticas: {e}")
+        db.rollback()
+        print(f"⚠️ Erro ao construir o livro-razão mensal: {e}")
     finally:
         db.close()
 
 
-def init_db():
-    """
-    Inicializa o banco de dados criando todas as tabelas e executando migrações
-    """
-    from models import (user, client, transaction, contract, account, group, ai_config,
-                       financial_investment, credit_card, card_machine, inventory)
-    Base.metadata.create_all(bind=engine)
-    
-    # Executa migrações automáticas para adicionar colunas faltantes
-    run_migrations()
-
-
@@ -0,0 +1,176 @@
+"""
+Migrações do esquema do banco com registro de versão
+
+A versão aplicada fica na tabela schema_version (uma linha). Na inicialização e
+nas importações basta uma consulta a essa linha: as migrações só rodam quando o
+banco está atrás de SCHEMA_VERSION, uma única vez cada. Elas conferem o estado
+antes de alterar (PRAGMA table_info/index_list), então uma migração interrompida
+no meio é refeita com segurança na próxima inicialização.
+
+Toda mudança de esquema (tabela, coluna ou índice novo) entra como uma nova
+função no fim de MIGRATIONS; migrações já publicadas não são alteradas.
+"""
+import threading
+from typing import Callable, List, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+from config.database import Base, engine
+
+
+def _table_columns(conn: Connection, table_name: str) -> Set[str]:
+    """
+    Colunas da tabela (vazio se a tabela não existir)
+    """
+    return {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table_name})")}
+
+
+def _add_column(conn: Connection, table_name: str, column_name: str, definition: str) -> None:
+    """
+    Adiciona a coluna em bancos antigos que ainda não a possuem
+    """
+    columns = _table_columns(conn, table_name)
+    if columns and column_name not in columns:
+        conn.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {definition}")
+        print(f"✅ Migração: Coluna {column_name} adicionada à tabela {table_name}")
+
+
+def _create_tables(conn: Connection) -> None:
+    """
+    Cria as tabelas dos modelos que ainda não existem
+    """
+    import models  # noqa: F401  (registra todos os modelos no metadata)
+    Base.metadata.create_all(bind=conn)
+
+
+def _add_group_columns(conn: Connection) -> None:
+    """
+    group_id e subgroup_id nas tabelas anteriores aos grupos
+    """
+    for table in ['bank_statements', 'contracts', 'accounts_payable', 'accounts_receivable',
+                  'financial_investments', 'credit_card_invoices', 'card_machine_statements', 'inventory']:
+        _add_column(conn, table, 'group_id', 'INTEGER REFERENCES groups(id)')
+        _add_column(conn, table, 'subgroup_id', 'INTEGER REFERENCES subgroups(id)')
+
+
+def _add_transaction_fingerprint(conn: Connection) -> None:
+    """
+    Fingerprint das transações de extrato (deduplicação das importações)
+    """
+    _add_column(conn, 'transactions', 'fingerprint', 'VARCHAR(64)')
+
+
+def _add_batch_columns(conn: Connection) -> None:
+    """
+    Lote de importação de origem dos registros importados
+    """
+    for table in ['transactions', 'bank_statements', 'contracts', 'accounts_payable',
+                  'accounts_receivable', 'financial_investments', 'credit_card_invoices',
+                  'card_machine_statements', 'inventory']:
+        _add_column(conn, table, 'batch_id', 'INTEGER REFERENCES import_batches(id)')
+
+
+def _create_missing_indexes(conn: Connection) -> None:
+    """
+    Índices declarados nos modelos que ainda não existem
+    (create_all não cria índices em tabelas que já existem)
+    """
+    for table in Base.metadata.sorted_tables:
+        existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA index_list({table.name})")}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            try:
+                index.create(bind=conn, checkfirst=True)
+                print(f"✅ Migração: Índice {index.name} criado na tabela {table.name}")
+            except OperationalError as e:
+                # Ex.: coluna que só existe em bancos criados por versões mais novas
+                print(f"⚠️ Erro ao criar índice {index.name} em {table.name}: {e.orig}")
+
+
+def _create_ai_response_cache(conn: Connection) -> None:
+    """
+    Tabela do cache de respostas da IA em bancos anteriores a ela
+    """
+    from models.ai_response_cache import AIResponseCache
+    AIResponseCache.__table__.create(bind=conn, checkfirst=True)
+
+
+# (descrição, função) em ordem; a versão de cada migração é sua posição (1, 2, ...)
+MIGRATIONS: List[Tuple[str, Callable[[Connection], None]]] = [
+    ('Tabelas dos modelos', _create_tables),
+    ('Colunas group_id/subgroup_id', _add_group_columns),
+    ('Fingerprint das transações', _add_transaction_fingerprint),
+    ('Colunas batch_id dos registros importados', _add_batch_columns),
+    ('Índices declarados nos modelos', _create_missing_indexes),
+    ('Cache de respostas da IA', _create_ai_response_cache),
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+_lock = threading.Lock()
+_schema_ready = False
+
+
+def get_schema_version() -> int:
+    """
+    Versão registrada no banco (0 se o registro ainda não existe)
+    """
+    try:
+        with engine.connect() as conn:
+            version = conn.execute(text("SELECT version FROM schema_version")).scalar()
+    except OperationalError:
+        return 0
+    return version or 0
+
+
+def run_migrations() -> int:
+    """
+    Aplica as migrações pendentes, cada uma com a atualização da versão na mesma transação
+
+    Returns:
+        Versão do esquema após a execução
+    """
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL, applied_at DATETIME)"
+        )
+        if conn.exec_driver_sql("SELECT COUNT(*) FROM schema_version").scalar() == 0:
+            conn.exec_driver_sql("INSERT INTO schema_version (version, applied_at) VALUES (0, CURRENT_TIMESTAMP)")
+
+    version = get_schema_version()
+    for number, (description, migrate) in enumerate(MIGRATIONS, start=1):
+        if number <= version:
+            continue
+        try:
+            with engine.begin() as conn:
+                migrate(conn)
+                conn.execute(
+                    text("UPDATE schema_version SET version = :version, applied_at = CURRENT_TIMESTAMP"),
+                    {'version': number}
+                )
+            version = number
+            print(f"✅ Migração {number}: {description}")
+        except Exception as e:
+            # As próximas dependem desta: para aqui e tenta de novo na próxima inicialização
+            print(f"⚠️ Erro na migração {number} ({description}): {e}")
+            break
+    return version
+
+
+def ensure_schema() -> None:
+    """
+    Garante o esquema atualizado: uma consulta à versão na primeira chamada do
+    processo e nenhuma nas seguintes
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _lock:
+        if not _schema_ready:
+            version = get_schema_version()
+            if version < SCHEMA_VERSION:
+                version = run_migrations()
+            _schema_ready = version >= SCHEMA_VERSION
@@ -12,6 +12,12 @@ from models.financial_investment import FinancialInvestment
 from models.credit_card import CreditCardInvoice
 from models.card_machine import CardMachineStatement
 from models.inventory import Inventory
+from models.ledger import MonthlyLedger
+from models.data_version import ClientDataVersion
+from models.import_batch import ImportBatch
+from models.import_file import ImportFile, ImportRowFingerprint
+from models.import_job import ImportJob
+from models.ai_response_cache import AIResponseCache
 
 __all__ = [
     'User',
@@ -30,6 +36,13 @@ __all__ = [
     'CreditCardInvoice',
     'CardMachineStatement',
     'Inventory',
+    'MonthlyLedger',
+    'ClientDataVersion',
+    'ImportBatch',
+    'ImportFile',
+    'ImportRowFingerprint',
+    'ImportJob',
+    'AIResponseCache',
 ]
 
 
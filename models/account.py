@@ -1,7 +1,7 @@
 """
 Modelo de contas a pagar, receber e mapeamentos de importação
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Date, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Date, Boolean, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from config.database import Base
@@ -28,6 +28,7 @@ class AccountPayable(Base):
     installment_number = Column(Integer)  # Número da parcela atual (1, 2, 3...)
     group_id = Column(Integer, ForeignKey('groups.id'), nullable=True)
     subgroup_id = Column(Integer, ForeignKey('subgroups.id'), nullable=True)
+    batch_id = Column(Integer, ForeignKey('import_batches.id'), index=True)  # importação de origem (None para manuais)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relacionamentos
@@ -35,6 +36,12 @@ class AccountPayable(Base):
     group = relationship('Group', back_populates='accounts_payable')
     subgroup = relationship('Subgroup', back_populates='accounts_payable')
 
+    __table_args__ = (
+        # Pendentes/projeção (vencimento) e realizadas na DRE/DFC (pagamento)
+        Index('ix_accounts_payable_client_paid_due', 'client_id', 'paid', 'due_date'),
+        Index('ix_accounts_payable_client_paid_payment', 'client_id', 'paid', 'payment_date'),
+    )
+
     def __repr__(self):
         return f"<AccountPayable(account='{self.account_name}', due_date='{self.due_date}', value={self.value})>"
 
@@ -63,6 +70,7 @@ class AccountReceivable(Base):
     installment_number = Column(Integer)  # Número da parcela atual (1, 2, 3...)
     group_id = Column(Integer, ForeignKey('groups.id'), nullable=True)
     subgroup_id = Column(Integer, ForeignKey('subgroups.id'), nullable=True)
+    batch_id = Column(Integer, ForeignKey('import_batches.id'), index=True)  # importação de origem (None para manuais)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relacionamentos
@@ -70,6 +78,12 @@ class AccountReceivable(Base):
     group = relationship('Group', back_populates='accounts_receivable')
     subgroup = relationship('Subgroup', back_populates='accounts_receivable')
 
+    __table_args__ = (
+        # Pendentes/projeção (vencimento) e realizadas na DRE/DFC (recebimento)
+        Index('ix_accounts_receivable_client_received_due', 'client_id', 'received', 'due_date'),
+        Index('ix_accounts_receivable_client_received_receipt', 'client_id', 'received', 'receipt_date'),
+    )
+
     def __repr__(self):
         return f"<AccountReceivable(account='{self.account_name}', due_date='{self.due_date}', value={self.value})>"
 
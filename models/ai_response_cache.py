@@ -0,0 +1,31 @@
+"""
+Modelo do cache de respostas da IA
+"""
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from datetime import datetime
+from config.database import Base
+
+
+class AIResponseCache(Base):
+    """
+    Resposta da IA para um prompt, identificada pelo hash de (provedor, modelo,
+    parâmetros da chamada, mensagem de sistema e prompt)
+    """
+    __tablename__ = 'ai_response_cache'
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), nullable=False, unique=True)  # SHA-256 da chamada
+    provider = Column(String(50), nullable=False)
+    model = Column(String(100))
+    response = Column(Text, nullable=False)
+    size_bytes = Column(Integer, default=0, nullable=False)
+    hits = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # ordem de remoção (LRU)
+
+    __table_args__ = (
+        Index('ix_ai_response_cache_last_accessed', 'last_accessed_at'),
+    )
+
+    def __repr__(self):
+        return f"<AIResponseCache(id={self.id}, provider='{self.provider}', model='{self.model}')>"
@@ -24,6 +24,7 @@ class CardMachineStatement(Base):
     description = Column(String(500))
     group_id = Column(Integer, ForeignKey('groups.id'), nullable=True)
     subgroup_id = Column(Integer, ForeignKey('subgroups.id'), nullable=True)
+    batch_id = Column(Integer, ForeignKey('import_batches.id'), index=True)  # importação de origem (None para manuais)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relacionamentos
@@ -1,7 +1,7 @@
 """
 Modelo de contratos e eventos
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Date, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Date, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from config.database import Base
@@ -27,6 +27,7 @@ class Contract(Base):
     status = Column(String(50), default='pendente')  # pendente, em_andamento, concluido, cancelado
     group_id = Column(Integer, ForeignKey('groups.id'), nullable=True)
     subgroup_id = Column(Integer, ForeignKey('subgroups.id'), nullable=True)
+    batch_id = Column(Integer, ForeignKey('import_batches.id'), index=True)  # importação de origem (None para manuais)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relacionamentos
@@ -34,6 +35,10 @@ class Contract(Base):
     group = relationship('Group', back_populates='contracts')
     subgroup = relationship('Subgroup', back_populates='contracts')
 
+    __table_args__ = (
+        Index('ix_contracts_client_status_event', 'client_id', 'status', 'event_date'),
+    )
+
     def __repr__(self):
         return f"<Contract(contractor='{self.contractor_name}', event_date='{self.event_date}', status='{self.status}')>"
 
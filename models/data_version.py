@@ -0,0 +1,20 @@
+"""
+Modelo de versão dos dados por cliente (invalidação de cache de relatórios)
+"""
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from datetime import datetime
+from config.database import Base
+
+
+class ClientDataVersion(Base):
+    """
+    Versão dos dados de um cliente, incrementada a cada gravação que o afeta
+    """
+    __tablename__ = 'client_data_versions'
+
+    client_id = Column(Integer, ForeignKey('clients.id'), primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ClientDataVersion(client_id={self.client_id}, version={self.version})>"
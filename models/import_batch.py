@@ -0,0 +1,33 @@
+"""
+Modelo de lotes de importação (rastreabilidade, desfazer e tempos)
+"""
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
+from datetime import datetime
+from config.database import Base
+
+
+class ImportBatch(Base):
+    """
+    Uma importação de arquivo: todos os registros gravados por ela levam o batch_id
+    """
+    __tablename__ = 'import_batches'
+
+    id = Column(Integer, primary_key=True, index=True)
+    client_id = Column(Integer, ForeignKey('clients.id'), nullable=False)
+    import_type = Column(String(50), nullable=False)  # bank_statements, contracts, etc
+    filename = Column(String(255))
+    status = Column(String(20), default='em_andamento', nullable=False)  # em_andamento, concluido, desfeito
+    rows_total = Column(Integer, default=0, nullable=False)  # linhas enviadas para importação
+    rows_imported = Column(Integer, default=0, nullable=False)  # registros gravados
+    rows_skipped = Column(Integer, default=0, nullable=False)  # linhas ignoradas (já importadas)
+    started_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime)
+    duration_seconds = Column(Float)  # tempo da importação
+    undone_at = Column(DateTime)  # quando a importação foi desfeita
+
+    __table_args__ = (
+        Index('ix_import_batches_client_started', 'client_id', 'started_at'),
+    )
+
+    def __repr__(self):
+        return f"<ImportBatch(id={self.id}, client_id={self.client_id}, type='{self.import_type}', status='{self.status}')>"
@@ -0,0 +1,53 @@
+"""
+Modelo do registro de arquivos importados (deduplicação por conteúdo)
+"""
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from datetime import datetime
+from config.database import Base
+
+
+class ImportFile(Base):
+    """
+    Arquivo já importado para um cliente, identificado pelo SHA-256 do conteúdo enviado
+    """
+    __tablename__ = 'import_files'
+
+    id = Column(Integer, primary_key=True, index=True)
+    client_id = Column(Integer, ForeignKey('clients.id'), nullable=False)
+    file_hash = Column(String(64), nullable=False)  # SHA-256 dos bytes do arquivo
+    filename = Column(String(255))
+    file_size = Column(Integer)
+    import_type = Column(String(50), nullable=False)  # bank_statements, contracts, etc
+    batch_id = Column(Integer, ForeignKey('import_batches.id'), index=True)  # lote da importação
+    rows_total = Column(Integer, default=0, nullable=False)  # linhas enviadas para importação
+    rows_imported = Column(Integer, default=0, nullable=False)  # registros gravados
+    rows_skipped = Column(Integer, default=0, nullable=False)  # linhas já importadas antes (sobreposição)
+    imported_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('ix_import_files_client_hash', 'client_id', 'file_hash'),
+    )
+
+    def __repr__(self):
+        return f"<ImportFile(client_id={self.client_id}, filename='{self.filename}', type='{self.import_type}')>"
+
+
+class ImportRowFingerprint(Base):
+    """
+    Fingerprint de cada linha importada, usado para detectar sobreposição parcial
+    entre arquivos (ex.: extrato do mês que repete o fim do mês anterior)
+    """
+    __tablename__ = 'import_row_fingerprints'
+
+    id = Column(Integer, primary_key=True, index=True)
+    client_id = Column(Integer, ForeignKey('clients.id'), nullable=False)
+    import_type = Column(String(50), nullable=False)
+    fingerprint = Column(String(64), nullable=False)
+    import_file_id = Column(Integer, ForeignKey('import_files.id', ondelete='CASCADE'), nullable=False)
+
+    __table_args__ = (
+        Index('ux_import_row_fingerprints_client_type_fp', 'client_id', 'import_type', 'fingerprint', unique=True),
+    )
+
+    def __repr__(self):
+        return f"<ImportRowFingerprint(client_id={self.client_id}, type='{self.import_type}')>"
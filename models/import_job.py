@@ -0,0 +1,41 @@
+"""
+Modelo da fila de importações em segundo plano
+"""
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Index
+from datetime import datetime
+from config.database import Base
+
+
+class ImportJob(Base):
+    """
+    Importação executada fora da sessão do navegador: estado, progresso, contagens,
+    erro e tempos ficam gravados para a página acompanhar (e sobrevivem a reruns)
+    """
+    __tablename__ = 'import_jobs'
+
+    id = Column(Integer, primary_key=True, index=True)
+    client_id = Column(Integer, ForeignKey('clients.id'), nullable=False)
+    job_kind = Column(String(20), nullable=False)  # csv, excel (arquivo em fluxo), dataframe (dados revisados)
+    import_type = Column(String(50), nullable=False)  # bank_statements, contracts, etc
+    filename = Column(String(255))
+    status = Column(String(20), default='pendente', nullable=False)  # pendente, executando, concluido, erro, cancelado, interrompido
+    progress = Column(Float, default=0.0, nullable=False)  # 0.0 a 1.0 (estimado em arquivos em fluxo)
+    rows_total = Column(Integer)  # linhas esperadas, quando conhecidas
+    rows_read = Column(Integer, default=0, nullable=False)
+    rows_imported = Column(Integer, default=0, nullable=False)
+    rows_skipped = Column(Integer, default=0, nullable=False)  # já importadas antes (sobreposição)
+    transactions_created = Column(Integer, default=0, nullable=False)
+    error = Column(Text)
+    batch_id = Column(Integer, ForeignKey('import_batches.id'))  # lote gerado pela importação
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    duration_seconds = Column(Float)
+
+    __table_args__ = (
+        Index('ix_import_jobs_client_created', 'client_id', 'created_at'),
+        Index('ix_import_jobs_status', 'status'),
+    )
+
+    def __repr__(self):
+        return f"<ImportJob(id={self.id}, client_id={self.client_id}, type='{self.import_type}', status='{self.status}')>"
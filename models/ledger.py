@@ -0,0 +1,34 @@
+"""
+Modelo do livro-razão mensal (resumo agregado para DRE/DFC/Sazonalidade)
+"""
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index
+from config.database import Base
+
+
+class MonthlyLedger(Base):
+    """
+    Resumo mensal dos lançamentos realizados por fonte, tipo e classificação
+
+    Fontes: transactions (todas), contracts (concluídos, por event_date),
+    accounts_payable (pagas, por payment_date) e accounts_receivable
+    (recebidas, por receipt_date). Mantido pelo LedgerService.
+    """
+    __tablename__ = 'monthly_ledger'
+
+    id = Column(Integer, primary_key=True, index=True)
+    client_id = Column(Integer, ForeignKey('clients.id'), nullable=False)
+    year_month = Column(String(7), nullable=False)  # YYYY-MM
+    source = Column(String(30), nullable=False)  # transactions, contracts, accounts_payable, accounts_receivable
+    type = Column(String(20), nullable=False)  # entrada, saida
+    group_id = Column(Integer, ForeignKey('groups.id'), nullable=True)
+    subgroup_id = Column(Integer, ForeignKey('subgroups.id'), nullable=True)
+    category = Column(String(100), nullable=True)
+    total = Column(Float, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index('ix_monthly_ledger_client_month', 'client_id', 'year_month'),
+    )
+
+    def __repr__(self):
+        return f"<MonthlyLedger(client_id={self.client_id}, month='{self.year_month}', source='{self.source}', total={self.total})>"
@@ -1,7 +1,7 @@
 """
 Modelo de transações e extratos bancários
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Date, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Date, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from config.database import Base
@@ -26,6 +26,8 @@ class Transaction(Base):
     bank_name = Column(String(100))  # Nome do banco (para extratos bancários)
     document_type = Column(String(50))  # extrato_bancario, fatura_cartao, etc
     imported_from = Column(String(255))  # nome do arquivo importado
+    fingerprint = Column(String(64))  # identidade da linha de extrato importada (deduplicação)
+    batch_id = Column(Integer, ForeignKey('import_batches.id'), index=True)  # importação de origem (None para manuais)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relacionamentos
@@ -33,6 +35,14 @@ class Transaction(Base):
     group = relationship('Group', back_populates='transactions')
     subgroup = relationship('Subgroup', back_populates='transactions')
 
+    __table_args__ = (
+        # Relatórios por período (DRE/DFC, tipo) e telas de extrato (document_type)
+        Index('ix_transactions_client_date_type', 'client_id', 'date', 'type'),
+        Index('ix_transactions_client_doctype_date', 'client_id', 'document_type', 'date'),
+        # Uma transação por linha de extrato (NULL para lançamentos sem fingerprint)
+        Index('ux_transactions_client_fingerprint', 'client_id', 'fingerprint', unique=True),
+    )
+
     def __repr__(self):
         return f"<Transaction(date='{self.date}', value={self.value}, type='{self.type}')>"
 
@@ -52,6 +62,7 @@ class BankStatement(Base):
     value = Column(Float, nullable=False)
     balance = Column(Float)
     imported_at = Column(DateTime, default=None, nullable=True)  # None para manuais, datetime para importados
+    batch_id = Column(Integer, ForeignKey('import_batches.id'), index=True)  # importação de origem (None para manuais)
     group_id = Column(Integer, ForeignKey('groups.id'), nullable=True)
     subgroup_id = Column(Integer, ForeignKey('subgroups.id'), nullable=True)
 
@@ -60,6 +71,10 @@ class BankStatement(Base):
     group = relationship('Group', back_populates='bank_statements')
     subgroup = relationship('Subgroup', back_populates='bank_statements')
 
+    __table_args__ = (
+        Index('ix_bank_statements_client_date', 'client_id', 'date'),
+    )
+
     def __repr__(self):
         return f"<BankStatement(date='{self.date}', value={self.value})>"
 
@@ -539,7 +539,142 @@ try:
             st.plotly_chart(fig, use_container_width=True)
         
         st.markdown("---")
-        
+
+        # Cache de relatórios
+        st.subheader("⚡ Cache de Relatórios")
+
+        from services.report_cache import report_cache
+
+        cache_stats = report_cache.stats()
+
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            st.metric("🎯 Acertos", cache_stats['hits'], delta=f"{cache_stats['hit_rate']:.1f}% de acerto")
+
+        with col2:
+            st.metric("🔄 Recálculos", cache_stats['misses'])
+
+        with col3:
+            st.metric(
+                "📦 Entradas",
+                cache_stats['entries'],
+                delta=f"{cache_stats['evictions']} removidas (LRU)",
+                delta_color="off"
+            )
+
+        with col4:
+            st.metric(
+                "💾 Memória",
+                f"{cache_stats['size_bytes'] / 1024 / 1024:.1f} MB",
+                delta=f"limite {cache_stats['max_bytes'] / 1024 / 1024:.0f} MB",
+                delta_color="off"
+            )
+
+        if not cache_stats['enabled']:
+            st.info("ℹ️ Cache desativado (REPORT_CACHE_ENABLED=0).")
+
+        if st.button("🧹 Limpar cache de relatórios"):
+            report_cache.clear()
+            st.success("✅ Cache de relatórios limpo!")
+            st.rerun()
+
+        st.markdown("---")
+
+        # Cache de parsing de arquivos
+        st.subheader("📂 Cache de Parsing de Arquivos")
+
+        from services.parse_cache import parse_cache
+
+        parse_stats = parse_cache.stats()
+
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            st.metric("🎯 Acertos", parse_stats['hits'], delta=f"{parse_stats['hit_rate']:.1f}% de acerto")
+
+        with col2:
+            st.metric("🔄 Arquivos lidos", parse_stats['misses'])
+
+        with col3:
+            st.metric(
+                "📦 Entradas",
+                parse_stats['entries'],
+                delta=f"{parse_stats['evictions']} removidas (LRU)",
+                delta_color="off"
+            )
+
+        with col4:
+            st.metric(
+                "💾 Disco",
+                f"{parse_stats['size_bytes'] / 1024 / 1024:.1f} MB",
+                delta=f"limite {parse_stats['max_bytes'] / 1024 / 1024:.0f} MB",
+                delta_color="off"
+            )
+
+        if not parse_stats['parquet_available']:
+            st.info("ℹ️ Cache desativado: instale pyarrow para habilitá-lo.")
+        elif not parse_stats['enabled']:
+            st.info("ℹ️ Cache desativado (PARSE_CACHE_ENABLED=0).")
+
+        if st.button("🧹 Limpar cache de parsing"):
+            parse_cache.clear()
+            st.success("✅ Cache de parsing limpo!")
+            st.rerun()
+
+        st.markdown("---")
+
+        # Cache de respostas da IA
+        st.subheader("🤖 Cache de Respostas da IA")
+
+        from services.ai_cache import ai_cache
+
+        ai_stats = ai_cache.stats()
+
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            st.metric("🎯 Acertos", ai_stats['hits'], delta=f"{ai_stats['hit_rate']:.1f}% de acerto")
+
+        with col2:
+            st.metric("🔄 Chamadas à IA", ai_stats['misses'])
+
+        with col3:
+            st.metric(
+                "📦 Respostas",
+                ai_stats['entries'],
+                delta=f"{ai_stats['evictions']} removidas (validade/LRU)",
+                delta_color="off"
+            )
+
+        with col4:
+            st.metric(
+                "💾 Banco",
+                f"{ai_stats['size_bytes'] / 1024 / 1024:.1f} MB",
+                delta=f"limite {ai_stats['max_bytes'] / 1024 / 1024:.0f} MB",
+                delta_color="off"
+            )
+
+        if not ai_stats['enabled']:
+            st.info("ℹ️ Cache desativado (AI_CACHE_ENABLED=0).")
+        elif ai_stats['ttl_seconds']:
+            st.caption(f"Respostas válidas por {ai_stats['ttl_seconds'] / 3600:.0f} h.")
+
+        from services.ai_clients import pool_stats
+
+        client_stats = pool_stats()
+        st.caption(
+            f"Clientes dos provedores no pool: {client_stats['clients']} "
+            f"({client_stats['created']} criados, {client_stats['reused']} reutilizados)."
+        )
+
+        if st.button("🧹 Limpar cache de respostas da IA"):
+            ai_cache.clear()
+            st.success("✅ Cache de respostas da IA limpo!")
+            st.rerun()
+
+        st.markdown("---")
+
         # Informações do sistema
         st.subheader("ℹ️ Informações do Sistema")
         
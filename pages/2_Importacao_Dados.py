@@ -12,6 +12,7 @@ from config.database import SessionLocal
 from services.auth_service import AuthService
 from services.parser_service import ParserService
 from services.import_service import ImportService
+from services.import_job_service import ImportJobService
 from services.ai_service import AIService
 from services.data_processor import DataProcessor
 from utils.column_mapper import ColumnMapper
@@ -20,6 +21,33 @@ from models.group import Group, Subgroup
 
 st.set_page_config(page_title="Importação de Dados", page_icon="📥", layout="wide")
 
+# CSVs e planilhas a partir deste tamanho abrem por padrão na importação em fluxo
+STREAMING_THRESHOLD_BYTES = int(os.getenv('IMPORT_STREAMING_THRESHOLD_MB', '20')) * 1024 * 1024
+
+# Intervalo (segundos) de atualização do progresso das importações em segundo plano
+JOB_POLL_SECONDS = float(os.getenv('IMPORT_JOB_POLL_SECONDS', '2'))
+
+JOB_STATUS_LABELS = {
+    'pendente': '🕒 na fila',
+    'executando': '⚙️ importando',
+    'concluido': '✅ concluída',
+    'erro': '❌ erro',
+    'cancelado': '⏹️ cancelada',
+    'interrompido': '⚠️ interrompida',
+}
+
+IMPORT_TYPE_NAMES = {
+    'transactions': '💳 Transações Financeiras',
+    'bank_statements': '🏦 Extratos Bancários',
+    'contracts': '📝 Contratos/Eventos',
+    'accounts_payable': '💸 Contas a Pagar',
+    'accounts_receivable': '💰 Contas a Receber',
+    'financial_investments': '📈 Extratos de Aplicações Financeiras',
+    'credit_card_invoices': '💳 Faturas de Cartão de Crédito',
+    'card_machine_statements': '🏪 Extratos de Máquina de Cartão',
+    'inventory': '📦 Controle de Estoque'
+}
+
 # Verifica autenticação
 AuthService.init_session_state()
 AuthService.require_auth()
@@ -38,6 +66,197 @@ def show_sidebar():
             st.rerun()
 
 
+def show_streaming_import(client_id: int, filename: str, file_content: bytes, read_options: dict):
+    """
+    Importação em fluxo de CSVs e planilhas grandes: mapeamento manual de colunas
+    (sem IA) e leitura/gravação em blocos, com progresso
+    
+    read_options: {'format': 'csv', 'encoding', 'delimiter'} ou
+                  {'format': 'excel', 'sheet_name', 'all_sheets'}
+    """
+    is_excel = read_options['format'] == 'excel'
+    st.markdown("---")
+    st.subheader("2️⃣ Importação em Fluxo (arquivo grande)")
+    st.caption("O arquivo é lido e gravado em blocos: o uso de memória não depende do tamanho do arquivo. "
+               "Não há processamento com IA nem revisão linha a linha.")
+    
+    if is_excel:
+        preview = next(ParserService.iter_excel_chunks(
+            file_content, read_options['sheet_name'], read_options['all_sheets'], chunksize=10
+        ), None)
+    else:
+        preview = next(ParserService.iter_csv_chunks(
+            file_content, read_options['encoding'], read_options['delimiter'], chunksize=10
+        ), None)
+    if preview is None or preview.empty:
+        st.error("❌ Não foi possível ler o arquivo. Verifique o encoding e o delimitador."
+                 if not is_excel else "❌ Não foi possível ler a planilha selecionada.")
+        return
+    st.dataframe(preview, use_container_width=True)
+    
+    import_type = st.selectbox(
+        "Tipo de dado:",
+        options=list(IMPORT_TYPE_NAMES),
+        format_func=lambda x: IMPORT_TYPE_NAMES[x],
+        key="stream_import_type"
+    )
+    target_columns = ImportService.get_target_columns(import_type)
+    
+    db = SessionLocal()
+    try:
+        # Mapeamento salvo para o tipo ou sugestão por nome de coluna
+        saved_mapping = ImportService.load_mapping(db, client_id, import_type)
+        suggested = ColumnMapper.suggest_mapping(list(preview.columns), target_columns)
+        
+        st.markdown("**Mapeamento de colunas:**")
+        mapping = {}
+        options = ['ignore'] + target_columns
+        cols = st.columns(3)
+        for i, source_col in enumerate(preview.columns):
+            default = saved_mapping.get(source_col, suggested.get(source_col, 'ignore'))
+            with cols[i % 3]:
+                mapping[source_col] = st.selectbox(
+                    source_col, options=options,
+                    index=options.index(default) if default in options else 0,
+                    key=f"stream_map_{import_type}_{source_col}"
+                )
+        
+        valid, missing = ColumnMapper.validate_mapping(mapping, ColumnMapper.get_required_fields(import_type))
+        if not valid:
+            st.warning(f"⚠️ Campos obrigatórios sem coluna: {', '.join(missing)}")
+        
+        bank_name = None
+        if import_type == 'bank_statements':
+            bank_name = st.text_input("Nome do banco:", value="Banco", key="stream_bank_name")
+        
+        if st.button("📥 Importar em Fluxo", use_container_width=True, type="primary", disabled=not valid):
+            ImportService.save_mapping(db, client_id, import_type, mapping)
+            job_id = ImportJobService.enqueue_file_import(
+                client_id, file_content, filename, import_type, mapping, read_options, bank_name=bank_name
+            )
+            job_enqueued(f"✅ Importação #{job_id} enviada para processamento em segundo plano. "
+                         "Acompanhe o progresso em \"⏳ Importações em Segundo Plano\".")
+    finally:
+        db.close()
+
+
+def show_import_jobs(client_id: int, polling: bool = False):
+    """
+    Progresso das importações em segundo plano do cliente (com cancelamento)
+    """
+    db = SessionLocal()
+    try:
+        jobs = ImportJobService.get_jobs(db, client_id, limit=10)
+        if not jobs:
+            st.info("ℹ️ Nenhuma importação em segundo plano para este cliente.")
+            return
+        
+        for job in jobs:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                label = (f"**#{job['id']}** {job['filename'] or '-'} · "
+                         f"{IMPORT_TYPE_NAMES.get(job['import_type'], job['import_type'])} · "
+                         f"{JOB_STATUS_LABELS.get(job['status'], job['status'])}")
+                counts = f"{job['rows_imported']} registro(s) gravado(s)"
+                if job['rows_skipped']:
+                    counts += f", {job['rows_skipped']} já importada(s)"
+                if job['duration_seconds'] is not None:
+                    counts += f" em {job['duration_seconds']:.1f}s"
+                
+                if job['status'] == 'executando':
+                    st.progress(job['progress'], text=f"{label} · {job['rows_read']} linha(s) lida(s), {counts}")
+                else:
+                    st.write(f"{label} · {counts}")
+                if job['error']:
+                    st.caption(f"❌ {job['error']}")
+                elif job['status'] == 'concluido' and job['rows_imported'] == 0:
+                    if job['rows_skipped']:
+                        st.warning("⚠️ Nenhum registro foi importado: todas as linhas já haviam sido importadas.")
+                    else:
+                        st.warning("⚠️ Nenhum registro foi importado. Verifique o mapeamento e os dados.")
+            with col2:
+                if job['status'] in ('pendente', 'executando'):
+                    if st.button("⏹️ Cancelar", key=f"cancel_job_{job['id']}", use_container_width=True):
+                        ImportJobService.cancel_job(db, job['id'])
+                        st.rerun()
+        
+        if polling and not ImportJobService.has_active_jobs(db, client_id):
+            # Tudo terminou: atualiza a página inteira e encerra a consulta periódica
+            st.rerun()
+    finally:
+        db.close()
+
+
+def job_enqueued(message: str):
+    """
+    Limpa o upload e recarrega a página: o painel de importações em segundo plano
+    (desenhado antes do upload) passa a mostrar a nova importação
+    """
+    st.session_state.import_job_message = message
+    st.session_state.uploader_generation = st.session_state.get('uploader_generation', 0) + 1
+    st.rerun()
+
+
+def show_import_panels(client_id: int):
+    """
+    Importações em segundo plano e histórico (desfazer), exibidos antes do fluxo de
+    upload: as etapas do upload interrompem a página com st.stop()
+    """
+    # Confirmação do envio de uma importação, exibida depois do rerun
+    job_message = st.session_state.pop('import_job_message', None)
+    if job_message:
+        st.success(job_message)
+    
+    # Importações em segundo plano (a página consulta o progresso periodicamente)
+    db = SessionLocal()
+    try:
+        jobs_active = ImportJobService.has_active_jobs(db, client_id)
+    finally:
+        db.close()
+
+    with st.expander("⏳ Importações em Segundo Plano", expanded=jobs_active):
+        if jobs_active and hasattr(st, 'fragment'):
+            st.fragment(run_every=JOB_POLL_SECONDS)(show_import_jobs)(client_id, polling=True)
+        else:
+            show_import_jobs(client_id)
+            if jobs_active and st.button("🔄 Atualizar progresso", key="refresh_import_jobs"):
+                st.rerun()
+
+    # Histórico de importações (desfazer uma importação inteira)
+    with st.expander("🕘 Histórico de Importações"):
+        db = SessionLocal()
+        try:
+            # Confirmação do desfazer, exibida depois do rerun
+            undo_message = st.session_state.pop('undo_batch_message', None)
+            if undo_message:
+                st.success(undo_message)
+        
+            batches = ImportService.get_batches(db, client_id)
+            if not batches:
+                st.info("ℹ️ Nenhuma importação registrada para este cliente.")
+            for batch_info in batches:
+                col1, col2 = st.columns([4, 1])
+                with col1:
+                    duration = batch_info['duration_seconds']
+                    st.write(
+                        f"**#{batch_info['id']}** {batch_info['filename'] or '-'} · {batch_info['import_type']} · "
+                        f"{batch_info['started_at'].strftime('%d/%m/%Y %H:%M')} · "
+                        f"{batch_info['rows_imported']} registro(s)"
+                        + (f" em {duration:.2f}s" if duration is not None else "")
+                        + (" · ❌ desfeita" if batch_info['status'] == 'desfeito' else "")
+                    )
+                with col2:
+                    if batch_info['status'] == 'concluido':
+                        if st.button("↩️ Desfazer", key=f"undo_batch_{batch_info['id']}", use_container_width=True):
+                            removed = ImportService.undo_batch(db, batch_info['id'])
+                            st.session_state.undo_batch_message = (
+                                f"✅ Importação #{batch_info['id']} desfeita: {sum(removed.values())} registro(s) removido(s)"
+                            )
+                            st.rerun()
+        finally:
+            db.close()
+
+
 show_sidebar()
 
 st.title("📥 Importação de Dados")
@@ -59,13 +278,17 @@ try:
 finally:
     db.close()
 
+show_import_panels(client_id)
+
 # Upload de arquivo
 st.subheader("1️⃣ Faça Upload do Arquivo")
 
 uploaded_file = st.file_uploader(
     "Selecione um arquivo (CSV, Excel, PDF, OFX)",
     type=['csv', 'txt', 'xlsx', 'xls', 'pdf', 'ofx'],
-    help="O sistema detectará automaticamente o tipo de arquivo"
+    help="O sistema detectará automaticamente o tipo de arquivo",
+    # Nova chave após enviar uma importação: o upload volta vazio
+    key=f"import_uploader_{st.session_state.get('uploader_generation', 0)}"
 )
 
 if uploaded_file:
@@ -76,6 +299,21 @@ if uploaded_file:
         file_content_preview = uploaded_file.read()
         uploaded_file.seek(0)  # Reset para ler novamente depois
         
+        # Arquivo idêntico (mesmo SHA-256) já importado: evita parse, IA e deduplicação
+        db = SessionLocal()
+        try:
+            previous_import = ImportService.find_imported_file(db, client_id, file_content_preview)
+        finally:
+            db.close()
+        
+        if previous_import:
+            st.warning(
+                f"⚠️ Este arquivo já foi importado em {previous_import.imported_at.strftime('%d/%m/%Y %H:%M')} "
+                f"({previous_import.rows_imported} registro(s) de {previous_import.rows_total} linha(s))."
+            )
+            if not st.checkbox("Processar o arquivo novamente mesmo assim", value=False, key="reimport_known_file"):
+                st.stop()
+        
         detection_result = ParserService.detect_file_type(file_content_preview, uploaded_file.name)
         detected_type = detection_result.get('type', 'CSV')
         confidence = detection_result.get('confidence', 0.0)
@@ -135,20 +373,40 @@ if uploaded_file:
         
         if file_type == 'CSV':
             file_content = uploaded_file.read()
-            delimiter = ParserService.detect_delimiter(file_content)
+            # Encoding, delimitador e cabeçalho detectados de uma única amostra
+            sniffed = ParserService.sniff_csv(file_content)
+            
+            encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
+            if sniffed['encoding'] not in encodings:
+                encodings.insert(0, sniffed['encoding'])
             
             col1, col2 = st.columns(2)
             with col1:
-                encoding = st.selectbox("Encoding:", ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252'])
+                encoding = st.selectbox("Encoding:", encodings, index=encodings.index(sniffed['encoding']))
             with col2:
                 delimiter = st.selectbox("Delimitador:", [',', ';', '\t', '|'], 
-                                        index=[',', ';', '\t', '|'].index(delimiter))
+                                        index=[',', ';', '\t', '|'].index(sniffed['delimiter']))
+            
+            if sniffed['header_row'] > 0:
+                st.caption(f"ℹ️ Cabeçalho encontrado na linha {sniffed['header_row'] + 1}; as linhas anteriores serão ignoradas.")
+            
+            streaming = st.checkbox(
+                "⚡ Importação em fluxo (arquivos grandes)",
+                value=len(file_content) >= STREAMING_THRESHOLD_BYTES,
+                help="Lê e grava o CSV em blocos, sem carregar o arquivo inteiro na memória"
+            )
+            if streaming:
+                show_streaming_import(client_id, uploaded_file.name, file_content,
+                                      {'format': 'csv', 'encoding': encoding, 'delimiter': delimiter})
+                st.stop()
             
             df = ParserService.parse_csv(file_content, encoding, delimiter)
         
         elif file_type == 'Excel':
             file_content = uploaded_file.read()
             sheets = ParserService.get_excel_sheets(file_content)
+            read_all = False
+            selected_sheet = None
             
             if len(sheets) > 1:
                 col1, col2 = st.columns(2)
@@ -160,12 +418,23 @@ if uploaded_file:
                         selected_sheet = st.selectbox("Selecione a planilha:", sheets)
                     else:
                         st.info(f"📊 {len(sheets)} abas serão processadas")
-                
-                if read_all:
-                    df = ParserService.parse_excel(file_content, all_sheets=True)
-                    st.success(f"✅ {len(sheets)} abas processadas e combinadas")
-                else:
-                    df = ParserService.parse_excel(file_content, selected_sheet)
+            
+            streaming = st.checkbox(
+                "⚡ Importação em fluxo (planilhas grandes)",
+                value=len(file_content) >= STREAMING_THRESHOLD_BYTES,
+                help="Lê a planilha em modo somente leitura e grava em blocos, sem carregá-la inteira na memória",
+                key="excel_streaming"
+            )
+            if streaming:
+                show_streaming_import(client_id, uploaded_file.name, file_content,
+                                      {'format': 'excel', 'sheet_name': selected_sheet, 'all_sheets': read_all})
+                st.stop()
+            
+            if read_all:
+                df = ParserService.parse_excel(file_content, all_sheets=True)
+                st.success(f"✅ {len(sheets)} abas processadas e combinadas")
+            elif selected_sheet:
+                df = ParserService.parse_excel(file_content, selected_sheet)
             else:
                 df = ParserService.parse_excel(file_content)
         
@@ -254,7 +523,10 @@ if uploaded_file:
                     with st.spinner("🤖 Analisando arquivo para detectar tipo de dado..."):
                         columns = list(df.columns)
                         data_sample = ai_service._prepare_data_sample(df, max_rows=15)
-                        detection_result = ai_service.detect_data_type(df, columns, data_sample)
+                        detection_result = ai_service.detect_data_type(
+                            df, columns, data_sample,
+                            refresh_cache=st.session_state.pop('refresh_type_detection', False)
+                        )
                     
                     if detection_result.get('success'):
                         suggested_type = detection_result.get('suggested_type')
@@ -309,7 +581,7 @@ if uploaded_file:
                                     st.write(f"- {alt_name} ({alt_confidence}% de confiança)")
                         
                         # Opções de confirmação
-                        col_btn1, col_btn2 = st.columns(2)
+                        col_btn1, col_btn2, col_btn3 = st.columns(3)
                         with col_btn1:
                             if st.button("✅ Confirmar e Continuar", use_container_width=True, type="primary"):
                                 import_type = suggested_type
@@ -321,6 +593,12 @@ if uploaded_file:
                                 st.session_state.show_manual_selection = True
                                 st.rerun()
                         
+                        with col_btn3:
+                            # A detecção vem do cache de IA nos reruns; este botão consulta a IA de novo
+                            if st.button("🔄 Detectar Novamente", use_container_width=True):
+                                st.session_state.refresh_type_detection = True
+                                st.rerun()
+                        
                         # Se já foi confirmado anteriormente, usa o tipo confirmado
                         if 'detected_import_type' in st.session_state:
                             import_type = st.session_state.detected_import_type
@@ -819,79 +1097,29 @@ if uploaded_file:
                 )
                 
                 if import_btn and len(st.session_state.selected_rows) > 0:
-                    with st.spinner("Importando dados..."):
-                        # Filtra apenas linhas selecionadas
-                        selected_indices = sorted(list(st.session_state.selected_rows))
-                        data_to_import = [st.session_state.processed_data[i] for i in selected_indices if 0 <= i < len(st.session_state.processed_data)]
-                        import_df = pd.DataFrame(data_to_import)
-                        
-                        # Importa dados
-                        imported_count = 0
-                        
-                        if import_type == 'transactions':
-                            imported_count = ImportService.import_transactions(
-                                db, client_id, import_df, 'imported', uploaded_file.name,
-                                group_id, subgroup_id
-                            )
-                        
-                        elif import_type == 'bank_statements':
-                            result = ImportService.import_bank_statements(
-                                db, client_id, import_df, bank_name, uploaded_file.name,
-                                group_id, subgroup_id
-                            )
-                            imported_count = result.get('statements', 0)
-                            transactions_created = result.get('transactions', 0)
-                            if imported_count > 0:
-                                st.success(f"✅ {imported_count} extrato(s) importado(s) e {transactions_created} transação(ões) criada(s) automaticamente!")
-                        
-                        elif import_type == 'contracts':
-                            imported_count = ImportService.import_contracts(
-                                db, client_id, import_df, group_id, subgroup_id
-                            )
-                        
-                        elif import_type == 'accounts_payable':
-                            imported_count = ImportService.import_accounts_payable(
-                                db, client_id, import_df, group_id, subgroup_id
-                            )
-                        
-                        elif import_type == 'accounts_receivable':
-                            imported_count = ImportService.import_accounts_receivable(
-                                db, client_id, import_df, group_id, subgroup_id
-                            )
-                        elif import_type == 'financial_investments':
-                            imported_count = ImportService.import_financial_investments(
-                                db, client_id, import_df, group_id, subgroup_id
-                            )
-                        elif import_type == 'credit_card_invoices':
-                            imported_count = ImportService.import_credit_card_invoices(
-                                db, client_id, import_df, group_id, subgroup_id
-                            )
-                        elif import_type == 'card_machine_statements':
-                            imported_count = ImportService.import_card_machine_statements(
-                                db, client_id, import_df, group_id, subgroup_id
-                            )
-                        elif import_type == 'inventory':
-                            imported_count = ImportService.import_inventory(
-                                db, client_id, import_df, group_id, subgroup_id
-                            )
-                        
-                        if import_type != 'bank_statements' and imported_count > 0:
-                            st.success(f"✅ {imported_count} registro(s) importado(s) com sucesso!")
-                            st.balloons()
-                        
-                        # Limpa estado após importação bem-sucedida
-                        if (import_type == 'bank_statements' and imported_count > 0) or (import_type != 'bank_statements' and imported_count > 0):
-                            if 'processed_data' in st.session_state:
-                                del st.session_state.processed_data
-                            if 'selected_rows' in st.session_state:
-                                del st.session_state.selected_rows
-                            if 'last_file_hash' in st.session_state:
-                                del st.session_state.last_file_hash
-                            if 'bank_name_override' in st.session_state:
-                                del st.session_state.bank_name_override
-                        
-                        if import_type != 'bank_statements' and imported_count == 0:
-                            st.warning("⚠️ Nenhum registro foi importado. Verifique os dados.")
+                    # Filtra apenas linhas selecionadas
+                    selected_indices = sorted(list(st.session_state.selected_rows))
+                    data_to_import = [st.session_state.processed_data[i] for i in selected_indices if 0 <= i < len(st.session_state.processed_data)]
+                    import_df = pd.DataFrame(data_to_import)
+                    
+                    # Gravação em segundo plano: linhas já importadas em arquivos anteriores
+                    # são ignoradas e todos os registros levam o id do lote
+                    job_id = ImportJobService.enqueue_dataframe_import(
+                        client_id, import_type, import_df, uploaded_file.name, file_content_preview,
+                        bank_name, group_id, subgroup_id
+                    )
+                    # Limpa estado após enviar a importação
+                    if 'processed_data' in st.session_state:
+                        del st.session_state.processed_data
+                    if 'selected_rows' in st.session_state:
+                        del st.session_state.selected_rows
+                    if 'last_file_hash' in st.session_state:
+                        del st.session_state.last_file_hash
+                    if 'bank_name_override' in st.session_state:
+                        del st.session_state.bank_name_override
+                    
+                    job_enqueued(f"✅ Importação #{job_id} de {len(import_df)} registro(s) enviada para processamento "
+                                 "em segundo plano. Acompanhe o progresso em \"⏳ Importações em Segundo Plano\".")
             
             finally:
                 db.close()
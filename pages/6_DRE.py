@@ -93,7 +93,15 @@ st.markdown("---")
 # Busca dados
 db = SessionLocal()
 try:
-    dre_data = ReportService.get_dre_data(db, client_id, start_date, end_date)
+    # Período atual e período anterior (comparativo) em uma única leitura
+    dias_periodo = (end_date - start_date).days
+    start_date_anterior = start_date - timedelta(days=dias_periodo)
+    end_date_anterior = start_date - timedelta(days=1)
+    
+    dre_data, dre_anterior = ReportService.get_dre_multi(db, client_id, [
+        (start_date, end_date),
+        (start_date_anterior, end_date_anterior)
+    ])
     
     # KPIs principais
     st.subheader("📈 Indicadores Principais")
@@ -407,13 +415,6 @@ try:
         # Comparativo com período anterior
         st.markdown("### 📈 Comparativo com Período Anterior")
         
-        # Calcula período anterior
-        dias_periodo = (end_date - start_date).days
-        start_date_anterior = start_date - timedelta(days=dias_periodo)
-        end_date_anterior = start_date - timedelta(days=1)
-        
-        dre_anterior = ReportService.get_dre_data(db, client_id, start_date_anterior, end_date_anterior)
-        
         col1, col2, col3 = st.columns(3)
         
         with col1:
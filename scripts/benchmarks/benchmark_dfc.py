@@ -0,0 +1,116 @@
+"""
+Benchmark da DFC: montagem do fluxo com laços Python (dicionários por mês/grupo)
+versus o motor vetorizado (NumPy/pandas + cumsum) de ReportService.get_dfc_data,
+e o custo de cada granularidade (mensal, semanal e diária) em vários anos
+
+Uso:
+    python scripts/benchmarks/benchmark_dfc.py --rows 100000 --years 5
+"""
+import argparse
+import time
+from datetime import date
+from dateutil.relativedelta import relativedelta
+
+import numpy as np
+
+from common import create_benchmark_engine, seed, measure, print_results
+
+from services.report_service import ReportService, _fetch_facts, _bucket_periods, _cash_flow
+from services.report_cache import report_cache
+from benchmark_dre import assert_same
+
+
+def legacy_build_dfc(facts):
+    """
+    Montagem original do fluxo (laços sobre as linhas e chaves ordenadas),
+    mantida como referência
+    """
+    fluxo_por_grupo = {}
+    for fact in facts[(facts['source'] == 'transactions') & facts['group_name'].notna()].sort_values(
+        ['group_name', 'year_month'], kind='stable'
+    ).itertuples(index=False):
+        meses = fluxo_por_grupo.setdefault(fact.group_name, {})
+        mes = meses.setdefault(fact.year_month, {'entradas': 0, 'saidas': 0})
+        mes['entradas' if fact.type == 'entrada' else 'saidas'] += float(fact.total)
+
+    fluxo_mensal = {}
+    for fact in facts.itertuples(index=False):
+        mes = fluxo_mensal.setdefault(fact.year_month, {'entradas': 0, 'saidas': 0})
+        mes['entradas' if fact.type == 'entrada' else 'saidas'] += float(fact.total)
+
+    def accumulate(meses):
+        saldo = 0
+        fluxo = []
+        for month_key in sorted(meses):
+            entradas, saidas = meses[month_key]['entradas'], meses[month_key]['saidas']
+            saldo += entradas - saidas
+            fluxo.append({'mes': month_key, 'entradas': entradas, 'saidas': saidas,
+                          'saldo_mes': entradas - saidas, 'saldo_acumulado': saldo})
+        return fluxo, saldo
+
+    fluxo_list, saldo_final = accumulate(fluxo_mensal)
+    fluxo_por_grupo_list = []
+    for grupo, meses in fluxo_por_grupo.items():
+        grupo_fluxo, saldo_grupo = accumulate(meses)
+        fluxo_por_grupo_list.append({'grupo': grupo, 'fluxo_mensal': grupo_fluxo, 'saldo_final': saldo_grupo})
+
+    return {'fluxo_mensal': fluxo_list, 'saldo_final': saldo_final, 'fluxo_por_grupo': fluxo_por_grupo_list}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da DFC')
+    parser.add_argument('--rows', type=int, default=100000, help='Quantidade de transações sintéticas')
+    parser.add_argument('--years', type=int, default=5, help='Anos de histórico')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetições por cenário')
+    args = parser.parse_args()
+
+    engine, Session = create_benchmark_engine()
+    db = Session()
+    try:
+        client_id = seed(db, n_transactions=args.rows, years=args.years)
+        end_date = date.today()
+        start_date = end_date - relativedelta(years=args.years)
+        report_cache.enabled = False
+
+        # Mesmos fatos diários para as duas montagens (isola o custo dos laços)
+        facts = _fetch_facts(db, client_id, start_date, end_date, granularity='daily')
+        assert_same(
+            legacy_build_dfc(facts),
+            ReportService.get_dfc_data(db, client_id, start_date, end_date, granularity='daily')
+        )
+
+        def timed(label, fn):
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                fn()
+            return {'label': label, 'queries': 0, 'ms': (time.perf_counter() - started) * 1000 / args.repeat}
+
+        def vectorized():
+            periods = _bucket_periods(facts['year_month'], 'daily')
+            totals = facts['total'].to_numpy(dtype=float)
+            is_inflow = (facts['type'] == 'entrada').to_numpy()
+            _cash_flow(periods, np.where(is_inflow, totals, 0.0), np.where(is_inflow, 0.0, totals))
+            grouped = ((facts['source'] == 'transactions') & facts['group_name'].notna()).to_numpy()
+            _cash_flow(periods[grouped], np.where(is_inflow, totals, 0.0)[grouped],
+                       np.where(is_inflow, 0.0, totals)[grouped], by=facts['group_name'][grouped])
+
+        print_results(
+            f"Montagem do fluxo diário ({len(facts)} fatos, {args.years} anos)",
+            [timed('Antes: laços Python', lambda: legacy_build_dfc(facts)),
+             timed('Depois: NumPy/pandas + cumsum', vectorized)]
+        )
+
+        print_results(
+            f"get_dfc_data por granularidade - {args.rows} transações",
+            [measure(engine, f"Granularidade {g}",
+                     lambda g=g: ReportService.get_dfc_data(db, client_id, start_date, end_date, granularity=g),
+                     args.repeat)
+             for g in ('monthly', 'weekly', 'daily')],
+            show_gain=False
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Benchmark da DRE: implementação antiga (uma consulta por agregação)
+versus o motor de consulta única de ReportService.get_dre_data,
+o tempo de uma visualização repetida servida pelo cache de relatórios e a DRE
+de três períodos (atual, acumulado do ano e anterior) com get_dre_multi
+
+Uso:
+    python scripts/benchmarks/benchmark_dre.py --rows 10000 50000
+"""
+import argparse
+import math
+from datetime import date
+from dateutil.relativedelta import relativedelta
+
+from common import create_benchmark_engine, seed, measure, print_results
+
+from sqlalchemy import func
+from models.transaction import Transaction
+from models.contract import Contract
+from models.account import AccountPayable, AccountReceivable
+from models.group import Group, Subgroup
+from services.report_service import ReportService
+from services.report_cache import report_cache
+
+
+def legacy_get_dre_data(db, client_id, start_date, end_date):
+    """
+    Implementação original da DRE (14 consultas), mantida como referência
+    """
+    def trans_filter(trans_type):
+        return [
+            Transaction.client_id == client_id,
+            Transaction.type == trans_type,
+            Transaction.date >= start_date,
+            Transaction.date <= end_date
+        ]
+
+    contract_filter = [
+        Contract.client_id == client_id, Contract.status == 'concluido',
+        Contract.event_date >= start_date, Contract.event_date <= end_date
+    ]
+    payable_filter = [
+        AccountPayable.client_id == client_id, AccountPayable.paid == True,
+        AccountPayable.payment_date >= start_date, AccountPayable.payment_date <= end_date
+    ]
+    receivable_filter = [
+        AccountReceivable.client_id == client_id, AccountReceivable.received == True,
+        AccountReceivable.receipt_date >= start_date, AccountReceivable.receipt_date <= end_date
+    ]
+    contract_value = Contract.service_value + Contract.displacement_value
+
+    receitas_trans = db.query(func.sum(Transaction.value)).filter(*trans_filter('entrada')).scalar() or 0
+    despesas_trans = db.query(func.sum(Transaction.value)).filter(*trans_filter('saida')).scalar() or 0
+    receitas_contratos = db.query(func.sum(contract_value)).filter(*contract_filter).scalar() or 0
+    despesas_contas_pagar = db.query(func.sum(AccountPayable.value)).filter(*payable_filter).scalar() or 0
+    receitas_contas_receber = db.query(func.sum(AccountReceivable.value)).filter(*receivable_filter).scalar() or 0
+
+    receitas = receitas_trans + receitas_contratos + receitas_contas_receber
+    despesas = despesas_trans + despesas_contas_pagar
+    resultado = receitas - despesas
+    margem = (resultado / receitas * 100) if receitas > 0 else 0
+
+    def por_grupo(trans_type):
+        return db.query(Group.name, func.sum(Transaction.value)).join(
+            Transaction, Transaction.group_id == Group.id
+        ).filter(*trans_filter(trans_type)).group_by(Group.name).all()
+
+    def por_subgrupo(trans_type):
+        return db.query(Group.name, Subgroup.name, func.sum(Transaction.value)).join(
+            Transaction, Transaction.subgroup_id == Subgroup.id
+        ).join(Group, Subgroup.group_id == Group.id).filter(
+            *trans_filter(trans_type)
+        ).group_by(Group.name, Subgroup.name).all()
+
+    def por_categoria(trans_type):
+        return db.query(Transaction.category, func.sum(Transaction.value)).filter(
+            *trans_filter(trans_type), Transaction.group_id.is_(None)
+        ).group_by(Transaction.category).all()
+
+    grupos_contratos = db.query(Group.name, func.sum(contract_value)).join(
+        Contract, Contract.group_id == Group.id).filter(*contract_filter).group_by(Group.name).all()
+    grupos_pagar = db.query(Group.name, func.sum(AccountPayable.value)).join(
+        AccountPayable, AccountPayable.group_id == Group.id).filter(*payable_filter).group_by(Group.name).all()
+    grupos_receber = db.query(Group.name, func.sum(AccountReceivable.value)).join(
+        AccountReceivable, AccountReceivable.group_id == Group.id).filter(*receivable_filter).group_by(Group.name).all()
+
+    receitas_por_grupo = {}
+    for rows in (por_grupo('entrada'), grupos_contratos, grupos_receber):
+        for name, total in rows:
+            receitas_por_grupo[name or 'Sem grupo'] = receitas_por_grupo.get(name or 'Sem grupo', 0) + float(total)
+    despesas_por_grupo = {}
+    for rows in (por_grupo('saida'), grupos_pagar):
+        for name, total in rows:
+            despesas_por_grupo[name or 'Sem grupo'] = despesas_por_grupo.get(name or 'Sem grupo', 0) + float(total)
+
+    return {
+        'receitas': float(receitas),
+        'despesas': float(despesas),
+        'resultado': float(resultado),
+        'margem': float(margem),
+        'receitas_por_grupo': [{'grupo': g, 'valor': v} for g, v in receitas_por_grupo.items()],
+        'despesas_por_grupo': [{'grupo': g, 'valor': v} for g, v in despesas_por_grupo.items()],
+        'receitas_por_subgrupo': [{'grupo': r[0] or 'Sem grupo', 'subgrupo': r[1] or 'Sem subgrupo', 'valor': float(r[2])} for r in por_subgrupo('entrada')],
+        'despesas_por_subgrupo': [{'grupo': r[0] or 'Sem grupo', 'subgrupo': r[1] or 'Sem subgrupo', 'valor': float(r[2])} for r in por_subgrupo('saida')],
+        'receitas_por_categoria': [{'categoria': r[0] or 'Sem categoria', 'valor': float(r[1])} for r in por_categoria('entrada')],
+        'despesas_por_categoria': [{'categoria': r[0] or 'Sem categoria', 'valor': float(r[1])} for r in por_categoria('saida')],
+        'receitas_contratos': float(receitas_contratos),
+        'receitas_contas_receber': float(receitas_contas_receber),
+        'despesas_contas_pagar': float(despesas_contas_pagar)
+    }
+
+
+def assert_same(expected, actual, path='dre'):
+    """
+    Compara recursivamente os dois resultados (com tolerância para floats)
+    """
+    if isinstance(expected, dict):
+        assert expected.keys() == actual.keys(), f"{path}: chaves diferentes"
+        for key in expected:
+            assert_same(expected[key], actual[key], f"{path}.{key}")
+    elif isinstance(expected, list):
+        assert len(expected) == len(actual), f"{path}: tamanhos diferentes"
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            assert_same(e, a, f"{path}[{i}]")
+    elif isinstance(expected, float):
+        assert math.isclose(expected, actual, rel_tol=1e-9, abs_tol=1e-6), f"{path}: {expected} != {actual}"
+    else:
+        assert expected == actual, f"{path}: {expected!r} != {actual!r}"
+
+
+def run(n_rows: int, repeat: int):
+    """
+    Compara os cenários da DRE em um banco novo com n_rows transações
+    """
+    engine, Session = create_benchmark_engine()
+    db = Session()
+    try:
+        client_id = seed(db, n_transactions=n_rows)
+        end_date = date.today()
+        start_date = end_date - relativedelta(years=1)
+
+        assert_same(
+            legacy_get_dre_data(db, client_id, start_date, end_date),
+            ReportService.get_dre_data(db, client_id, start_date, end_date)
+        )
+
+        report_cache.enabled = False
+        results = [
+            measure(engine, 'Antes: uma consulta por agregação',
+                    lambda: legacy_get_dre_data(db, client_id, start_date, end_date), repeat),
+            measure(engine, 'Depois: consulta única (UNION ALL)',
+                    lambda: ReportService.get_dre_data(db, client_id, start_date, end_date), repeat),
+        ]
+
+        # Visualizações repetidas de um cliente sem alterações (cache de relatórios)
+        report_cache.enabled = True
+        report_cache.clear()
+        ReportService.get_dre_data(db, client_id, start_date, end_date)
+        results.append(
+            measure(engine, 'Repetição com cache de relatórios',
+                    lambda: ReportService.get_dre_data(db, client_id, start_date, end_date), repeat)
+        )
+        print_results(f"DRE de 12 meses - {n_rows} transações", results)
+
+        # Relatório gerencial: período atual, acumulado do ano e período anterior
+        report_cache.enabled = False
+        month_start = end_date.replace(day=1)
+        periods = [
+            (month_start, end_date),
+            (date(end_date.year, 1, 1), end_date),
+            (month_start - relativedelta(months=1), month_start - relativedelta(days=1)),
+        ]
+        for period, dre in zip(periods, ReportService.get_dre_multi(db, client_id, periods)):
+            assert_same(legacy_get_dre_data(db, client_id, *period), dre)
+
+        results = [
+            measure(engine, 'Antes: três chamadas get_dre_data',
+                    lambda: [ReportService.get_dre_data(db, client_id, *p) for p in periods], repeat),
+            measure(engine, 'Depois: get_dre_multi (uma leitura)',
+                    lambda: ReportService.get_dre_multi(db, client_id, periods), repeat),
+        ]
+        print_results(f"DRE de três períodos - {n_rows} transações", results)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da DRE')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 50000],
+                        help='Quantidades de transações sintéticas (um banco por quantidade)')
+    parser.add_argument('--repeat', type=int, default=5, help='Repetições por cenário')
+    args = parser.parse_args()
+
+    # Clientes pequenos também: o custo fixo da montagem do resultado pesa mais ali
+    for rows in args.rows:
+        run(rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
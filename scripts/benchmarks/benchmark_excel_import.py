@@ -0,0 +1,126 @@
+"""
+Benchmark da importação de planilhas grandes: todas as abas carregadas com
+parse_excel(all_sheets=True) + import_dataframe versus leitura em modo somente
+leitura por blocos (ImportService.import_excel_stream), comparando tempo e pico de memória
+
+Uso:
+    python scripts/benchmarks/benchmark_excel_import.py --rows 50000 --sheets 3 --chunk 10000
+"""
+import argparse
+import os
+import random
+import time
+import tracemalloc
+from datetime import datetime, time as day_time, timedelta
+from io import BytesIO
+
+# Mede a leitura em si, sem o cache em disco dos resultados
+os.environ.setdefault('PARSE_CACHE_ENABLED', '0')
+
+from openpyxl import Workbook
+
+from common import create_benchmark_engine
+
+from models.client import Client
+from models.credit_card import CreditCardInvoice
+from services.import_service import ImportService
+from services.parser_service import ParserService
+
+
+MAPPING = {
+    'Data': 'transaction_date',
+    'Descricao': 'description',
+    'Valor': 'value',
+    'Parcela': 'installment_number',
+    'Total Parcelas': 'total_installments',
+}
+
+
+def make_invoice_workbook(n_rows: int, n_sheets: int, seed_value: int = 42) -> bytes:
+    """
+    Faturas de cartão sintéticas, uma aba por mês, gravadas em modo write-only
+    (datas com hora, como as células datetime que o openpyxl devolve)
+    """
+    rng = random.Random(seed_value)
+    workbook = Workbook(write_only=True)
+    start = datetime.combine(datetime.today() - timedelta(days=30 * n_sheets), day_time())
+    for month in range(n_sheets):
+        sheet = workbook.create_sheet(f"Fatura {month + 1:02d}")
+        sheet.append(list(MAPPING))
+        for _ in range(n_rows):
+            total = rng.choice([1, 1, 1, 3, 6, 12])
+            sheet.append([
+                start + timedelta(days=month * 30 + rng.randint(0, 29), minutes=rng.randint(0, 1439)),
+                rng.choice(['SUPERMERCADO', 'POSTO', 'FARMACIA', 'RESTAURANTE']),
+                round(rng.uniform(5, 1500), 2),
+                rng.randint(1, total),
+                total,
+            ])
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def run(label, import_fn, content):
+    """
+    Importa a planilha em um banco novo e retorna tempo, pico de memória e contagem
+    """
+    engine, Session = create_benchmark_engine(tuned=True)
+    db = Session()
+    try:
+        client = Client(name='Cliente Planilha', cpf_cnpj='00.000.000/0001-00')
+        db.add(client)
+        db.commit()
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        import_fn(db, client.id, content)
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        return {'label': label, 'seconds': elapsed, 'peak_mb': peak / 1024 ** 2,
+                'count': db.query(CreditCardInvoice).count()}
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da importação de planilhas')
+    parser.add_argument('--rows', type=int, default=50000, help='Linhas por aba')
+    parser.add_argument('--sheets', type=int, default=3, help='Abas da planilha')
+    parser.add_argument('--chunk', type=int, default=10000, help='Linhas por bloco')
+    args = parser.parse_args()
+
+    content = make_invoice_workbook(args.rows, args.sheets)
+
+    def whole_workbook(db, client_id, data):
+        df = ImportService.apply_mapping(ParserService.parse_excel(data, all_sheets=True), MAPPING)
+        ImportService.import_dataframe(db, client_id, 'credit_card_invoices', df, 'faturas.xlsx')
+
+    def streaming(db, client_id, data):
+        ImportService.import_excel_stream(
+            db, client_id, BytesIO(data), 'credit_card_invoices', MAPPING, 'faturas.xlsx',
+            all_sheets=True, chunksize=args.chunk
+        )
+
+    results = [
+        run('Todas as abas (parse_excel)', whole_workbook, content),
+        run(f'Em fluxo (blocos de {args.chunk})', streaming, content),
+    ]
+    expected = args.rows * args.sheets
+    # Datas com hora precisam ser aceitas nos dois caminhos (nenhuma linha descartada)
+    assert results[0]['count'] == results[1]['count'] == expected, "Contagens diferentes"
+
+    print(f"\nImportação de faturas em Excel - {args.sheets} abas x {args.rows} linhas "
+          f"({len(content) / 1024 ** 2:.1f} MB)")
+    print("-" * 72)
+    print(f"{'Cenário':<40}{'Tempo (s)':>12}{'Pico (MB)':>14}")
+    for r in results:
+        print(f"{r['label']:<40}{r['seconds']:>12.2f}{r['peak_mb']:>14.1f}")
+    print(f"\nRedução do pico de memória: {results[0]['peak_mb'] / results[1]['peak_mb']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
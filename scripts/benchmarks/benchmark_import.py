@@ -0,0 +1,175 @@
+"""
+Benchmark da importação: caminho antigo (iterrows + um objeto ORM por linha e,
+nos extratos, uma consulta de duplicidade por linha) versus o caminho em massa
+de ImportService (dicionários + executemany em blocos), e o parse de datas e
+valores por linha versus por coluna
+
+Uso:
+    python scripts/benchmarks/benchmark_import.py --rows 100000
+"""
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from common import create_benchmark_engine
+
+from sqlalchemy import select
+from models.client import Client
+from models.transaction import Transaction, BankStatement
+from services.import_service import ImportService
+from utils.validators import parse_date, parse_currency, parse_date_series, parse_currency_series
+
+
+def make_statement_file(n_rows: int, seed_value: int = 42) -> pd.DataFrame:
+    """
+    Extrato sintético já mapeado (datas e valores como texto, como vêm do arquivo)
+    """
+    rng = random.Random(seed_value)
+    start = date.today() - timedelta(days=730)
+    rows = []
+    for i in range(n_rows):
+        value = rng.uniform(-5000, 5000)
+        rows.append({
+            'date': (start + timedelta(days=rng.randint(0, 730))).strftime('%d/%m/%Y'),
+            'description': f'PIX {rng.randint(1, n_rows // 4 or 1)}',
+            'value': f"{value:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            'balance': f"{rng.uniform(0, 100000):.2f}".replace('.', ','),
+        })
+    # Algumas linhas inválidas, que devem ser ignoradas nos dois caminhos
+    for i in range(0, n_rows, 1000):
+        rows[i]['date'] = 'data inválida'
+    return pd.DataFrame(rows)
+
+
+def legacy_import_bank_statements(db, client_id, df, bank_name, filename):
+    """
+    Implementação original (por linha), mantida como referência
+    """
+    statements_count = 0
+    transactions_count = 0
+    for _, row in df.iterrows():
+        try:
+            parsed = parse_date(str(row.get('date', '')))
+            if not parsed:
+                continue
+            value = parse_currency(str(row.get('value', 0)))
+            if value is None:
+                continue
+            balance = parse_currency(str(row.get('balance', ''))) if 'balance' in row else None
+            description = str(row.get('description', ''))
+            date_obj = parsed.date()
+
+            db.add(BankStatement(
+                client_id=client_id, bank_name=bank_name, date=date_obj, description=description,
+                value=value, balance=balance, imported_at=datetime.utcnow()
+            ))
+            statements_count += 1
+
+            existing = db.query(Transaction).filter(
+                Transaction.client_id == client_id,
+                Transaction.date == date_obj,
+                Transaction.description == description,
+                Transaction.value == abs(value),
+                Transaction.document_type == 'extrato_bancario'
+            ).first()
+            if not existing:
+                db.add(Transaction(
+                    client_id=client_id, date=date_obj, description=description, value=abs(value),
+                    type='entrada' if value > 0 else 'saida', bank_name=bank_name,
+                    document_type='extrato_bancario', imported_from=filename
+                ))
+                transactions_count += 1
+        except Exception as e:
+            print(f"Erro ao importar linha: {e}")
+            continue
+    db.commit()
+    return {'statements': statements_count, 'transactions': transactions_count}
+
+
+def compare_parsing(df):
+    """
+    Parse por valor (parse_date/parse_currency em cada linha) versus por coluna
+    (parse_date_series/parse_currency_series), conferindo que os resultados coincidem
+    """
+    columns = [('date', parse_date, parse_date_series),
+               ('value', parse_currency, parse_currency_series),
+               ('balance', parse_currency, parse_currency_series)]
+
+    started = time.perf_counter()
+    scalar = {c: [scalar_fn(str(v)) for v in df[c]] for c, scalar_fn, _ in columns}
+    scalar_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    series = {c: series_fn(df[c]) for c, _, series_fn in columns}
+    series_seconds = time.perf_counter() - started
+
+    for c, _, _ in columns:
+        parsed, valid = series[c]
+        expected = scalar[c]
+        assert [v is not None for v in expected] == valid.tolist(), f"{c}: validade diferente"
+        assert all(e == p for e, p, ok in zip(expected, parsed, valid) if ok), f"{c}: valores diferentes"
+
+    print(f"\nParse de datas e valores - {len(df)} linhas x {len(columns)} colunas")
+    print("-" * 64)
+    print(f"{'Por valor (parse_date/parse_currency)':<44}{scalar_seconds:>12.3f} s")
+    print(f"{'Por coluna (*_series)':<44}{series_seconds:>12.3f} s")
+    print(f"Ganho: {scalar_seconds / series_seconds:.1f}x")
+
+
+def run(label, import_fn, df):
+    """
+    Importa o arquivo em um banco novo e retorna tempo, contagens e um resumo do conteúdo
+    """
+    # Mesmo perfil de SQLite da aplicação (config.database) nos dois cenários
+    engine, Session = create_benchmark_engine(tuned=True)
+    db = Session()
+    try:
+        client = Client(name='Cliente Importação', cpf_cnpj='00.000.000/0001-00')
+        db.add(client)
+        db.commit()
+
+        started = time.perf_counter()
+        counts = import_fn(db, client.id, df, 'Banco Benchmark', 'extrato.csv')
+        elapsed = time.perf_counter() - started
+
+        columns = ['date', 'description', 'value', 'type', 'bank_name', 'document_type', 'imported_from']
+        content = sorted(
+            tuple(row) for model in (Transaction, BankStatement)
+            for row in db.execute(select(*[getattr(model, c) for c in columns if hasattr(model, c)])).all()
+        )
+        return {'label': label, 'seconds': elapsed, 'counts': counts, 'content': content}
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da importação em massa')
+    parser.add_argument('--rows', type=int, default=100000, help='Linhas do extrato sintético')
+    args = parser.parse_args()
+
+    df = make_statement_file(args.rows)
+    results = [
+        run('Antes: iterrows + ORM por linha', legacy_import_bank_statements, df),
+        run('Depois: executemany em blocos', ImportService.import_bank_statements, df),
+    ]
+
+    assert results[0]['counts'] == results[1]['counts'], "Contagens diferentes"
+    assert results[0]['content'] == results[1]['content'], "Conteúdo importado diferente"
+
+    print(f"\nImportação de extrato - {args.rows} linhas")
+    print("-" * 64)
+    print(f"{'Cenário':<36}{'Tempo (s)':>12}{'Linhas/s':>16}")
+    for r in results:
+        print(f"{r['label']:<36}{r['seconds']:>12.2f}{args.rows / r['seconds']:>16.0f}")
+    print(f"\nContagens: {results[1]['counts']}")
+    print(f"Ganho: {results[0]['seconds'] / results[1]['seconds']:.1f}x")
+
+    compare_parsing(df)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark da extração de PDFs: laço serial original (extract_text + extract_tables
+e extract_table como alternativa) versus ParserService.parse_pdf_complete em série
+e com o pool de processos, sobre extratos sintéticos de várias páginas
+
+Uso:
+    python scripts/benchmarks/benchmark_pdf.py --pages 20 80 --workers 4
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from io import BytesIO
+
+import pdfplumber
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, PageBreak
+from reportlab.lib.styles import getSampleStyleSheet
+
+# Mede o parsing em si, sem o cache em disco dos resultados
+os.environ.setdefault('PARSE_CACHE_ENABLED', '0')
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.parser_service import ParserService
+
+
+def make_statement_pdf(n_pages: int, rows_per_page: int = 35, seed_value: int = 42) -> bytes:
+    """
+    Extrato bancário sintético: cabeçalho, uma tabela de lançamentos por página
+    e algumas páginas só com texto (avisos), onde não há tabela
+    """
+    rng = random.Random(seed_value)
+    styles = getSampleStyleSheet()
+    buffer = BytesIO()
+    story = [Paragraph("Banco Exemplo S.A. - Extrato de Conta Corrente", styles['Title']),
+             Paragraph("Agência 0001 Conta 12345-6", styles['Normal'])]
+    day = date.today() - timedelta(days=n_pages * 3)
+    balance = 10000.0
+
+    for page in range(n_pages):
+        if page % 10 == 9:
+            story.append(Paragraph("Avisos importantes", styles['Heading2']))
+            for _ in range(25):
+                story.append(Paragraph("Mantenha seus dados atualizados. " * 4, styles['Normal']))
+        else:
+            rows = [['Data', 'Histórico', 'Documento', 'Valor', 'Saldo']]
+            for _ in range(rows_per_page):
+                day += timedelta(days=rng.randint(0, 1))
+                value = round(rng.uniform(-900, 900), 2)
+                balance += value
+                rows.append([day.strftime('%d/%m/%Y'), f"PIX {rng.randint(1, 500)}",
+                             str(rng.randint(100000, 999999)), f"{value:.2f}", f"{balance:.2f}"])
+            table = Table(rows)
+            table.setStyle(TableStyle([('GRID', (0, 0), (-1, -1), 0.5, colors.black)]))
+            story.append(table)
+        story.append(PageBreak())
+
+    SimpleDocTemplate(buffer, pagesize=A4).build(story)
+    return buffer.getvalue()
+
+
+def legacy_extract(file_content: bytes):
+    """
+    Laço original de parse_pdf_complete (texto e tabelas por página), mantido como referência
+    """
+    pages = []
+    with pdfplumber.open(BytesIO(file_content)) as pdf:
+        for page in pdf.pages:
+            page_text = page.extract_text() or ''
+            page_tables = page.extract_tables()
+            if not page_tables:
+                try:
+                    single_table = page.extract_table()
+                    if single_table:
+                        page_tables = [single_table]
+                except:
+                    pass
+            pages.append((page_text, page_tables or []))
+    return pages
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da extração de PDFs')
+    parser.add_argument('--pages', type=int, nargs='+', default=[20, 80], help='Páginas dos PDFs sintéticos')
+    parser.add_argument('--workers', type=int, default=4, help='Processos do modo paralelo')
+    parser.add_argument('--repeat', type=int, default=1, help='Repetições por cenário')
+    args = parser.parse_args()
+
+    for n_pages in args.pages:
+        content = make_statement_pdf(n_pages)
+
+        legacy, legacy_s = timed(lambda: legacy_extract(content), args.repeat)
+        serial, serial_s = timed(lambda: ParserService.parse_pdf_complete(content, parallel=False), args.repeat)
+        pooled, pooled_s = timed(
+            lambda: ParserService.parse_pdf_complete(content, parallel=True, max_workers=args.workers), args.repeat
+        )
+
+        # Mesmo texto e tabelas, na ordem das páginas, nos três caminhos
+        expected = [{'text': text, 'tables': tables} for text, tables in legacy]
+        for result in (serial, pooled):
+            assert [{'text': p['text'], 'tables': p['tables']} for p in result['pages']] == expected, "Páginas diferentes"
+        assert serial['full_text'] == pooled['full_text']
+        assert serial['dataframe'].equals(pooled['dataframe'])
+
+        num_pages = serial['metadata']['num_pages']
+        print(f"\nExtrato de {num_pages} páginas ({len(content) / 1024:.0f} KB)")
+        print("-" * 64)
+        print(f"{'Cenário':<44}{'Tempo (s)':>12}")
+        print(f"{'Antes: laço serial com extract_table':<44}{legacy_s:>12.2f}")
+        print(f"{'Depois: serial, sem extract_table':<44}{serial_s:>12.2f}")
+        print(f"{f'Depois: pool de {args.workers} processos':<44}{pooled_s:>12.2f}")
+        print(f"Ganho: {legacy_s / pooled_s:.1f}x (sem extract_table: {legacy_s / serial_s:.1f}x)")
+
+    # O ganho do pool depende dos núcleos disponíveis (ver PDF_PARSE_WORKERS)
+    print(f"\nCPUs disponíveis: {os.cpu_count()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark dos formatos de dados nos prompts de processamento (_create_prompt_process_*):
+tokens estimados por linha e tempo ponta a ponta de process_and_structure_data com
+um provedor simulado (latência por chamada + por token enviado + por linha gerada)
+
+Uso:
+    python scripts/benchmarks/benchmark_prompt_format.py --rows 300
+"""
+import argparse
+import os
+import random
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from common import SimulatedAIService
+
+import utils.prompt_format as prompt_format
+from utils.prompt_format import PROMPT_FORMATS, estimate_tokens, format_frame
+
+
+def make_frames(n_rows: int, seed_value: int = 42) -> dict:
+    """
+    Um arquivo sintético por tipo de importação, com colunas no estilo dos arquivos reais
+    """
+    rng = random.Random(seed_value)
+    start = date.today() - timedelta(days=365)
+
+    def day():
+        return (start + timedelta(days=rng.randint(0, 364))).strftime('%d/%m/%Y')
+
+    def money():
+        return round(rng.uniform(10, 5000), 2)
+
+    def words(options):
+        return [rng.choice(options) for _ in range(n_rows)]
+
+    history = ['PIX RECEBIDO FULANO DE TAL', 'TED ENVIADA FORNECEDOR LTDA', 'TARIFA BANCARIA', 'BOLETO PAGO ENERGIA']
+    statement = {'Data': [day() for _ in range(n_rows)], 'Historico': words(history),
+                 'Documento': [rng.randint(100000, 999999) for _ in range(n_rows)],
+                 'Valor': [round(rng.uniform(-3000, 3000), 2) for _ in range(n_rows)]}
+    account = {'Conta': words(['Aluguel', 'Energia', 'Fornecedor ABC', 'Cliente XYZ']),
+               'Vencimento': [day() for _ in range(n_rows)], 'Valor': [money() for _ in range(n_rows)],
+               'Situacao': words(['Em aberto', 'Pago'])}
+    return {
+        'transactions': pd.DataFrame(statement),
+        'bank_statements': pd.DataFrame(statement),
+        'accounts_payable': pd.DataFrame(account),
+        'accounts_receivable': pd.DataFrame(account),
+        'contracts': pd.DataFrame({
+            'Contratante': words(['Maria Souza', 'João Lima', 'Empresa Alfa']),
+            'Data Contrato': [day() for _ in range(n_rows)], 'Data Evento': [day() for _ in range(n_rows)],
+            'Valor Servico': [money() for _ in range(n_rows)], 'Tipo': words(['Casamento', 'Formatura'])}),
+        'financial_investments': pd.DataFrame({
+            'Data': [day() for _ in range(n_rows)], 'Aplicacao': words(['CDB', 'LCI', 'Tesouro Selic']),
+            'Aplicado': [money() for _ in range(n_rows)], 'Resgatado': [money() for _ in range(n_rows)],
+            'Rendimento': [round(rng.uniform(0, 80), 2) for _ in range(n_rows)]}),
+        'credit_card_invoices': pd.DataFrame({
+            'Data': [day() for _ in range(n_rows)], 'Estabelecimento': words(['SUPERMERCADO', 'POSTO', 'FARMACIA']),
+            'Valor': [money() for _ in range(n_rows)], 'Parcela': [f"{rng.randint(1, 3)}/3" for _ in range(n_rows)]}),
+        'card_machine_statements': pd.DataFrame({
+            'Data Venda': [day() for _ in range(n_rows)], 'Bandeira': words(['VISA', 'MASTERCARD', 'ELO']),
+            'Modalidade': words(['Crédito', 'Débito']), 'Valor Bruto': [money() for _ in range(n_rows)],
+            'Taxa': [round(rng.uniform(1, 5), 2) for _ in range(n_rows)], 'Valor Liquido': [money() for _ in range(n_rows)]}),
+        'inventory': pd.DataFrame({
+            'Produto': words(['Parafuso 10mm', 'Porca 8mm', 'Arruela']), 'Quantidade': [rng.randint(1, 500) for _ in range(n_rows)],
+            'Valor Unitario': [round(rng.uniform(0.1, 20), 2) for _ in range(n_rows)],
+            'Data': [day() for _ in range(n_rows)], 'Movimento': words(['Entrada', 'Saída'])}),
+    }
+
+
+def measure(import_type: str, df: pd.DataFrame, fmt: str, latency: tuple, workers: int) -> dict:
+    prompt_format.AI_PROMPT_FORMAT = fmt
+    data_tokens = estimate_tokens(format_frame(df.assign(_original_index=df.index), fmt))
+
+    service = SimulatedAIService(*latency)
+    started = time.perf_counter()
+    result = service.process_and_structure_data(df, import_type, max_workers=workers)
+    elapsed = time.perf_counter() - started
+    assert result['success'], result['error']
+    assert len(result['processed_data']) == len(df), f"{import_type}/{fmt}: linhas faltando"
+
+    return {'data_per_row': data_tokens / len(df), 'prompt_per_row': service.prompt_tokens / len(df),
+            'calls': service.calls, 'seconds': elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dos formatos de dados nos prompts')
+    parser.add_argument('--rows', type=int, default=300, help='Linhas de cada arquivo')
+    parser.add_argument('--workers', type=int, default=4, help='Blocos enviados ao mesmo tempo')
+    parser.add_argument('--call-latency', type=float, default=0.3, help='Latência por chamada (s)')
+    parser.add_argument('--row-latency', type=float, default=0.004, help='Tempo de geração por linha (s)')
+    parser.add_argument('--token-latency', type=float, default=0.0002, help='Tempo por token enviado (s)')
+    args = parser.parse_args()
+
+    latency = (args.call_latency, args.row_latency, args.token_latency)
+    frames = make_frames(args.rows)
+
+    print(f"\nFormatos de prompt - {args.rows} linhas por tipo, {args.workers} blocos por vez "
+          f"(tokens estimados por linha: dados / prompt completo)")
+    print("-" * 96)
+    print(f"{'Tipo':<26}" + ''.join(f"{fmt:>17}" for fmt in PROMPT_FORMATS))
+
+    totals = {fmt: 0.0 for fmt in PROMPT_FORMATS}
+    for import_type, df in frames.items():
+        cells = []
+        for fmt in PROMPT_FORMATS:
+            r = measure(import_type, df, fmt, latency, args.workers)
+            totals[fmt] += r['seconds']
+            cells.append(f"{r['data_per_row']:5.1f}/{r['prompt_per_row']:5.1f} {r['seconds']:4.1f}s")
+        print(f"{import_type:<26}" + ''.join(f"{cell:>17}" for cell in cells))
+
+    print(f"\n{'Tempo total':<26}" + ''.join(f"{totals[fmt]:>16.1f}s" for fmt in PROMPT_FORMATS))
+    print(f"Ganho do csv sobre json: {totals['json'] / totals['csv']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark de leitura e escrita concorrentes: padrões do SQLite (journal DELETE)
+versus o perfil de desempenho de config.database (WAL, synchronous=NORMAL,
+mmap, cache_size, temp_store=MEMORY e busy_timeout)
+
+Leitores geram a DRE continuamente (cache de relatórios desativado) enquanto
+um escritor grava transações em commits pequenos, como numa importação.
+
+Uso:
+    python scripts/benchmarks/benchmark_sqlite_pragmas.py --readers 4 --seconds 5
+"""
+import argparse
+import random
+import threading
+import time
+from datetime import date, timedelta
+
+from sqlalchemy.exc import OperationalError
+
+from common import create_benchmark_engine, seed
+
+from models.transaction import Transaction
+from services.report_service import ReportService
+from services.report_cache import report_cache
+
+
+def run_profile(label: str, tuned: bool, args) -> dict:
+    """
+    Executa leitores e um escritor concorrentes por `args.seconds` segundos
+    """
+    engine, Session = create_benchmark_engine(tuned=tuned)
+    db = Session()
+    client_id = seed(db, n_transactions=args.rows)
+    db.close()
+
+    end_date = date.today()
+    start_date = end_date - timedelta(days=365)
+    stop = threading.Event()
+    counters = {'reads': 0, 'writes': 0, 'errors': 0, 'write_ms': []}
+    lock = threading.Lock()
+
+    def reader():
+        session = Session()
+        try:
+            while not stop.is_set():
+                try:
+                    ReportService.get_dre_data(session, client_id, start_date, end_date)
+                    with lock:
+                        counters['reads'] += 1
+                except OperationalError:
+                    session.rollback()
+                    with lock:
+                        counters['errors'] += 1
+                session.rollback()  # encerra a transação de leitura
+        finally:
+            session.close()
+
+    def writer():
+        rng = random.Random(7)
+        session = Session()
+        try:
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    for i in range(args.batch):
+                        session.add(Transaction(
+                            client_id=client_id,
+                            date=end_date - timedelta(days=rng.randint(0, 27)),
+                            description=f'Importação concorrente {i}',
+                            value=round(rng.uniform(10, 500), 2),
+                            type=rng.choice(['entrada', 'saida']),
+                            document_type='manual'
+                        ))
+                    session.commit()
+                    with lock:
+                        counters['writes'] += 1
+                        counters['write_ms'].append((time.perf_counter() - started) * 1000)
+                except OperationalError:
+                    session.rollback()
+                    with lock:
+                        counters['errors'] += 1
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    write_ms = sorted(counters['write_ms']) or [0.0]
+    return {
+        'label': label,
+        'reads_s': counters['reads'] / args.seconds,
+        'writes_s': counters['writes'] / args.seconds,
+        'p95_write_ms': write_ms[int(len(write_ms) * 0.95) - 1 if len(write_ms) > 1 else 0],
+        'errors': counters['errors'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de concorrência do SQLite')
+    parser.add_argument('--rows', type=int, default=20000, help='Transações sintéticas iniciais')
+    parser.add_argument('--readers', type=int, default=4, help='Threads leitoras (páginas DRE/DFC)')
+    parser.add_argument('--batch', type=int, default=50, help='Transações por commit do escritor')
+    parser.add_argument('--seconds', type=float, default=5, help='Duração de cada cenário')
+    args = parser.parse_args()
+
+    report_cache.enabled = False
+    results = [
+        run_profile('Antes: padrões do SQLite', False, args),
+        run_profile('Depois: perfil WAL + PRAGMAs', True, args),
+    ]
+
+    print(f"\nLeitura/escrita concorrentes - {args.readers} leitores, 1 escritor ({args.batch}/commit)")
+    print("-" * 86)
+    print(f"{'Cenário':<32}{'Leituras/s':>12}{'Commits/s':>12}{'p95 commit (ms)':>18}{'Erros':>10}")
+    for r in results:
+        print(f"{r['label']:<32}{r['reads_s']:>12.1f}{r['writes_s']:>12.1f}{r['p95_write_ms']:>18.1f}{r['errors']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark da importação em fluxo de CSVs grandes: arquivo inteiro em um
+DataFrame (parse_csv + import_dataframe) versus leitura em blocos
+(ImportService.import_csv_stream), comparando tempo e pico de memória
+
+Uso:
+    python scripts/benchmarks/benchmark_stream_import.py --rows 200000 --chunk 20000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from common import create_benchmark_engine
+
+from models.client import Client
+from models.card_machine import CardMachineStatement
+from services.import_service import ImportService
+from services.parser_service import ParserService
+
+
+MAPPING = {
+    'Data': 'date',
+    'Valor Bruto': 'gross_value',
+    'Taxa': 'fee',
+    'Valor Liquido': 'net_value',
+    'Bandeira': 'card_brand',
+    'Tipo': 'transaction_type',
+}
+
+
+def make_acquirer_csv(n_rows: int, seed_value: int = 42) -> bytes:
+    """
+    Export sintético de adquirente (máquina de cartão), como vem do arquivo
+    """
+    rng = random.Random(seed_value)
+    start = date.today() - timedelta(days=365)
+    lines = [';'.join(MAPPING)]
+    for _ in range(n_rows):
+        gross = rng.uniform(5, 2000)
+        fee = gross * rng.choice([0.0199, 0.0299, 0.0499])
+        lines.append(';'.join([
+            (start + timedelta(days=rng.randint(0, 365))).strftime('%d/%m/%Y'),
+            f"{gross:.2f}".replace('.', ','),
+            f"{fee:.2f}".replace('.', ','),
+            f"{gross - fee:.2f}".replace('.', ','),
+            rng.choice(['VISA', 'MASTERCARD', 'ELO']),
+            rng.choice(['credito', 'debito']),
+        ]))
+    return '\n'.join(lines).encode('utf-8')
+
+
+def run(label, import_fn, content):
+    """
+    Importa o arquivo em um banco novo e retorna tempo, pico de memória e contagem
+    """
+    engine, Session = create_benchmark_engine(tuned=True)
+    db = Session()
+    try:
+        client = Client(name='Cliente Fluxo', cpf_cnpj='00.000.000/0001-00')
+        db.add(client)
+        db.commit()
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        import_fn(db, client.id, content)
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        return {'label': label, 'seconds': elapsed, 'peak_mb': peak / 1024 ** 2,
+                'count': db.query(CardMachineStatement).count()}
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da importação em fluxo')
+    parser.add_argument('--rows', type=int, default=200000, help='Linhas do CSV sintético')
+    parser.add_argument('--chunk', type=int, default=20000, help='Linhas por bloco')
+    args = parser.parse_args()
+
+    content = make_acquirer_csv(args.rows)
+
+    def whole_file(db, client_id, data):
+        df = ImportService.apply_mapping(ParserService.parse_csv(data, 'utf-8', ';'), MAPPING)
+        ImportService.import_dataframe(db, client_id, 'card_machine_statements', df, 'adquirente.csv')
+
+    def streaming(db, client_id, data):
+        ImportService.import_csv_stream(
+            db, client_id, data, 'card_machine_statements', MAPPING, 'adquirente.csv',
+            delimiter=';', chunksize=args.chunk
+        )
+
+    results = [
+        run('Arquivo inteiro (parse_csv)', whole_file, content),
+        run(f'Em fluxo (blocos de {args.chunk})', streaming, content),
+    ]
+    assert results[0]['count'] == results[1]['count'] == args.rows, "Contagens diferentes"
+
+    print(f"\nImportação de CSV de adquirente - {args.rows} linhas ({len(content) / 1024 ** 2:.1f} MB)")
+    print("-" * 72)
+    print(f"{'Cenário':<40}{'Tempo (s)':>12}{'Pico (MB)':>14}")
+    for r in results:
+        print(f"{r['label']:<40}{r['seconds']:>12.2f}{r['peak_mb']:>14.1f}")
+    print(f"\nRedução do pico de memória: {results[0]['peak_mb'] / results[1]['peak_mb']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Utilitários compartilhados pelos benchmarks
+
+Cria um banco SQLite temporário populado com dados sintéticos,
+oferece um contador de consultas SQL para medir antes/depois e um
+AIService com provedor simulado (sem acesso à rede).
+"""
+import sys
+import os
+import csv
+import json
+import random
+import re
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from config.database import Base, configure_sqlite_engine
+import models  # noqa: F401  (registra todas as tabelas no metadata)
+from models.client import Client
+from models.group import Group, Subgroup
+from models.transaction import Transaction
+from models.contract import Contract
+from models.account import AccountPayable, AccountReceivable
+from services.ledger_service import LedgerService
+from services.ai_service import AIService
+from utils.prompt_format import estimate_tokens
+
+
+def create_benchmark_engine(path: str = None, tuned: bool = False):
+    """
+    Cria engine e session factory para um banco SQLite de benchmark
+
+    Args:
+        path: Arquivo do banco (padrão: diretório temporário)
+        tuned: Aplica o perfil de desempenho do SQLite (PRAGMAs de config.database)
+    """
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix='contabil_bench_'), 'bench.db')
+
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    if tuned:
+        configure_sqlite_engine(engine)
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def seed(db, n_transactions: int = 50000, years: int = 3, seed_value: int = 42) -> int:
+    """
+    Popula o banco com um cliente, grupos/subgrupos e lançamentos sintéticos
+    Retorna o id do cliente criado
+    """
+    rng = random.Random(seed_value)
+
+    client = Client(name='Cliente Benchmark', cpf_cnpj='00.000.000/0001-00')
+    db.add(client)
+    db.flush()
+
+    groups = []
+    subgroups = []
+    for g in range(6):
+        group = Group(client_id=client.id, name=f'Grupo {g}')
+        db.add(group)
+        db.flush()
+        groups.append(group.id)
+        for s in range(4):
+            subgroup = Subgroup(group_id=group.id, name=f'Subgrupo {g}.{s}')
+            db.add(subgroup)
+            db.flush()
+            subgroups.append((group.id, subgroup.id))
+
+    end = date.today()
+    start = end - timedelta(days=365 * years)
+    span = (end - start).days
+    categories = ['Vendas', 'Serviços', 'Aluguel', 'Folha', 'Impostos', None]
+    banks = [('Banco do Brasil', '1234-5'), ('Itaú', '9876-0'), ('Nubank', '0001-9')]
+
+    def random_date():
+        return start + timedelta(days=rng.randint(0, span))
+
+    def random_classification():
+        if rng.random() < 0.3:
+            return None, None
+        group_id, subgroup_id = rng.choice(subgroups)
+        return group_id, subgroup_id if rng.random() < 0.7 else None
+
+    rows = []
+    for i in range(n_transactions):
+        group_id, subgroup_id = random_classification()
+        bank_name, account = rng.choice(banks)
+        is_statement = rng.random() < 0.6
+        rows.append({
+            'client_id': client.id,
+            'date': random_date(),
+            'description': f'Lançamento {i}',
+            'value': round(rng.uniform(10, 5000), 2),
+            'type': rng.choice(['entrada', 'saida']),
+            'category': rng.choice(categories),
+            'group_id': group_id,
+            'subgroup_id': subgroup_id,
+            'account': account if is_statement else None,
+            'bank_name': bank_name if is_statement else None,
+            'document_type': 'extrato_bancario' if is_statement else 'manual',
+        })
+    db.bulk_insert_mappings(Transaction, rows)
+
+    n_other = max(n_transactions // 20, 10)
+    contracts, payables, receivables = [], [], []
+    for i in range(n_other):
+        group_id, subgroup_id = random_classification()
+        event_date = random_date()
+        contracts.append({
+            'client_id': client.id, 'contract_start': event_date - timedelta(days=30),
+            'event_date': event_date, 'service_value': round(rng.uniform(1000, 20000), 2),
+            'displacement_value': round(rng.uniform(0, 500), 2), 'contractor_name': f'Contratante {i}',
+            'status': rng.choice(['concluido', 'pendente', 'em_andamento']),
+            'group_id': group_id, 'subgroup_id': subgroup_id,
+        })
+        due_date = random_date()
+        paid = rng.random() < 0.7
+        payables.append({
+            'client_id': client.id, 'account_name': f'Fornecedor {i}', 'due_date': due_date,
+            'value': round(rng.uniform(100, 8000), 2), 'month_ref': due_date.strftime('%Y-%m'),
+            'paid': paid, 'payment_date': due_date if paid else None,
+            'group_id': group_id, 'subgroup_id': subgroup_id,
+        })
+        received = rng.random() < 0.7
+        receivables.append({
+            'client_id': client.id, 'account_name': f'Cliente {i}', 'due_date': due_date,
+            'value': round(rng.uniform(100, 8000), 2), 'month_ref': due_date.strftime('%Y-%m'),
+            'received': received, 'receipt_date': due_date if received else None,
+            'group_id': group_id, 'subgroup_id': subgroup_id,
+        })
+    db.bulk_insert_mappings(Contract, contracts)
+    db.bulk_insert_mappings(AccountPayable, payables)
+    db.bulk_insert_mappings(AccountReceivable, receivables)
+    db.commit()
+
+    # Inserções em massa não passam pelo flush da sessão: reconstrói o livro-razão
+    LedgerService.rebuild(db, client.id)
+
+    return client.id
+
+
+class QueryCounter:
+    """
+    Conta as instruções SQL emitidas por uma engine
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def measure(engine, label: str, fn, repeat: int = 5) -> dict:
+    """
+    Executa `fn` `repeat` vezes e retorna latência média (ms) e consultas por execução
+    """
+    timings = []
+    counter = QueryCounter(engine)
+
+    for _ in range(repeat):
+        counter.count = 0
+        with counter:
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+
+    return {'label': label, 'queries': counter.count, 'ms': sum(timings) / len(timings)}
+
+
+def print_results(title: str, results: list, show_gain: bool = True):
+    """
+    Imprime a tabela de resultados do benchmark (ganho = primeiro / segundo cenário)
+    """
+    print(f"\n{title}")
+    print("-" * 64)
+    print(f"{'Cenário':<40}{'Consultas':>10}{'Média (ms)':>14}")
+    for r in results:
+        print(f"{r['label']:<40}{r['queries']:>10}{r['ms']:>14.2f}")
+    if show_gain and len(results) >= 2 and results[1]['ms'] > 0:
+        print(f"\nGanho: {results[0]['ms'] / results[1]['ms']:.1f}x")
+
+
+def prompt_row_indexes(prompt: str) -> list:
+    """
+    Valores de _original_index das linhas enviadas no prompt (JSON por linhas,
+    JSON por colunas ou CSV)
+    """
+    by_column = re.search(r'"_original_index":\[([^\]]*)\]', prompt)
+    if by_column:
+        return [int(v) for v in by_column.group(1).split(',') if v.strip()]
+
+    by_row = re.findall(r'"_original_index": ?(\d+)', prompt)
+    if by_row:
+        return [int(v) for v in by_row]
+
+    lines = prompt.splitlines()
+    for i, line in enumerate(lines):
+        header = next(csv.reader([line]))
+        if '_original_index' in header:
+            position = header.index('_original_index')
+            indexes = []
+            for row in csv.reader(lines[i + 1:]):
+                if not row or len(row) != len(header):
+                    break
+                indexes.append(int(row[position]))
+            return indexes
+    return []
+
+
+class SimulatedAIService(AIService):
+    """
+    AIService com provedor simulado: devolve uma linha processada para cada linha
+    do prompt, após latência fixa por chamada + tempo por token enviado e por linha gerada
+    """
+
+    def __init__(self, call_latency: float, row_latency: float, token_latency: float = 0.0,
+                 fail_first_calls: int = 0):
+        self.db = None
+        self.config = {'provider': 'openai', 'model': 'simulado'}
+        self._client = object()
+        self.call_latency = call_latency
+        self.row_latency = row_latency
+        self.token_latency = token_latency
+        self.fail_first_calls = fail_first_calls
+        self.calls = 0
+        self.prompt_tokens = 0
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        return True
+
+    def _call_ai(self, prompt, model=None, status_callback=None, refresh_cache=False):
+        tokens = estimate_tokens(prompt)
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += tokens
+            fail = self.calls <= self.fail_first_calls
+
+        rows = prompt_row_indexes(prompt)
+        time.sleep(self.call_latency + self.token_latency * tokens + self.row_latency * len(rows))
+        if fail:
+            return None, "Erro ao chamar API de IA (simulado): timeout"
+
+        processed = [
+            {'date': '2024-01-01', 'description': f'Linha {i}', 'value': 10.0,
+             'type': 'saida', 'original_row': position + 1, '_original_index': i}
+            for position, i in enumerate(rows)
+        ]
+        return json.dumps({
+            'processed_data': processed,
+            'summary': {'total_rows': len(rows), 'processed': len(rows), 'errors': 0,
+                        'entradas': 0, 'saidas': len(rows)},
+            'issues': []
+        }), None
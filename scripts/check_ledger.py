@@ -0,0 +1,115 @@
+"""
+Verifica que o livro-razão mensal acompanha as alterações feitas pela sessão
+
+Executa sequências de inclusão, alteração e exclusão sobre um banco sintético,
+com commit entre cada passo (objetos expirados, como nas páginas de cadastro), e
+compara o livro-razão mantido incrementalmente com uma reconstrução completa.
+Falha (código de saída 1) se alguma etapa deixar o resumo diferente.
+
+Uso:
+    python scripts/check_ledger.py
+"""
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+
+from sqlalchemy import select, union_all
+
+from common import create_benchmark_engine
+from models.account import AccountPayable
+from models.client import Client
+from models.ledger import MonthlyLedger
+from models.transaction import Transaction
+from services.ledger_service import source_selects
+
+
+def ledger_rows(db):
+    """
+    Linhas do livro-razão mantido pela sessão
+    """
+    return sorted(
+        tuple(row) for row in db.execute(select(
+            MonthlyLedger.client_id, MonthlyLedger.year_month, MonthlyLedger.source,
+            MonthlyLedger.type, MonthlyLedger.group_id, MonthlyLedger.subgroup_id,
+            MonthlyLedger.category, MonthlyLedger.total, MonthlyLedger.count
+        ))
+    )
+
+
+def expected_rows(db):
+    """
+    Linhas calculadas direto das tabelas de origem (o que rebuild gravaria)
+    """
+    return sorted(tuple(row) for row in db.execute(union_all(*source_selects())))
+
+
+def steps(clients):
+    """
+    Sequências cobertas: cada passo recebe a sessão e altera um objeto já gravado
+    """
+    first, second = clients
+    state = {}
+
+    def add(db):
+        state['t'] = Transaction(client_id=first, date=date(2024, 1, 15), description='PIX',
+                                 value=100.0, type='entrada', category='Vendas')
+        state['p'] = AccountPayable(client_id=first, account_name='Aluguel', due_date=date(2024, 1, 10),
+                                    payment_date=date(2024, 1, 10), value=50.0, paid=True)
+        db.add_all([state['t'], state['p']])
+
+    def move_month(db):
+        state['t'].date = date(2024, 3, 5)
+
+    def change_value(db):
+        state['t'].value = 250.0
+
+    def move_client(db):
+        state['t'].client_id = second
+
+    def move_payment(db):
+        state['p'].payment_date = date(2024, 2, 1)
+
+    def unpay(db):
+        state['p'].paid = False
+
+    def delete(db):
+        db.delete(state['t'])
+
+    return [
+        ('inclusão', add),
+        ('mudança de mês', move_month),
+        ('mudança de valor', change_value),
+        ('mudança de cliente', move_client),
+        ('mudança da data de pagamento', move_payment),
+        ('conta deixa de estar paga', unpay),
+        ('exclusão', delete),
+    ]
+
+
+def main() -> int:
+    engine, Session = create_benchmark_engine()
+    db = Session()
+
+    try:
+        clients = [Client(name=f'Cliente {i}', cpf_cnpj=f'00.000.000/000{i}-00') for i in (1, 2)]
+        db.add_all(clients)
+        db.commit()
+
+        failures = 0
+        for label, step in steps([c.id for c in clients]):
+            step(db)
+            # Commit expira os objetos: o próximo passo altera atributos não carregados
+            db.commit()
+            ok = ledger_rows(db) == expected_rows(db)
+            failures += not ok
+            print(f"{'✅' if ok else '❌'} {label}")
+
+        return 1 if failures else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Verifica com EXPLAIN QUERY PLAN que todas as consultas do ReportService usam índice
+
+Executa cada relatório sobre um banco sintético, captura as instruções SQL emitidas
+e falha (código de saída 1) se alguma delas fizer varredura completa (SCAN, com ou
+sem índice) de uma tabela do sistema, servindo de verificação de regressão dos
+índices compostos.
+
+Uso:
+    python scripts/check_query_plans.py
+"""
+import os
+import re
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+
+from sqlalchemy import event
+
+from common import create_benchmark_engine, seed
+from config.database import Base
+from services.report_service import ReportService
+from services.report_cache import report_cache
+
+
+# SQLite descreve buscas por índice como SEARCH; SCAN percorre a tabela inteira,
+# mesmo com "USING INDEX" (varredura completa do índice, ex.: para ORDER BY)
+FULL_SCAN = re.compile(r'^SCAN (\w+)')
+# Aliases gerados pelo SQLAlchemy (transactions_1, groups_2, ...)
+TABLE_ALIAS = re.compile(r'_\d+$')
+
+
+def scanned_table(detail: str, tables: set):
+    """
+    Tabela do sistema lida por inteiro no passo do plano, ou None
+    """
+    match = FULL_SCAN.match(detail)
+    if not match:
+        return None
+    name = match.group(1)
+    if name not in tables:
+        name = TABLE_ALIAS.sub('', name)
+    return name if name in tables else None
+
+
+def report_calls(client_id: int):
+    """
+    Chamadas cobertas pela verificação (todas as consultas do ReportService)
+    """
+    today = date.today()
+    start = today - timedelta(days=90)
+    future = today + timedelta(days=90)
+    return [
+        ('get_dre_data', lambda db: ReportService.get_dre_data(db, client_id, start, today)),
+        ('get_dre_multi', lambda db: ReportService.get_dre_multi(
+            db, client_id, [(start, today), (date(today.year, 1, 1), today)])),
+        ('get_dfc_data', lambda db: ReportService.get_dfc_data(db, client_id, start, today)),
+        ('get_dfc_data (diário)', lambda db: ReportService.get_dfc_data(
+            db, client_id, start, today, granularity='daily')),
+        ('get_seasonality_data', lambda db: ReportService.get_seasonality_data(db, client_id)),
+        ('get_kpis', lambda db: ReportService.get_kpis(db, client_id, start, today)),
+        ('get_bank_statements_data', lambda db: ReportService.get_bank_statements_data(db, client_id, start, today)),
+        ('get_bank_balances', lambda db: ReportService.get_bank_balances(db, client_id, today)),
+        ('get_dfc_projection', lambda db: ReportService.get_dfc_projection(db, client_id, today, future)),
+        ('get_consolidated_financial_data', lambda db: ReportService.get_consolidated_financial_data(
+            db, client_id, start, today)),
+        ('get_financial_projections', lambda db: ReportService.get_financial_projections(db, client_id)),
+    ]
+
+
+def main() -> int:
+    engine, Session = create_benchmark_engine()
+    db = Session()
+    tables = set(Base.metadata.tables)
+    report_cache.enabled = False
+
+    try:
+        client_id = seed(db, n_transactions=5000)
+
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append((statement, parameters))
+
+        failures = []
+        for label, call in report_calls(client_id):
+            statements.clear()
+            event.listen(engine, 'before_cursor_execute', capture)
+            try:
+                call(db)
+            finally:
+                event.remove(engine, 'before_cursor_execute', capture)
+
+            with engine.connect() as conn:
+                for statement, parameters in statements:
+                    plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+                    for row in plan:
+                        if scanned_table(row[-1], tables):
+                            failures.append((label, row[-1], statement))
+
+            print(f"{'❌' if any(f[0] == label for f in failures) else '✅'} {label}: {len(statements)} consulta(s)")
+
+        for label, detail, statement in failures:
+            print(f"\n[{label}] {detail}\n{statement}")
+
+        if failures:
+            print(f"\n❌ {len(failures)} varredura(s) completa(s) de tabela nos planos de consulta")
+            return 1
+        print("\n✅ Nenhuma varredura completa de tabela")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
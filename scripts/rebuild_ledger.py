@@ -0,0 +1,44 @@
+"""
+Script para reconstruir o livro-razão mensal (monthly_ledger)
+
+Use para reparar o resumo após alterações feitas fora da aplicação
+(SQL direto, restauração de backup, scripts de migração, etc).
+
+Uso:
+    python scripts/rebuild_ledger.py               # todos os clientes
+    python scripts/rebuild_ledger.py --client-id 3 # apenas um cliente
+"""
+import sys
+import os
+import argparse
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.database import SessionLocal, init_db
+from services.ledger_service import LedgerService
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconstrói o livro-razão mensal')
+    parser.add_argument('--client-id', type=int, default=None, help='ID do cliente (padrão: todos)')
+    args = parser.parse_args()
+
+    init_db()
+
+    db = SessionLocal()
+    try:
+        alvo = f"cliente {args.client_id}" if args.client_id else "todos os clientes"
+        print(f"Reconstruindo livro-razão mensal ({alvo})...")
+        rows = LedgerService.rebuild(db, args.client_id)
+        print(f"✅ Livro-razão reconstruído: {rows} linhas")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Erro ao reconstruir livro-razão: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,7 @@
 """
 Serviços do sistema
 """
-
-
-
-
-
+# Registra os listeners de sessão que mantêm o livro-razão mensal atualizado
+# e que invalidam o cache de relatórios
+import services.ledger_service  # noqa: F401
+import services.report_cache  # noqa: F401
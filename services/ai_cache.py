@@ -0,0 +1,211 @@
+"""
+Cache persistente das respostas da IA (tabela ai_response_cache do SQLite)
+
+Cada rerun do Streamlit refazia as mesmas chamadas (detecção do tipo, mapeamento
+de colunas, análise de estrutura) com a mesma amostra do arquivo, pagando latência
+e tokens a cada interação. A chave de cada resposta é o SHA-256 de (provedor,
+modelo, parâmetros da chamada, mensagem de sistema, prompt). Respostas mais antigas
+que o TTL não são usadas, e o tamanho total é limitado: as entradas de acesso mais
+antigo são removidas primeiro (LRU).
+
+Configuração por variáveis de ambiente:
+    AI_CACHE_ENABLED    - '0' desativa o cache (padrão: '1')
+    AI_CACHE_TTL_HOURS  - validade das respostas em horas (padrão: 168, 0 = sem validade)
+    AI_CACHE_MAX_MB     - limite de tamanho das respostas em MB (padrão: 32)
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from config.database import SessionLocal
+from config.migrations import ensure_schema
+from models.ai_response_cache import AIResponseCache
+
+
+class AICache:
+    """
+    Cache de respostas da IA no banco, com validade (TTL) e limite de tamanho (LRU)
+    """
+
+    def __init__(self, ttl_seconds: int, max_bytes: int, enabled: bool = True):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(provider: str, model: str, options: Dict[str, Any], system_message: str, prompt: str) -> str:
+        """
+        SHA-256 da chamada completa (qualquer mudança no prompt ou nos parâmetros gera outra chave)
+        """
+        payload = json.dumps([provider, model, options, system_message, prompt], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _expired_before(self) -> Optional[datetime]:
+        if not self.ttl_seconds:
+            return None
+        return datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Resposta armazenada e ainda válida, ou None
+        """
+        if not self.enabled:
+            return None
+
+        ensure_schema()
+        db = SessionLocal()
+        try:
+            entry = db.execute(
+                select(AIResponseCache.id, AIResponseCache.response, AIResponseCache.created_at)
+                .where(AIResponseCache.cache_key == key)
+            ).first()
+
+            expired_before = self._expired_before()
+            if entry is None or (expired_before and entry.created_at < expired_before):
+                with self._lock:
+                    self.misses += 1
+                return None
+
+            # Marca o acesso para a política LRU
+            db.execute(
+                update(AIResponseCache)
+                .where(AIResponseCache.id == entry.id)
+                .values(hits=AIResponseCache.hits + 1, last_accessed_at=datetime.utcnow())
+            )
+            db.commit()
+            with self._lock:
+                self.hits += 1
+            return entry.response
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Cache de IA: erro na leitura ({e})")
+            return None
+        finally:
+            db.close()
+
+    def set(self, key: str, provider: str, model: str, response: str) -> None:
+        """
+        Armazena (ou substitui) a resposta e aplica a validade e o limite de tamanho
+        """
+        if not self.enabled or not response:
+            return
+
+        ensure_schema()
+        now = datetime.utcnow()
+        values = {
+            'cache_key': key,
+            'provider': provider,
+            'model': model,
+            'response': response,
+            'size_bytes': len(response.encode('utf-8')),
+            'hits': 0,
+            'created_at': now,
+            'last_accessed_at': now,
+        }
+        stmt = sqlite_insert(AIResponseCache).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['cache_key'],
+            set_={name: stmt.excluded[name] for name in values if name != 'cache_key'}
+        )
+
+        db = SessionLocal()
+        try:
+            db.execute(stmt)
+            self._evict(db)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Cache de IA: resposta não armazenada ({e})")
+        finally:
+            db.close()
+
+    def _evict(self, db) -> None:
+        """
+        Remove as respostas vencidas e, acima do limite, as de acesso mais antigo
+        """
+        removed = 0
+        expired_before = self._expired_before()
+        if expired_before:
+            removed += db.execute(
+                delete(AIResponseCache).where(AIResponseCache.created_at < expired_before)
+            ).rowcount
+
+        total = db.execute(select(func.coalesce(func.sum(AIResponseCache.size_bytes), 0))).scalar()
+        if total > self.max_bytes:
+            oldest = db.execute(
+                select(AIResponseCache.id, AIResponseCache.size_bytes)
+                .order_by(AIResponseCache.last_accessed_at, AIResponseCache.id)
+            )
+            to_remove = []
+            for entry_id, size in oldest:
+                if total <= self.max_bytes:
+                    break
+                to_remove.append(entry_id)
+                total -= size
+            if to_remove:
+                removed += db.execute(
+                    delete(AIResponseCache).where(AIResponseCache.id.in_(to_remove))
+                ).rowcount
+
+        if removed:
+            with self._lock:
+                self.evictions += removed
+
+    def clear(self) -> None:
+        """
+        Remove todas as respostas e zera os contadores
+        """
+        ensure_schema()
+        db = SessionLocal()
+        try:
+            db.execute(delete(AIResponseCache))
+            db.commit()
+        finally:
+            db.close()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Contadores para exibição na página de Administração
+        """
+        ensure_schema()
+        db = SessionLocal()
+        try:
+            entries, size = db.execute(
+                select(func.count(AIResponseCache.id), func.coalesce(func.sum(AIResponseCache.size_bytes), 0))
+            ).one()
+        finally:
+            db.close()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': entries,
+                'size_bytes': size,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits / lookups * 100) if lookups else 0.0,
+            }
+
+
+ai_cache = AICache(
+    ttl_seconds=int(float(os.getenv('AI_CACHE_TTL_HOURS', '168')) * 3600),
+    max_bytes=int(float(os.getenv('AI_CACHE_MAX_MB', '32')) * 1024 * 1024),
+    enabled=os.getenv('AI_CACHE_ENABLED', '1') != '0'
+)
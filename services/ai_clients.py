@@ -0,0 +1,133 @@
+"""
+Pool de clientes dos provedores de IA, compartilhado pelo processo
+
+Cada AIService criava o próprio cliente (OpenAI, Groq, Gemini): cada instância e
+cada sessão do Streamlit abria conexões novas, com novo handshake TLS. Os clientes
+são seguros para uso concorrente e mantêm um pool de conexões keep-alive, então um
+único cliente por configuração (provedor, chave, URL base, modelo) é reutilizado.
+A chave de API entra na chave do pool só como SHA-256.
+
+Configuração por variáveis de ambiente:
+    AI_CLIENT_POOL_SIZE - configurações distintas mantidas no pool (padrão: 4)
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+AI_CLIENT_POOL_SIZE = int(os.getenv('AI_CLIENT_POOL_SIZE', '4'))
+
+_pool_lock = threading.Lock()
+_clients: 'OrderedDict[tuple, Any]' = OrderedDict()
+_stats = {'created': 0, 'reused': 0}
+
+
+def _pool_key(config: Dict[str, Any]) -> tuple:
+    api_key = (config.get('api_key') or '').strip()
+    return (
+        config['provider'],
+        hashlib.sha256(api_key.encode('utf-8')).hexdigest(),
+        config.get('base_url'),
+        # Só o cliente do Gemini é vinculado ao modelo
+        config.get('model') if config['provider'] == 'gemini' else None,
+    )
+
+
+def _create_client(config: Dict[str, Any]) -> Tuple[Optional[Any], Optional[str]]:
+    """
+    Cria o cliente do provedor configurado
+    Retorna (client, error_message) onde error_message é None se sucesso
+    """
+    provider = config['provider']
+    api_key = (config.get('api_key') or '').strip()
+
+    # Valida chave de API (exceto Ollama)
+    if provider != 'ollama' and not api_key:
+        return None, f"Chave de API não configurada para {provider}"
+
+    try:
+        if provider == 'openai':
+            try:
+                from openai import OpenAI
+            except ImportError:
+                return None, "Biblioteca 'openai' não instalada. Execute: pip install openai"
+            return OpenAI(api_key=api_key), None
+
+        elif provider == 'gemini':
+            try:
+                import google.generativeai as genai
+            except ImportError:
+                return None, "Biblioteca 'google-generativeai' não instalada. Execute: pip install google-generativeai"
+            genai.configure(api_key=api_key)
+            model_name = config.get('model', 'gemini-1.5-flash')
+            return genai.GenerativeModel(model_name), None
+
+        elif provider == 'ollama':
+            try:
+                from openai import OpenAI
+            except ImportError:
+                return None, "Biblioteca 'openai' não instalada. Execute: pip install openai"
+            base_url = config.get('base_url', 'http://localhost:11434/v1')
+            return OpenAI(
+                api_key='ollama',  # Ollama não requer chave real
+                base_url=base_url
+            ), None
+
+        elif provider == 'groq':
+            try:
+                from groq import Groq
+            except ImportError:
+                return None, "Biblioteca 'groq' não instalada. Execute: pip install groq"
+            return Groq(api_key=api_key), None
+        else:
+            return None, f"Provedor '{provider}' não suportado"
+
+    except Exception as e:
+        error_msg = f"Erro ao inicializar cliente de IA ({provider}): {str(e)}"
+        print(error_msg)
+        return None, error_msg
+
+
+def get_client(config: Dict[str, Any], fresh: bool = False) -> Tuple[Optional[Any], Optional[str]]:
+    """
+    Cliente compartilhado para a configuração (criado na primeira chamada)
+
+    Args:
+        config: Configuração ativa (AIConfigManager.get_config_dict)
+        fresh: Recria o cliente mesmo que já exista no pool (ex.: teste de conexão)
+    """
+    key = _pool_key(config)
+    with _pool_lock:
+        if not fresh and key in _clients:
+            _clients.move_to_end(key)
+            _stats['reused'] += 1
+            return _clients[key], None
+
+        # Criação sob o lock: sessões concorrentes não abrem clientes duplicados
+        client, error = _create_client(config)
+        if error:
+            return None, error
+        _clients[key] = client
+        _clients.move_to_end(key)
+        _stats['created'] += 1
+        # Descarta as configurações usadas há mais tempo (ex.: trocas de provedor)
+        while len(_clients) > max(AI_CLIENT_POOL_SIZE, 1):
+            _clients.popitem(last=False)
+        return client, None
+
+
+def clear_clients() -> None:
+    """
+    Esvazia o pool (os clientes em uso continuam válidos até serem descartados)
+    """
+    with _pool_lock:
+        _clients.clear()
+
+
+def pool_stats() -> Dict[str, int]:
+    """
+    Contadores para exibição na página de Administração
+    """
+    with _pool_lock:
+        return {'clients': len(_clients), **_stats}
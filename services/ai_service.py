@@ -6,9 +6,86 @@ from typing import Dict, List, Optional, Tuple, Any
 import json
 import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from sqlalchemy.orm import Session
 
 from config.ai_config import AIConfigManager
+from services.ai_cache import ai_cache
+from services.ai_clients import get_client
+from utils.prompt_format import format_frame, format_records, record_tokens, sample_rows_within, token_budget
+
+# Processamento em blocos (process_and_structure_data): cada bloco de linhas é
+# uma chamada à IA, limitada pelos tokens de dados do provedor (utils.prompt_format)
+# e pelo número de linhas que cabem na resposta (max_tokens); os blocos são
+# enviados em paralelo
+AI_CHUNK_MAX_ROWS = int(os.getenv('AI_CHUNK_MAX_ROWS', '60'))
+AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', '4'))
+AI_CHUNK_RETRIES = int(os.getenv('AI_CHUNK_RETRIES', '2'))
+AI_CHUNK_RETRY_DELAY = float(os.getenv('AI_CHUNK_RETRY_DELAY', '2'))
+
+# Parâmetros das chamadas à IA (também fazem parte da chave do cache de respostas)
+AI_SYSTEM_MESSAGE = "Você é um assistente especializado em análise de dados financeiros e contábeis. Sempre responda APENAS em formato JSON válido, sem texto adicional antes ou depois do JSON."
+AI_TEMPERATURE = 0.2
+AI_MAX_TOKENS = 6000
+
+
+def _split_rows_for_ai(records: List[Dict[str, Any]], columns: List[Any], token_budget: int,
+                       max_rows: int = None) -> List[Tuple[int, int]]:
+    """
+    Divide as linhas em blocos contíguos [início, fim) dentro do orçamento de tokens
+    (no formato dos prompts) e do limite de linhas por bloco
+    """
+    max_rows = max_rows or AI_CHUNK_MAX_ROWS
+    ranges = []
+    begin, tokens = 0, 0
+    for i, row_tokens in enumerate(record_tokens(records, columns)):
+        if i > begin and (tokens + row_tokens > token_budget or i - begin >= max_rows):
+            ranges.append((begin, i))
+            begin, tokens = i, 0
+        tokens += row_tokens
+    if begin < len(records):
+        ranges.append((begin, len(records)))
+    return ranges
+
+
+def _place_chunk_items(items: List[Dict[str, Any]], begin: int, end: int,
+                       positions: Dict[Any, int]) -> List[Dict[str, Any]]:
+    """
+    Posiciona os itens de um bloco no arquivo: pelo _original_index devolvido pela
+    IA, pelo original_row (global ou relativo ao bloco) ou pela ordem no bloco.
+    O original_row de cada item passa a ser a linha no arquivo inteiro.
+    """
+    for local_idx, item in enumerate(items):
+        position = positions.get(item.get('_original_index'))
+        if position is None or not begin <= position < end:
+            try:
+                row = int(item.get('original_row') or 0)
+            except (TypeError, ValueError):
+                row = 0
+            if begin < row <= end:
+                position = row - 1
+            elif 0 < row <= end - begin:
+                position = begin + row - 1
+            else:
+                position = min(begin + local_idx, end - 1)
+        item['original_row'] = position + 1
+    return items
+
+
+def _merge_summaries(summaries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Junta os resumos dos blocos: contagens e totais somados, demais campos do primeiro bloco que os informar
+    """
+    merged = {}
+    for summary in summaries:
+        for key, value in summary.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                current = merged.get(key, 0)
+                merged[key] = current + value if isinstance(current, (int, float)) else current
+            elif key not in merged or merged[key] in (None, '', [], {}):
+                merged[key] = value
+    return merged
 
 
 class AIService:
@@ -49,23 +126,27 @@ class AIService:
         self.db = db
         self.config = AIConfigManager.get_config_dict(db)
         self._client = None
+        self._fresh_client = False
 
     def _reload_config(self):
         """
         Recarrega configuração do banco de dados
         """
+        AIConfigManager.invalidate_cache()
         self.config = AIConfigManager.get_config_dict(self.db)
         self._client = None  # Reseta cliente para recarregar com nova config
 
     def is_available(self) -> bool:
         """
         Verifica se o serviço de IA está disponível e configurado
+        (configuração em cache no processo, sem consulta ao banco a cada chamada)
         """
-        return AIConfigManager.is_configured(self.db) and self.config is not None
+        return self.config is not None and AIConfigManager.is_configured(self.db)
 
     def _get_client(self):
         """
-        Obtém cliente da API de IA baseado no provedor configurado
+        Obtém cliente da API de IA baseado no provedor configurado (compartilhado
+        entre instâncias pelo pool de services.ai_clients)
         Retorna (client, error_message) onde error_message é None se sucesso
         """
         if not self.config:
@@ -74,58 +155,11 @@ class AIService:
         if self._client is not None:
             return self._client, None
         
-        provider = self.config['provider']
-        api_key = self.config.get('api_key', '').strip()
-        
-        # Valida chave de API (exceto Ollama)
-        if provider != 'ollama' and not api_key:
-            return None, f"Chave de API não configurada para {provider}"
-        
-        try:
-            if provider == 'openai':
-                try:
-                    from openai import OpenAI
-                except ImportError:
-                    return None, "Biblioteca 'openai' não instalada. Execute: pip install openai"
-                self._client = OpenAI(api_key=api_key)
-                return self._client, None
-                
-            elif provider == 'gemini':
-                try:
-                    import google.generativeai as genai
-                except ImportError:
-                    return None, "Biblioteca 'google-generativeai' não instalada. Execute: pip install google-generativeai"
-                genai.configure(api_key=api_key)
-                model_name = self.config.get('model', 'gemini-1.5-flash')
-                self._client = genai.GenerativeModel(model_name)
-                return self._client, None
-                
-            elif provider == 'ollama':
-                try:
-                    from openai import OpenAI
-                except ImportError:
-                    return None, "Biblioteca 'openai' não instalada. Execute: pip install openai"
-                base_url = self.config.get('base_url', 'http://localhost:11434/v1')
-                self._client = OpenAI(
-                    api_key='ollama',  # Ollama não requer chave real
-                    base_url=base_url
-                )
-                return self._client, None
-                
-            elif provider == 'groq':
-                try:
-                    from groq import Groq
-                except ImportError:
-                    return None, "Biblioteca 'groq' não instalada. Execute: pip install groq"
-                self._client = Groq(api_key=api_key)
-                return self._client, None
-            else:
-                return None, f"Provedor '{provider}' não suportado"
-                
-        except Exception as e:
-            error_msg = f"Erro ao inicializar cliente de IA ({provider}): {str(e)}"
-            print(error_msg)
-            return None, error_msg
+        client, error = get_client(self.config, fresh=self._fresh_client)
+        if client is not None:
+            self._client = client
+            self._fresh_client = False
+        return client, error
 
     def _prepare_pdf_context(self, pdf_data: Dict[str, Any], import_type: str) -> str:
         """
@@ -435,18 +469,17 @@ class AIService:
     
     def _prepare_data_sample(self, df: pd.DataFrame, max_rows: int = 5) -> str:
         """
-        Prepara amostra dos dados para análise
+        Prepara amostra dos dados para análise (até max_rows linhas, limitada a
+        um quarto do orçamento de tokens do provedor)
         """
-        sample = df.head(max_rows)
-        
-        # Converte para formato legível
-        data_info = {
-            'columns': list(df.columns),
-            'total_rows': len(df),
-            'sample_data': sample.to_dict('records')
-        }
+        provider = self.config.get('provider') if self.config else None
+        rows = sample_rows_within(df, max_rows, token_budget(provider) // 4)
         
-        return json.dumps(data_info, indent=2, default=str, ensure_ascii=False)
+        return (
+            f"Colunas: {json.dumps([str(c) for c in df.columns], ensure_ascii=False)}\n"
+            f"Total de linhas: {len(df)}\n"
+            f"Amostra ({rows} primeiras linhas):\n{format_frame(df.head(rows))}"
+        )
 
     def _create_prompt_for_validation(
         self,
@@ -535,26 +568,26 @@ Se uma coluna não se encaixa em nenhum campo, sugira "ignore".
         self, 
         prompt: str, 
         model: Optional[str] = None,
-        status_callback: Optional[callable] = None
+        status_callback: Optional[callable] = None,
+        refresh_cache: bool = False
     ) -> Tuple[Optional[str], Optional[str]]:
         """
         Chama a API de IA e retorna (resposta, erro)
         Se erro for None, resposta contém o texto retornado
         
+        Respostas já obtidas para a mesma chamada vêm do cache persistente (services.ai_cache).
+        
         Args:
             prompt: Prompt para enviar à IA
             model: Nome do modelo (opcional)
             status_callback: Função callback(status_message) para atualizar status em tempo real
+            refresh_cache: Ignora a resposta armazenada e consulta a IA novamente
         """
         if status_callback:
             status_callback("Conectando à API de IA...")
         
-        client, error = self._get_client()
-        if error:
-            return None, error
-        
-        if not client:
-            return None, "Cliente de IA não inicializado"
+        if not self.config:
+            return None, "Configuração de IA não encontrada"
         
         provider = self.config['provider']
         model_name = model or self.config.get('model')
@@ -562,42 +595,57 @@ Se uma coluna não se encaixa em nenhum campo, sugira "ignore".
         if not model_name:
             return None, "Nome do modelo não configurado"
         
+        cache_key = ai_cache.make_key(
+            provider, model_name,
+            {'temperature': AI_TEMPERATURE, 'max_tokens': AI_MAX_TOKENS, 'base_url': self.config.get('base_url')},
+            AI_SYSTEM_MESSAGE, prompt
+        )
+        if not refresh_cache:
+            cached = ai_cache.get(cache_key)
+            if cached is not None:
+                if status_callback:
+                    status_callback("Resposta recuperada do cache de IA...")
+                return cached, None
+        
+        client, error = self._get_client()
+        if error:
+            return None, error
+        
+        if not client:
+            return None, "Cliente de IA não inicializado"
+        
         try:
             if status_callback:
                 status_callback(f"Enviando requisição para {provider} (modelo: {model_name})...")
             
             if provider == 'openai' or provider == 'ollama' or provider == 'groq':
-                system_message = "Você é um assistente especializado em análise de dados financeiros e contábeis. Sempre responda APENAS em formato JSON válido, sem texto adicional antes ou depois do JSON."
-                user_message = prompt
-                
                 if status_callback:
                     status_callback("Processando com IA...")
                 
                 response = client.chat.completions.create(
                     model=model_name,
                     messages=[
-                        {"role": "system", "content": system_message},
-                        {"role": "user", "content": user_message}
+                        {"role": "system", "content": AI_SYSTEM_MESSAGE},
+                        {"role": "user", "content": prompt}
                     ],
-                    temperature=0.2,  # Reduzido para respostas mais rápidas e consistentes
-                    max_tokens=6000,  # Otimizado: reduzido de 8000 para melhor performance
+                    temperature=AI_TEMPERATURE,  # Reduzido para respostas mais rápidas e consistentes
+                    max_tokens=AI_MAX_TOKENS,  # Otimizado: reduzido de 8000 para melhor performance
                     response_format={"type": "json_object"} if provider == 'openai' else None
                 )
                 
                 if status_callback:
                     status_callback("Recebendo resposta da IA...")
                 
-                if response and response.choices and len(response.choices) > 0:
-                    return response.choices[0].message.content, None
-                else:
+                if not (response and response.choices and len(response.choices) > 0):
                     return None, "Resposta vazia da API"
+                content = response.choices[0].message.content
             
             elif provider == 'gemini':
                 if status_callback:
                     status_callback("Processando com Gemini...")
                 
                 # Gemini precisa do system message no prompt
-                full_prompt = f"""Você é um assistente especializado em análise de dados financeiros e contábeis. Sempre responda APENAS em formato JSON válido, sem texto adicional antes ou depois do JSON.
+                full_prompt = f"""{AI_SYSTEM_MESSAGE}
 
 {prompt}"""
                 
@@ -606,14 +654,16 @@ Se uma coluna não se encaixa em nenhum campo, sugira "ignore".
                 if status_callback:
                     status_callback("Recebendo resposta da IA...")
                 
-                if response and response.text:
-                    return response.text, None
-                else:
+                if not (response and response.text):
                     return None, "Resposta vazia da API"
+                content = response.text
             
             else:
                 return None, f"Provedor '{provider}' não suportado"
             
+            ai_cache.set(cache_key, provider, model_name, content)
+            return content, None
+            
         except Exception as e:
             error_msg = f"Erro ao chamar API de IA ({provider}): {str(e)}"
             print(error_msg)
@@ -717,10 +767,12 @@ Se uma coluna não se encaixa em nenhum campo, sugira "ignore".
         self,
         df: pd.DataFrame,
         import_type: str,
-        target_columns: List[str]
+        target_columns: List[str],
+        refresh_cache: bool = False
     ) -> Dict[str, str]:
         """
         Sugere mapeamento de colunas usando IA
+        (refresh_cache=True ignora a resposta armazenada no cache de IA)
         
         Retorna dicionário: {coluna_arquivo: campo_sistema}
         """
@@ -732,7 +784,7 @@ Se uma coluna não se encaixa em nenhum campo, sugira "ignore".
             data_sample = self._prepare_data_sample(df)
             prompt = self._create_prompt_for_mapping(columns, data_sample, import_type)
             
-            response, error = self._call_ai(prompt)
+            response, error = self._call_ai(prompt, refresh_cache=refresh_cache)
             
             if error:
                 print(f"Erro ao obter mapeamento da IA: {error}")
@@ -783,6 +835,7 @@ Se uma coluna não se encaixa em nenhum campo, sugira "ignore".
         try:
             # Recarrega cliente para garantir que está atualizado
             self._client = None
+            self._fresh_client = True
             client, error = self._get_client()
             
             if error:
@@ -793,7 +846,7 @@ Se uma coluna não se encaixa em nenhum campo, sugira "ignore".
             
             # Teste simples
             test_prompt = "Responda apenas: OK"
-            response, error = self._call_ai(test_prompt)
+            response, error = self._call_ai(test_prompt, refresh_cache=True)
             
             if error:
                 return False, error
@@ -965,10 +1018,12 @@ Retorne o tipo mais provável com nível de confiança e justificativa.
         self,
         df: pd.DataFrame,
         columns: List[str],
-        data_sample: str
+        data_sample: str,
+        refresh_cache: bool = False
     ) -> Dict[str, Any]:
         """
         Detecta automaticamente o tipo de dado do arquivo usando IA
+        (refresh_cache=True ignora a resposta armazenada no cache de IA)
         
         Retorna:
         {
@@ -994,7 +1049,7 @@ Retorne o tipo mais provável com nível de confiança e justificativa.
         
         try:
             prompt = self._create_prompt_detect_type(columns, data_sample)
-            response, error = self._call_ai(prompt)
+            response, error = self._call_ai(prompt, refresh_cache=refresh_cache)
             
             if error:
                 return {
@@ -1148,6 +1203,67 @@ Para cada linha de dados:
         "common_issues": ["lista de problemas comuns"]
     }}
 }}
+"""
+        return prompt
+
+    def _create_prompt_normalization_rules(
+        self,
+        columns: List[str],
+        data_sample: str,
+        import_type: str,
+        structural_analysis: str,
+        mapping: Dict[str, str]
+    ) -> str:
+        """
+        Cria prompt que pede regras de normalização aplicáveis ao arquivo inteiro
+        (não os dados normalizados linha a linha)
+        """
+        type_name = self.DATA_TYPES.get(import_type, import_type)
+        
+        prompt = f"""Você é um especialista em normalização de dados financeiros.
+
+Analise a amostra e descreva como normalizar TODAS as linhas do arquivo por meio de regras.
+As regras serão aplicadas automaticamente ao arquivo inteiro; NÃO devolva os dados normalizados.
+
+**Tipo de dados:** {type_name}
+**Colunas do arquivo:** {', '.join(str(c) for c in columns)}
+
+**Mapeamento de colunas (coluna do arquivo → campo do sistema):**
+{json.dumps(mapping, ensure_ascii=False)}
+
+**Amostra do arquivo:**
+{data_sample}
+
+**Análise estrutural prévia:**
+{structural_analysis}
+
+**Regras por coluna do arquivo (use os nomes exatos das colunas):**
+- "kind": "date", "number" ou "text"
+- Datas: "date_format" no padrão strftime do Python (ex.: "%d/%m/%Y", "%Y-%m-%d", "%d/%m/%y")
+- Números: "decimal" ("," ou "."), "thousands" (".", "," ou ""), "currency_symbols" (ex.: ["R$"])
+  e "negate": true se o sinal do arquivo for invertido em relação a entrada (+) / saída (-)
+- Textos: "strip", "collapse_spaces", "case" ("upper", "lower", "title" ou "none") e
+  "remove_patterns" (expressões regulares Python para remover trechos irrelevantes, ex.: códigos de controle)
+
+**Valor (campo value):**
+- Se houver colunas separadas de débito e crédito, informe "debit_column" e "credit_column"
+- Se houver coluna indicadora de débito/crédito (ex.: D/C), informe "indicator_column" e "debit_markers"
+
+**Tipo (entrada/saída):**
+- "source": "sign" (pelo sinal do valor), "indicator" (pela coluna indicadora) ou "description"
+  (por palavras-chave da descrição, informe "keywords")
+
+**Responda em formato JSON válido:**
+{{
+    "columns": {{
+        "Data": {{"kind": "date", "date_format": "%d/%m/%Y"}},
+        "Valor": {{"kind": "number", "decimal": ",", "thousands": ".", "currency_symbols": ["R$"], "negate": false}},
+        "Histórico": {{"kind": "text", "strip": true, "collapse_spaces": true, "case": "none", "remove_patterns": []}}
+    }},
+    "value": {{"debit_column": null, "credit_column": null, "indicator_column": null, "debit_markers": ["D"]}},
+    "type": {{"source": "sign", "keywords": {{"entrada": ["RECEBIDO"], "saida": ["PAGAMENTO"]}}}},
+    "notes": ["padrões observados na amostra"]
+}}
 """
         return prompt
 
@@ -1496,7 +1612,7 @@ Processe TODAS as linhas do arquivo e retorne dados estruturados prontos para im
 **CRÍTICO - Correspondência de Linhas:**
 - O campo "original_row" DEVE corresponder EXATAMENTE ao número da linha no arquivo original
 - Se o arquivo tem 10 linhas, original_row deve ir de 1 a 10
-- Use o índice da linha no array de dados fornecido + 1 (primeira linha = 1, segunda = 2, etc)
+- Use a posição da linha nos dados fornecidos + 1 (primeira linha de dados = 1, segunda = 2, etc)
 - Isso é ESSENCIAL para garantir que as datas correspondam corretamente
 
 **IMPORTANTE - Regras para JSON válido:**
@@ -1653,7 +1769,7 @@ Analise o arquivo de extrato bancário e estruture os dados para importação no
 **CRÍTICO - Correspondência de Linhas:**
 - O campo "original_row" DEVE corresponder EXATAMENTE ao número da linha no arquivo original
 - Se o arquivo tem 10 linhas, original_row deve ir de 1 a 10
-- Use o índice da linha no array de dados fornecido + 1 (primeira linha = 1, segunda = 2, etc)
+- Use a posição da linha nos dados fornecidos + 1 (primeira linha de dados = 1, segunda = 2, etc)
 - Isso é ESSENCIAL para garantir que as datas correspondam corretamente
 
 **IMPORTANTE - Regras para JSON válido:**
@@ -1948,23 +2064,245 @@ Processe e retorne em JSON com array "processed_data".
 """
         return prompt
     
+    # Montagem do prompt de processamento por tipo de importação
+    PROCESS_PROMPT_BUILDERS = {
+        'transactions': '_create_prompt_process_transactions',
+        'bank_statements': '_create_prompt_process_bank_statements',
+        'contracts': '_create_prompt_process_contracts',
+        'accounts_payable': '_create_prompt_process_accounts_payable',
+        'accounts_receivable': '_create_prompt_process_accounts_receivable',
+        'financial_investments': '_create_prompt_process_financial_investments',
+        'credit_card_invoices': '_create_prompt_process_credit_card_invoices',
+        'card_machine_statements': '_create_prompt_process_card_machine_statements',
+        'inventory': '_create_prompt_process_inventory',
+    }
+    
+    def _build_process_prompt(
+        self,
+        import_type: str,
+        file_data: str,
+        columns: List[str],
+        data_sample: str,
+        is_pdf_source: bool,
+        groups_subgroups: Optional[List[Dict[str, Any]]] = None
+    ) -> str:
+        """
+        Cria o prompt de processamento do tipo (grupos/subgrupos só em transações e extratos)
+        """
+        create_prompt = getattr(self, self.PROCESS_PROMPT_BUILDERS[import_type])
+        if import_type in ('transactions', 'bank_statements'):
+            return create_prompt(file_data, columns, data_sample, is_pdf_source=is_pdf_source,
+                                 groups_subgroups=groups_subgroups)
+        return create_prompt(file_data, columns, data_sample, is_pdf_source=is_pdf_source)
+    
+    def _parse_ai_response(self, response: str) -> Dict[str, Any]:
+        """
+        Extrai o JSON da resposta da IA, reparando strings não terminadas e JSON truncado
+        
+        Raises:
+            json.JSONDecodeError: se nenhuma parte da resposta puder ser aproveitada
+        """
+        # Remove markdown code blocks se existirem
+        if '```json' in response:
+            response = response.split('```json')[1].split('```')[0]
+        elif '```' in response:
+            response = response.split('```')[1].split('```')[0]
+        
+        # Limpa a resposta
+        response_clean = response.strip()
+        
+        # Tenta encontrar o JSON válido na resposta
+        # Procura pelo primeiro { e último }
+        start_idx = response_clean.find('{')
+        if start_idx == -1:
+            raise json.JSONDecodeError("JSON não encontrado na resposta", response_clean, 0)
+        
+        # Procura o último } válido (pode haver múltiplos objetos)
+        end_idx = response_clean.rfind('}')
+        if end_idx == -1 or end_idx <= start_idx:
+            raise json.JSONDecodeError("JSON incompleto", response_clean, start_idx)
+        
+        # Extrai o JSON
+        json_str = response_clean[start_idx:end_idx + 1]
+        
+        # Tenta parsear
+        try:
+            result = json.loads(json_str)
+        except json.JSONDecodeError as e:
+            # Se falhar, tenta reparar strings não terminadas
+            json_str_clean = json_str
+            
+            # Remove quebras de linha dentro de strings (exceto \n escapado)
+            json_str_clean = re.sub(r'(?<!\\)\n', ' ', json_str_clean)
+            json_str_clean = re.sub(r'(?<!\\)\r', ' ', json_str_clean)
+            json_str_clean = re.sub(r'(?<!\\)\t', ' ', json_str_clean)
+            
+            # Tenta encontrar e fechar strings não terminadas
+            # Procura por padrão: "texto sem fechamento
+            # Adiciona " antes de caracteres problemáticos
+            in_string = False
+            escape_next = False
+            result_chars = []
+            
+            for i, char in enumerate(json_str_clean):
+                if escape_next:
+                    result_chars.append(char)
+                    escape_next = False
+                    continue
+                
+                if char == '\\':
+                    result_chars.append(char)
+                    escape_next = True
+                    continue
+                
+                if char == '"':
+                    in_string = not in_string
+                    result_chars.append(char)
+                elif in_string:
+                    # Dentro de string, substitui caracteres problemáticos
+                    if char in ['\n', '\r', '\t']:
+                        result_chars.append(' ')
+                    elif char == '\x00':  # Null bytes
+                        result_chars.append(' ')
+                    else:
+                        result_chars.append(char)
+                else:
+                    result_chars.append(char)
+            
+            # Se ainda estiver em string no final, fecha ela
+            if in_string:
+                result_chars.append('"')
+            
+            json_str_clean = ''.join(result_chars)
+            
+            try:
+                result = json.loads(json_str_clean)
+            except json.JSONDecodeError as e2:
+                # Tenta reparar problemas comuns de JSON
+                json_str_final = self._repair_json(json_str_clean, e2)
+                try:
+                    result = json.loads(json_str_final)
+                except json.JSONDecodeError as e3:
+                    # Última tentativa: extrai apenas o que é possível parsear
+                    result = self._extract_partial_json(json_str_clean)
+                    if not result:
+                        # Se ainda falhar, levanta o erro com contexto
+                        raise e2
+        
+        return result
+    
+    def _describe_json_error(self, e: json.JSONDecodeError, response: str) -> str:
+        """
+        Mensagem de erro de parse com posição e trecho da resposta
+        """
+        error_pos = getattr(e, 'pos', None)
+        error_line = getattr(e, 'lineno', None)
+        error_col = getattr(e, 'colno', None)
+        
+        error_msg = f'Erro ao parsear resposta da IA: {str(e)}'
+        if error_line and error_col:
+            error_msg += f' (linha {error_line}, coluna {error_col})'
+        
+        # Mostra contexto do erro
+        if error_pos and error_pos < len(response):
+            start = max(0, error_pos - 100)
+            end = min(len(response), error_pos + 100)
+            context = response[start:end]
+            error_msg += f'\nContexto: ...{context}...'
+        return error_msg
+    
+    def _process_chunk(
+        self,
+        prompt: str,
+        status_callback: Optional[callable] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str], Optional[str]]:
+        """
+        Envia um bloco à IA, repetindo a chamada em caso de erro ou resposta inválida
+        
+        Returns:
+            (resultado, erro, resposta bruta da última tentativa)
+        """
+        error, response = None, None
+        for attempt in range(AI_CHUNK_RETRIES + 1):
+            if attempt:
+                time.sleep(AI_CHUNK_RETRY_DELAY * attempt)
+            
+            # Nova tentativa consulta a IA de novo (a resposta anterior pode estar no cache)
+            response, error = self._call_ai(prompt, status_callback=status_callback, refresh_cache=attempt > 0)
+            if error:
+                continue
+            if not response:
+                error = 'Sem resposta da IA'
+                continue
+            
+            try:
+                return self._parse_ai_response(response), None, None
+            except json.JSONDecodeError as e:
+                error = self._describe_json_error(e, response)
+        
+        return None, error, response
+    
+    def _run_ai_chunks(
+        self,
+        prompts: List[str],
+        max_workers: Optional[int] = None,
+        status_callback: Optional[callable] = None
+    ) -> List[Tuple[Optional[Dict[str, Any]], Optional[str], Optional[str]]]:
+        """
+        Processa os blocos com no máximo max_workers chamadas simultâneas à IA
+        
+        O status_callback (Streamlit) só é chamado na thread principal.
+        
+        Returns:
+            Resultado de _process_chunk de cada bloco, na ordem dos prompts
+        """
+        if len(prompts) == 1:
+            return [self._process_chunk(prompts[0], status_callback=status_callback)]
+        
+        # Cliente criado antes das threads (a inicialização não é concorrente)
+        client, error = self._get_client()
+        if error or not client:
+            error = error or "Cliente de IA não inicializado"
+            return [(None, error, None)] * len(prompts)
+        
+        workers = max(1, min(max_workers or AI_MAX_CONCURRENCY, len(prompts)))
+        if status_callback:
+            status_callback(f"Enviando {len(prompts)} blocos à IA ({workers} por vez)...")
+        
+        outcomes = [None] * len(prompts)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ai-chunk') as executor:
+            futures = {executor.submit(self._process_chunk, prompt): i for i, prompt in enumerate(prompts)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                outcomes[futures[future]] = future.result()
+                if status_callback:
+                    status_callback(f"Bloco {done} de {len(prompts)} processado pela IA...")
+        return outcomes
+    
     def process_and_structure_data(
         self,
         df: pd.DataFrame,
         import_type: str,
         pdf_full_data: Optional[Dict[str, Any]] = None,
         groups_subgroups: Optional[List[Dict[str, Any]]] = None,
-        status_callback: Optional[callable] = None
+        status_callback: Optional[callable] = None,
+        chunked: bool = True,
+        max_workers: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Processa arquivo completo com IA e retorna dados estruturados prontos para importação
         
+        As linhas são enviadas em blocos (token_budget do provedor / AI_CHUNK_MAX_ROWS),
+        até max_workers blocos ao mesmo tempo; cada bloco com erro é repetido sozinho
+        e os resultados são juntados na ordem das linhas do arquivo.
+        
         Args:
             df: DataFrame com os dados do arquivo
             import_type: Tipo de importação (transactions, bank_statements, etc)
             pdf_full_data: Dados completos do PDF (opcional)
             groups_subgroups: Lista de grupos e subgrupos para classificação automática (opcional)
             status_callback: Função callback(status_message) para atualizar status em tempo real (opcional)
+            chunked: False envia todas as linhas em um único prompt
+            max_workers: Chamadas simultâneas à IA (padrão: AI_MAX_CONCURRENCY)
         
         Retorna:
         {
@@ -2037,19 +2375,49 @@ Processe e retorne em JSON com array "processed_data".
                 if metadata_parts:
                     file_metadata = "**Informações adicionais do arquivo:**\n" + "\n".join(metadata_parts) + "\n"
             
-            # Prepara dados para JSON
+            # Seleciona prompt baseado no tipo
+            # Para PDFs, inclui flag indicando que há contexto adicional
+            is_pdf_source = pdf_full_data is not None
+            
+            if import_type not in self.PROCESS_PROMPT_BUILDERS:
+                return {
+                    'success': False,
+                    'error': f'Tipo de importação não suportado: {import_type}',
+                    'processed_data': [],
+                    'summary': {},
+                    'issues': []
+                }
+            
+            if status_callback:
+                status_callback("Criando prompt de processamento...")
+            
+            # Prepara dados para JSON: linhas do DataFrame em blocos limitados por
+            # tokens (um prompt por bloco) ou o texto completo do PDF em um único prompt
+            chunks = []
             if not df.empty:
-                # Informa quantidade total de linhas no metadata
-                total_rows = len(file_data_df)
+                records = file_data_df.to_dict('records')
+                data_columns = list(file_data_df.columns)
+                if chunked:
+                    ranges = _split_rows_for_ai(records, data_columns, token_budget(self.config.get('provider')))
+                else:
+                    ranges = [(0, len(records))]
                 if status_callback:
-                    status_callback(f"Processando {total_rows} linhas do arquivo...")
+                    status_callback(f"Processando {len(records)} linhas do arquivo em {len(ranges)} bloco(s)...")
                 
-                file_data = json.dumps(
-                    file_data_df.to_dict('records'),
-                    indent=2,
-                    default=str,
-                    ensure_ascii=False
-                )
+                for number, (begin, end) in enumerate(ranges, start=1):
+                    file_data = format_records(records[begin:end], data_columns)
+                    if len(ranges) > 1:
+                        file_data = (
+                            f"**Bloco {number} de {len(ranges)}:** linhas {begin + 1} a {end} do arquivo "
+                            f"(total de {len(records)} linhas). Processe todas as linhas deste bloco; "
+                            f"original_row continua sendo o número da linha no arquivo inteiro "
+                            f"({begin + 1} a {end}).\n" + file_data
+                        )
+                    if file_metadata:
+                        file_data = file_metadata + "\n**Dados do arquivo:**\n" + file_data
+                    chunks.append((begin, end, self._build_process_prompt(
+                        import_type, file_data, columns, data_sample, is_pdf_source, groups_subgroups
+                    )))
             else:
                 # Se não tem DataFrame, usa texto completo do PDF (SEM limitação)
                 if pdf_full_data and pdf_full_data.get('full_text'):
@@ -2060,264 +2428,122 @@ Processe e retorne em JSON com array "processed_data".
                         status_callback(f"Processando texto completo do PDF ({len(full_text)} caracteres)...")
                 else:
                     file_data = ''
-            
-            # Adiciona metadados ao file_data
-            if file_metadata:
-                file_data = file_metadata + "\n**Dados do arquivo:**\n" + file_data
-            
-            if status_callback:
-                status_callback("Criando prompt de processamento...")
-            
-            # Seleciona prompt baseado no tipo
-            # Para PDFs, inclui flag indicando que há contexto adicional
-            is_pdf_source = pdf_full_data is not None
-            
-            if import_type == 'transactions':
-                prompt = self._create_prompt_process_transactions(
-                    file_data, columns, data_sample, 
-                    is_pdf_source=is_pdf_source,
-                    groups_subgroups=groups_subgroups
-                )
-            elif import_type == 'bank_statements':
-                prompt = self._create_prompt_process_bank_statements(
-                    file_data, columns, data_sample, 
-                    is_pdf_source=is_pdf_source,
-                    groups_subgroups=groups_subgroups
-                )
-            elif import_type == 'contracts':
-                prompt = self._create_prompt_process_contracts(file_data, columns, data_sample, is_pdf_source=is_pdf_source)
-            elif import_type == 'accounts_payable':
-                prompt = self._create_prompt_process_accounts_payable(file_data, columns, data_sample, is_pdf_source=is_pdf_source)
-            elif import_type == 'accounts_receivable':
-                prompt = self._create_prompt_process_accounts_receivable(file_data, columns, data_sample, is_pdf_source=is_pdf_source)
-            elif import_type == 'financial_investments':
-                prompt = self._create_prompt_process_financial_investments(file_data, columns, data_sample, is_pdf_source=is_pdf_source)
-            elif import_type == 'credit_card_invoices':
-                prompt = self._create_prompt_process_credit_card_invoices(file_data, columns, data_sample, is_pdf_source=is_pdf_source)
-            elif import_type == 'card_machine_statements':
-                prompt = self._create_prompt_process_card_machine_statements(file_data, columns, data_sample, is_pdf_source=is_pdf_source)
-            elif import_type == 'inventory':
-                prompt = self._create_prompt_process_inventory(file_data, columns, data_sample, is_pdf_source=is_pdf_source)
-            else:
-                return {
-                    'success': False,
-                    'error': f'Tipo de importação não suportado: {import_type}',
-                    'processed_data': [],
-                    'summary': {},
-                    'issues': []
-                }
+                
+                # Adiciona metadados ao file_data
+                if file_metadata:
+                    file_data = file_metadata + "\n**Dados do arquivo:**\n" + file_data
+                chunks.append((0, 0, self._build_process_prompt(
+                    import_type, file_data, columns, data_sample, is_pdf_source, groups_subgroups
+                )))
             
             if status_callback:
                 status_callback("Classificando por grupo e subgrupo...")
             
-            # Chama IA
-            response, error = self._call_ai(prompt, status_callback=status_callback)
+            # Chama IA (blocos em paralelo)
+            outcomes = self._run_ai_chunks([prompt for _, _, prompt in chunks], max_workers, status_callback)
             
-            if error:
+            processed_data = []
+            summaries = []
+            issues = []
+            failures = []
+            positions = {label: pos for pos, label in enumerate(file_data_df.index)} if not df.empty else {}
+            for (begin, end, _), (result, error, raw_response) in zip(chunks, outcomes):
+                if result is None:
+                    failures.append((begin, end, error, raw_response))
+                    continue
+                
+                items = result.get('processed_data', []) or []
+                if end > begin:
+                    items = _place_chunk_items(items, begin, end, positions)
+                processed_data.extend(items)
+                summaries.append(result.get('summary', {}) or {})
+                chunk_issues = result.get('issues', []) or []
+                if len(chunks) > 1:
+                    chunk_issues = [f"Linhas {begin + 1}-{end}: {issue}" for issue in chunk_issues]
+                issues.extend(chunk_issues)
+            
+            if len(failures) == len(chunks):
+                # Nenhum bloco processado: retorna o erro (e a resposta bruta, se houver)
+                _, _, error, raw_response = failures[-1]
                 if status_callback:
                     status_callback(f"❌ Erro: {error}")
-                return {
+                failed = {
                     'success': False,
                     'error': error,
                     'processed_data': [],
                     'summary': {},
                     'issues': []
                 }
+                if raw_response:
+                    failed['raw_response'] = raw_response[:2000]
+                return failed
             
-            if not response:
-                if status_callback:
-                    status_callback("❌ Sem resposta da IA")
-                return {
-                    'success': False,
-                    'error': 'Sem resposta da IA',
-                    'processed_data': [],
-                    'summary': {},
-                    'issues': []
-                }
+            for begin, end, error, _ in failures:
+                issues.append(f"Linhas {begin + 1}-{end}: bloco não processado pela IA ({error})")
+            
+            if len(chunks) > 1:
+                processed_data.sort(key=lambda item: item.get('original_row', 0))
+            summary = _merge_summaries(summaries)
             
             if status_callback:
                 status_callback("Processando resposta da IA...")
             
-            # Parse da resposta
-            try:
-                # Remove markdown code blocks se existirem
-                if '```json' in response:
-                    response = response.split('```json')[1].split('```')[0]
-                elif '```' in response:
-                    response = response.split('```')[1].split('```')[0]
-                
-                # Limpa a resposta
-                response_clean = response.strip()
-                
-                # Tenta encontrar o JSON válido na resposta
-                # Procura pelo primeiro { e último }
-                start_idx = response_clean.find('{')
-                if start_idx == -1:
-                    raise json.JSONDecodeError("JSON não encontrado na resposta", response_clean, 0)
-                
-                # Procura o último } válido (pode haver múltiplos objetos)
-                end_idx = response_clean.rfind('}')
-                if end_idx == -1 or end_idx <= start_idx:
-                    raise json.JSONDecodeError("JSON incompleto", response_clean, start_idx)
-                
-                # Extrai o JSON
-                json_str = response_clean[start_idx:end_idx + 1]
-                
-                # Tenta parsear
-                try:
-                    result = json.loads(json_str)
-                except json.JSONDecodeError as e:
-                    # Se falhar, tenta reparar strings não terminadas
-                    json_str_clean = json_str
-                    
-                    # Remove quebras de linha dentro de strings (exceto \n escapado)
-                    json_str_clean = re.sub(r'(?<!\\)\n', ' ', json_str_clean)
-                    json_str_clean = re.sub(r'(?<!\\)\r', ' ', json_str_clean)
-                    json_str_clean = re.sub(r'(?<!\\)\t', ' ', json_str_clean)
-                    
-                    # Tenta encontrar e fechar strings não terminadas
-                    # Procura por padrão: "texto sem fechamento
-                    # Adiciona " antes de caracteres problemáticos
-                    in_string = False
-                    escape_next = False
-                    result_chars = []
-                    
-                    for i, char in enumerate(json_str_clean):
-                        if escape_next:
-                            result_chars.append(char)
-                            escape_next = False
-                            continue
-                        
-                        if char == '\\':
-                            result_chars.append(char)
-                            escape_next = True
-                            continue
-                        
-                        if char == '"':
-                            in_string = not in_string
-                            result_chars.append(char)
-                        elif in_string:
-                            # Dentro de string, substitui caracteres problemáticos
-                            if char in ['\n', '\r', '\t']:
-                                result_chars.append(' ')
-                            elif char == '\x00':  # Null bytes
-                                result_chars.append(' ')
-                            else:
-                                result_chars.append(char)
-                        else:
-                            result_chars.append(char)
-                    
-                    # Se ainda estiver em string no final, fecha ela
-                    if in_string:
-                        result_chars.append('"')
+            # Valida e corrige datas usando os dados originais do arquivo
+            # Garante que as datas correspondam exatamente ao arquivo original
+            from utils.validators import parse_date
+            
+            # Identifica coluna de data no arquivo original
+            date_col = None
+            for col in file_data_df.columns:
+                if col == '_original_index':
+                    continue
+                col_lower = str(col).lower().strip()
+                if any(keyword in col_lower for keyword in ['data', 'date', 'dt', 'transacao', 'lancamento', 'vencimento', 'dia']):
+                    date_col = col
+                    break
+            
+            # Se encontrou coluna de data, força o uso das datas originais
+            if date_col:
+                for idx, item in enumerate(processed_data):
+                    # Tenta usar original_row, mas se não corresponder, usa o índice do array
+                    original_row = item.get('original_row', 0)
+                    original_idx = original_row - 1 if original_row > 0 else idx
                     
-                    json_str_clean = ''.join(result_chars)
+                    # Garante que o índice esteja dentro do range
+                    if original_idx < 0 or original_idx >= len(file_data_df):
+                        original_idx = idx
                     
-                    try:
-                        result = json.loads(json_str_clean)
-                    except json.JSONDecodeError as e2:
-                        # Tenta reparar problemas comuns de JSON
-                        json_str_final = self._repair_json(json_str_clean, e2)
-                        try:
-                            result = json.loads(json_str_final)
-                        except json.JSONDecodeError as e3:
-                            # Última tentativa: extrai apenas o que é possível parsear
-                            result = self._extract_partial_json(json_str_clean)
-                            if not result:
-                                # Se ainda falhar, levanta o erro com contexto
-                                raise e2
-                
-                # Se processou apenas amostra, aplica padrões ao resto
-                processed_data = result.get('processed_data', [])
-                
-                # Valida e corrige datas usando os dados originais do arquivo
-                # Garante que as datas correspondam exatamente ao arquivo original
-                from utils.validators import parse_date
-                
-                # Identifica coluna de data no arquivo original
-                date_col = None
-                for col in file_data_df.columns:
-                    if col == '_original_index':
-                        continue
-                    col_lower = str(col).lower().strip()
-                    if any(keyword in col_lower for keyword in ['data', 'date', 'dt', 'transacao', 'lancamento', 'vencimento', 'dia']):
-                        date_col = col
-                        break
-                
-                # Se encontrou coluna de data, força o uso das datas originais
-                if date_col:
-                    for idx, item in enumerate(processed_data):
-                        # Tenta usar original_row, mas se não corresponder, usa o índice do array
-                        original_row = item.get('original_row', 0)
-                        original_idx = original_row - 1 if original_row > 0 else idx
-                        
-                        # Garante que o índice esteja dentro do range
-                        if original_idx < 0 or original_idx >= len(file_data_df):
-                            original_idx = idx
+                    # Se o índice estiver dentro do range processado, usa a data original
+                    if 0 <= original_idx < len(file_data_df):
+                        original_row_data = file_data_df.iloc[original_idx]
                         
-                        # Se o índice estiver dentro do range processado, usa a data original
-                        if 0 <= original_idx < len(file_data_df):
-                            original_row_data = file_data_df.iloc[original_idx]
-                            
-                            if date_col in original_row_data:
-                                original_date = str(original_row_data[date_col])
-                                if original_date and original_date != 'nan' and original_date.strip() and original_date.lower() not in ['none', 'null', '']:
-                                    try:
-                                        # Parse da data original - FORÇA o uso
-                                        parsed_original = parse_date(original_date)
-                                        if parsed_original:
-                                            # FORÇA o uso da data original parseada
-                                            item['date'] = parsed_original.strftime('%Y-%m-%d')
-                                    except Exception as e:
-                                        # Se não conseguir parsear, mantém a data processada pela IA
-                                        pass
-                
-                # Remove _original_index dos dados processados se existir
-                for item in processed_data:
-                    item.pop('_original_index', None)
-                
-                # Processa TODO o arquivo - não há mais limitação de linhas
-                # Todos os dados já foram processados pela IA
-                
-                if status_callback:
-                    status_callback(f"✅ Processamento concluído! {len(processed_data)} linhas processadas.")
-                
-                return {
-                    'success': True,
-                    'processed_data': processed_data,
-                    'summary': result.get('summary', {}),
-                    'issues': result.get('issues', []),
-                    'error': None
-                }
-                
-            except json.JSONDecodeError as e:
-                # Tenta extrair informações úteis do erro
-                error_pos = getattr(e, 'pos', None)
-                error_line = getattr(e, 'lineno', None)
-                error_col = getattr(e, 'colno', None)
-                
-                error_msg = f'Erro ao parsear resposta da IA: {str(e)}'
-                if error_line and error_col:
-                    error_msg += f' (linha {error_line}, coluna {error_col})'
-                
-                # Mostra contexto do erro
-                if error_pos and error_pos < len(response):
-                    start = max(0, error_pos - 100)
-                    end = min(len(response), error_pos + 100)
-                    context = response[start:end]
-                    error_msg += f'\nContexto: ...{context}...'
-                
-                if status_callback:
-                    status_callback(f"❌ Erro ao processar resposta: {error_msg}")
-                
-                return {
-                    'success': False,
-                    'error': error_msg,
-                    'processed_data': [],
-                    'summary': {},
-                    'issues': [],
-                    'raw_response': response[:2000] if len(response) > 2000 else response
-                }
+                        if date_col in original_row_data:
+                            original_date = str(original_row_data[date_col])
+                            if original_date and original_date != 'nan' and original_date.strip() and original_date.lower() not in ['none', 'null', '']:
+                                try:
+                                    # Parse da data original - FORÇA o uso
+                                    parsed_original = parse_date(original_date)
+                                    if parsed_original:
+                                        # FORÇA o uso da data original parseada
+                                        item['date'] = parsed_original.strftime('%Y-%m-%d')
+                                except Exception as e:
+                                    # Se não conseguir parsear, mantém a data processada pela IA
+                                    pass
+            
+            # Remove _original_index dos dados processados se existir
+            for item in processed_data:
+                item.pop('_original_index', None)
+            
+            if status_callback:
+                status_callback(f"✅ Processamento concluído! {len(processed_data)} linhas processadas.")
+            
+            return {
+                'success': True,
+                'processed_data': processed_data,
+                'summary': summary,
+                'issues': issues,
+                'error': None
+            }
                 
         except Exception as e:
             if status_callback:
@@ -2333,10 +2559,12 @@ Processe e retorne em JSON com array "processed_data".
     def analyze_structure(
         self,
         df: pd.DataFrame,
-        import_type: str
+        import_type: str,
+        refresh_cache: bool = False
     ) -> Dict[str, Any]:
         """
         Realiza análise estrutural completa do arquivo
+        (refresh_cache=True ignora a resposta armazenada no cache de IA)
         """
         if not self.is_available():
             return {}
@@ -2346,7 +2574,7 @@ Processe e retorne em JSON com array "processed_data".
             data_sample = self._prepare_data_sample(df, max_rows=10)
             prompt = self._create_prompt_structural_analysis(columns, data_sample, import_type)
             
-            response, error = self._call_ai(prompt)
+            response, error = self._call_ai(prompt, refresh_cache=refresh_cache)
             
             if error:
                 print(f"Erro na análise estrutural: {error}")
@@ -2372,10 +2600,12 @@ Processe e retorne em JSON com array "processed_data".
         self,
         df: pd.DataFrame,
         import_type: str,
-        structural_analysis: Optional[Dict[str, Any]] = None
+        structural_analysis: Optional[Dict[str, Any]] = None,
+        refresh_cache: bool = False
     ) -> Dict[str, Any]:
         """
         Realiza mapeamento inteligente com contexto
+        (refresh_cache=True ignora a resposta armazenada no cache de IA)
         """
         if not self.is_available():
             return {}
@@ -2386,7 +2616,7 @@ Processe e retorne em JSON com array "processed_data".
             analysis_str = json.dumps(structural_analysis, indent=2, ensure_ascii=False) if structural_analysis else None
             prompt = self._create_prompt_intelligent_mapping(columns, data_sample, import_type, analysis_str)
             
-            response, error = self._call_ai(prompt)
+            response, error = self._call_ai(prompt, refresh_cache=refresh_cache)
             
             if error:
                 print(f"Erro no mapeamento inteligente: {error}")
@@ -2424,7 +2654,7 @@ Processe e retorne em JSON com array "processed_data".
         try:
             # Prepara dados (primeiras 20 linhas)
             sample_df = df.head(20)
-            file_data = json.dumps(sample_df.to_dict('records'), indent=2, default=str, ensure_ascii=False)
+            file_data = format_frame(sample_df)
             analysis_str = json.dumps(structural_analysis, indent=2, ensure_ascii=False) if structural_analysis else "{}"
             
             prompt = self._create_prompt_normalization(file_data, import_type, analysis_str, mapping)
@@ -2451,6 +2681,45 @@ Processe e retorne em JSON com array "processed_data".
         
         return {}
 
+    def learn_normalization_rules(
+        self,
+        df: pd.DataFrame,
+        import_type: str,
+        mapping: Dict[str, str],
+        structural_analysis: Optional[Dict[str, Any]] = None,
+        refresh_cache: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Pede à IA regras de normalização a partir de uma amostra do arquivo
+        (aplicadas ao arquivo inteiro por NormalizationRuleService.apply_rules)
+        
+        Retorna dicionário de regras ({} se a IA não estiver disponível ou falhar)
+        """
+        if not self.is_available():
+            return {}
+        
+        try:
+            data_sample = self._prepare_data_sample(df, max_rows=20)
+            analysis_str = json.dumps(structural_analysis, ensure_ascii=False) if structural_analysis else "{}"
+            prompt = self._create_prompt_normalization_rules(
+                list(df.columns), data_sample, import_type, analysis_str, mapping
+            )
+            
+            response, error = self._call_ai(prompt, refresh_cache=refresh_cache)
+            
+            if error:
+                print(f"Erro ao obter regras de normalização: {error}")
+                return {}
+            
+            if response:
+                return self._parse_ai_response(response)
+        except json.JSONDecodeError as e:
+            print(f"Erro ao parsear regras de normalização: {e}")
+        except Exception as e:
+            print(f"Erro ao obter regras de normalização: {e}")
+        
+        return {}
+
     def validate_data(
         self,
         normalized_data: List[Dict[str, Any]],
@@ -2465,7 +2734,7 @@ Processe e retorne em JSON com array "processed_data".
         try:
             # Limita a 50 registros para não exceder tokens
             data_to_validate = normalized_data[:50]
-            data_str = json.dumps(data_to_validate, indent=2, ensure_ascii=False)
+            data_str = format_records(data_to_validate)
             
             prompt = self._create_prompt_validation(data_str, import_type)
             
@@ -2507,7 +2776,7 @@ Processe e retorne em JSON com array "processed_data".
         try:
             # Prepara amostra de dados
             sample_df = df.head(20)
-            available_data = json.dumps(sample_df.to_dict('records'), indent=2, default=str, ensure_ascii=False)
+            available_data = format_frame(sample_df)
             
             prompt = self._create_prompt_inference(available_data, import_type, missing_fields, context)
             
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 
 from services.ai_service import AIService
 from services.import_service import ImportService
+from services.normalization_rules import NormalizationRuleService
 from utils.column_mapper import ColumnMapper
 
 
@@ -99,38 +100,33 @@ class DataProcessor:
                     import_type=import_type
                 )
             
-            # 3. Aplica mapeamento básico primeiro
-            mapped_df = ImportService.apply_mapping(df, result['mapping'])
-            
-            # 4. Normalização com IA (se disponível)
-            # Nota: A normalização com IA processa apenas uma amostra (20 linhas) para economizar tokens
-            # Os padrões identificados podem ser aplicados ao resto dos dados
+            # 3-4. Mapeamento e normalização por regras
+            # A IA analisa uma amostra e devolve regras (formato de data, decimal, sinal,
+            # tipo, limpeza de texto), aplicadas a todas as linhas de forma vetorizada
+            rules = {}
             if use_ai and self.ai_service.is_available() and result['mapping']:
-                normalization_result = self.ai_service.normalize_data(
+                rules = self.ai_service.learn_normalization_rules(
                     df,
                     import_type,
                     result['mapping'],
                     structural_analysis
                 )
-                
-                if normalization_result and 'normalized_data' in normalization_result:
-                    # Usa dados normalizados da IA (amostra)
-                    normalized_sample = normalization_result['normalized_data']
-                    result['normalized_data'] = normalized_sample
-                    result['normalization_summary'] = normalization_result.get('summary', {})
-                    result['normalization_patterns'] = normalization_result.get('summary', {}).get('common_issues', [])
-                    
-                    # Para o resto dos dados, aplica mapeamento básico
-                    # Em produção, poderia aplicar os padrões identificados
-                    if len(normalized_sample) < len(df):
-                        remaining_data = mapped_df.iloc[len(normalized_sample):].to_dict('records')
-                        result['normalized_data'].extend(remaining_data)
-                else:
-                    # Fallback: usa dados mapeados sem normalização IA
-                    result['normalized_data'] = mapped_df.to_dict('records')
+            # Regras inferidas localmente pelo campo de destino de cada coluna cobrem
+            # as colunas sem regra da IA (ou todas, sem IA)
+            inferred = NormalizationRuleService.infer_rules(df, result['mapping'])
+            if isinstance(rules.get('columns'), dict) and rules['columns']:
+                rules['columns'] = {**inferred['columns'], **rules['columns']}
+                rules.setdefault('type', inferred['type'])
             else:
-                # Fallback: converte DataFrame mapeado para lista de dicts
-                result['normalized_data'] = mapped_df.to_dict('records')
+                rules = inferred
+            
+            normalized_df, normalization_summary = NormalizationRuleService.apply_rules(
+                df, result['mapping'], rules, import_type
+            )
+            result['normalization_rules'] = rules
+            result['normalization_summary'] = normalization_summary
+            result['normalization_patterns'] = rules.get('notes', [])
+            result['normalized_data'] = normalized_df.to_dict('records')
             
             # 5. Validação (se dados normalizados disponíveis)
             if result['normalized_data'] and use_ai and self.ai_service.is_available():
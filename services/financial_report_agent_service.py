@@ -121,34 +121,22 @@ class FinancialReportAgentService:
         """
         Coleta todos os dados financeiros necessários para o relatório
         """
-        # Dados do DRE
-        dre_data = self.report_service.get_dre_data(self.db, client_id, start_date, end_date)
+        # Dados do DRE: período, acumulado do ano e período anterior (uma única leitura)
+        year_start = date(start_date.year, 1, 1)
+        period_days = (end_date - start_date).days
+        previous_start = start_date - timedelta(days=period_days + 1)
+        previous_end = start_date - timedelta(days=1)
+        dre_data, dre_year, dre_previous = self.report_service.get_dre_multi(self.db, client_id, [
+            (start_date, end_date),
+            (year_start, end_date),
+            (previous_start, previous_end)
+        ])
         
         # Dados do DFC
         dfc_data = self.report_service.get_dfc_data(self.db, client_id, start_date, end_date)
         
         # Disponíveis financeiros (saldo bancário)
-        # Busca última transação de cada conta bancária para obter saldo
-        bank_balances = {}
-        bank_transactions = self.db.query(Transaction).filter(
-            Transaction.client_id == client_id,
-            Transaction.document_type == 'extrato_bancario',
-            Transaction.date <= end_date
-        ).order_by(Transaction.date.desc(), Transaction.id.desc()).all()
-        
-        for trans in bank_transactions:
-            bank_name = trans.bank_name or trans.account or 'Banco'
-            if bank_name not in bank_balances:
-                # Calcula saldo aproximado somando valores até a data
-                balance = self.db.query(func.sum(Transaction.value)).filter(
-                    Transaction.client_id == client_id,
-                    Transaction.account == trans.account,
-                    Transaction.date <= end_date
-                ).scalar() or 0
-                bank_balances[bank_name] = {
-                    'account': trans.account or '',
-                    'balance': float(balance)
-                }
+        bank_balances = self.report_service.get_bank_balances(self.db, client_id, end_date)
         
         total_bank_balance = sum(b['balance'] for b in bank_balances.values())
         
@@ -228,18 +216,6 @@ class FinancialReportAgentService:
             Transaction.date <= end_date
         ).group_by(Group.name, Subgroup.name).all()
         
-        # Dados acumulados do ano
-        year_start = date(start_date.year, 1, 1)
-        dre_year = self.report_service.get_dre_data(self.db, client_id, year_start, end_date)
-        
-        # Comparação com período anterior
-        period_days = (end_date - start_date).days
-        previous_start = start_date - timedelta(days=period_days + 1)
-        previous_end = start_date - timedelta(days=1)
-        dre_previous = self.report_service.get_dre_data(
-            self.db, client_id, previous_start, previous_end
-        )
-        
         # Projeções futuras (próximos 3 meses)
         projection_start = end_date + timedelta(days=1)
         projection_end = end_date + relativedelta(months=3)
@@ -0,0 +1,354 @@
+"""
+Fila de importações em segundo plano
+
+As importações rodam em um pool de threads do próprio processo, fora do script
+da página: a sessão do navegador não fica bloqueada e um rerun ou troca de
+página não interrompe a gravação. Estado, progresso, contagens, erro e tempos
+de cada importação ficam na tabela import_jobs, que a página consulta.
+
+O conteúdo dos arquivos fica só na memória do processo; importações pendentes
+ou em execução quando o processo foi reiniciado são marcadas como interrompidas.
+
+Configuração por variáveis de ambiente:
+    IMPORT_JOB_WORKERS - importações executadas ao mesmo tempo (padrão: 2)
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from io import BytesIO
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from config.database import SessionLocal
+from models.import_batch import ImportBatch
+from models.import_job import ImportJob
+from services.import_service import ImportService, STREAM_CHUNK_ROWS
+
+
+IMPORT_JOB_WORKERS = int(os.getenv('IMPORT_JOB_WORKERS', '2'))
+
+ACTIVE_STATUSES = ('pendente', 'executando')
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+_futures: Dict[int, Future] = {}
+_cancel_requested: Set[int] = set()
+
+
+class _JobCancelled(Exception):
+    """
+    Cancelamento pedido pelo usuário, verificado entre blocos
+    """
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """
+    Cria o pool na primeira importação do processo (e marca as órfãs de execuções anteriores)
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            _mark_interrupted()
+            _executor = ThreadPoolExecutor(max_workers=IMPORT_JOB_WORKERS, thread_name_prefix='import-job')
+        return _executor
+
+
+def _mark_interrupted() -> None:
+    """
+    Importações pendentes ou em execução sem pool vivo foram perdidas com o processo anterior
+    """
+    db = SessionLocal()
+    try:
+        db.query(ImportJob).filter(ImportJob.status.in_(ACTIVE_STATUSES)).update(
+            {'status': 'interrompido', 'error': 'Processo reiniciado durante a importação',
+             'finished_at': datetime.utcnow()},
+            synchronize_session=False
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Erro ao marcar importações interrompidas: {e}")
+    finally:
+        db.close()
+
+
+def _job_to_dict(job: ImportJob) -> Dict[str, Any]:
+    return {
+        'id': job.id,
+        'job_kind': job.job_kind,
+        'import_type': job.import_type,
+        'filename': job.filename,
+        'status': job.status,
+        'progress': job.progress,
+        'rows_total': job.rows_total,
+        'rows_read': job.rows_read,
+        'rows_imported': job.rows_imported,
+        'rows_skipped': job.rows_skipped,
+        'transactions_created': job.transactions_created,
+        'error': job.error,
+        'batch_id': job.batch_id,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+        'duration_seconds': job.duration_seconds,
+    }
+
+
+def _progress_updater(db: Session, job: ImportJob) -> Callable[[int, int], None]:
+    """
+    Callback de progresso dos importadores: grava contagens no job e atende cancelamentos
+    """
+    def update(rows_read: int, rows_imported: int) -> None:
+        if job.id in _cancel_requested:
+            raise _JobCancelled()
+        job.rows_read = rows_read
+        job.rows_imported = rows_imported
+        if job.rows_total:
+            job.progress = min(rows_read / job.rows_total, 1.0)
+        db.commit()
+    return update
+
+
+def _run_job(job_id: int, work: Callable[[Session, ImportJob], None]) -> None:
+    """
+    Executa uma importação em uma thread do pool, com sessão própria
+    """
+    db = SessionLocal()
+    try:
+        job = db.get(ImportJob, job_id)
+        if job_id in _cancel_requested:
+            job.status = 'cancelado'
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            return
+
+        job.status = 'executando'
+        job.started_at = datetime.utcnow()
+        db.commit()
+        started = time.perf_counter()
+
+        try:
+            work(db, job)
+            job.status = 'concluido'
+            job.progress = 1.0
+        except _JobCancelled:
+            db.rollback()
+            job.status = 'cancelado'
+        except Exception as e:
+            db.rollback()
+            job.status = 'erro'
+            job.error = str(e)
+            print(f"❌ Erro na importação #{job_id}: {e}")
+
+        if job.status != 'concluido' and job.batch_id:
+            # Blocos já gravados continuam no lote, que pode ser desfeito no histórico
+            batch = db.get(ImportBatch, job.batch_id)
+            if batch and batch.status == 'em_andamento':
+                ImportService.finish_batch(db, batch, job.rows_imported, job.rows_skipped)
+
+        job.finished_at = datetime.utcnow()
+        job.duration_seconds = time.perf_counter() - started
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Erro ao atualizar a importação #{job_id}: {e}")
+    finally:
+        db.close()
+        with _lock:
+            _futures.pop(job_id, None)
+            _cancel_requested.discard(job_id)
+
+
+def _submit(client_id: int, job_kind: str, import_type: str, filename: str,
+            rows_total: Optional[int], work: Callable[[Session, ImportJob], None]) -> int:
+    """
+    Grava o job como pendente e o coloca na fila do pool
+    """
+    executor = _get_executor()
+    db = SessionLocal()
+    try:
+        job = ImportJob(client_id=client_id, job_kind=job_kind, import_type=import_type,
+                        filename=filename, rows_total=rows_total)
+        db.add(job)
+        db.commit()
+        job_id = job.id
+    finally:
+        db.close()
+
+    with _lock:
+        _futures[job_id] = executor.submit(_run_job, job_id, work)
+    return job_id
+
+
+class ImportJobService:
+    """
+    Serviço para enfileirar e acompanhar importações em segundo plano
+    """
+
+    @staticmethod
+    def enqueue_file_import(client_id: int, file_content: bytes, filename: str, import_type: str,
+                            mapping: Dict[str, str], read_options: Dict[str, Any],
+                            bank_name: Optional[str] = None, group_id: Optional[int] = None,
+                            subgroup_id: Optional[int] = None) -> int:
+        """
+        Enfileira a importação em fluxo de um CSV ou Excel grande
+        (ImportService.import_csv_stream / import_excel_stream)
+
+        Args:
+            read_options: {'format': 'csv', 'encoding', 'delimiter'} ou
+                          {'format': 'excel', 'sheet_name', 'all_sheets'}
+
+        Returns:
+            id do job
+        """
+        is_excel = read_options['format'] == 'excel'
+        # Estimativa de linhas para o progresso (não disponível para Excel)
+        rows_total = None if is_excel else max(file_content.count(b'\n'), 1)
+
+        def work(db: Session, job: ImportJob) -> None:
+            batch = ImportService.start_batch(db, client_id, import_type, filename)
+            job.batch_id = batch.id
+            db.commit()
+
+            stream_args = dict(bank_name=bank_name, group_id=group_id, subgroup_id=subgroup_id,
+                               batch_id=batch.id, progress_callback=_progress_updater(db, job))
+            if is_excel:
+                totals = ImportService.import_excel_stream(
+                    db, client_id, BytesIO(file_content), import_type, mapping, filename,
+                    sheet_name=read_options.get('sheet_name'), all_sheets=read_options.get('all_sheets', False),
+                    **stream_args
+                )
+            else:
+                totals = ImportService.import_csv_stream(
+                    db, client_id, BytesIO(file_content), import_type, mapping, filename,
+                    encoding=read_options.get('encoding', 'utf-8'), delimiter=read_options.get('delimiter', ','),
+                    **stream_args
+                )
+
+            job.rows_read = totals['rows']
+            job.rows_total = totals['rows']
+            job.rows_imported = totals['imported']
+            job.transactions_created = totals['transactions']
+            batch.rows_total = totals['rows']
+            ImportService.finish_batch(db, batch, totals['imported'])
+            if totals['imported'] > 0:
+                ImportService.register_file(
+                    db, client_id, import_type, file_content, filename, None,
+                    totals['imported'], batch_id=batch.id, rows_total=totals['rows']
+                )
+
+        return _submit(client_id, read_options['format'], import_type, filename, rows_total, work)
+
+    @staticmethod
+    def enqueue_dataframe_import(client_id: int, import_type: str, df: pd.DataFrame, filename: str,
+                                 file_content: bytes, bank_name: Optional[str] = None,
+                                 group_id: Optional[int] = None, subgroup_id: Optional[int] = None,
+                                 chunksize: Optional[int] = None) -> int:
+        """
+        Enfileira a importação de dados já mapeados e revisados na página
+
+        Linhas já importadas em arquivos anteriores são ignoradas (find_overlap) e
+        o restante é gravado em blocos de chunksize linhas, com progresso por bloco.
+
+        Returns:
+            id do job
+        """
+        df = df.reset_index(drop=True)
+        chunksize = chunksize or STREAM_CHUNK_ROWS
+
+        def work(db: Session, job: ImportJob) -> None:
+            # Sobreposição parcial: linhas já importadas em arquivos anteriores
+            overlap = ImportService.find_overlap(db, client_id, import_type, df)
+            skipped = int(overlap.sum())
+            import_df = df[~overlap].reset_index(drop=True) if skipped else df
+
+            batch = ImportService.start_batch(db, client_id, import_type, filename, len(df))
+            job.batch_id = batch.id
+            job.rows_skipped = skipped
+            job.rows_total = len(import_df)
+            db.commit()
+
+            update_progress = _progress_updater(db, job)
+            imported = transactions = 0
+            for begin in range(0, len(import_df), chunksize):
+                result = ImportService.import_dataframe(
+                    db, client_id, import_type, import_df.iloc[begin:begin + chunksize],
+                    filename, bank_name, group_id, subgroup_id, batch.id
+                )
+                imported += result['imported']
+                transactions += result['transactions']
+                update_progress(min(begin + chunksize, len(import_df)), imported)
+
+            job.rows_imported = imported
+            job.transactions_created = transactions
+            ImportService.finish_batch(db, batch, imported, skipped)
+            if imported > 0:
+                ImportService.register_file(
+                    db, client_id, import_type, file_content, filename,
+                    import_df, imported, skipped, batch_id=batch.id
+                )
+
+        return _submit(client_id, 'dataframe', import_type, filename, len(df), work)
+
+    @staticmethod
+    def cancel_job(db: Session, job_id: int) -> bool:
+        """
+        Cancela um job: pendente sai da fila; em execução para no próximo bloco
+        (os blocos já gravados ficam no lote, que pode ser desfeito)
+
+        Returns:
+            True se o cancelamento foi registrado
+        """
+        job = db.get(ImportJob, job_id)
+        if not job or job.status not in ACTIVE_STATUSES:
+            return False
+
+        with _lock:
+            future = _futures.get(job_id)
+            _cancel_requested.add(job_id)
+
+        if future is None or future.cancel():
+            # Ainda não começou (ou não pertence a este processo): encerra aqui
+            job.status = 'cancelado'
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            with _lock:
+                _futures.pop(job_id, None)
+                _cancel_requested.discard(job_id)
+        return True
+
+    @staticmethod
+    def get_job(db: Session, job_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Estado atual de um job
+        """
+        job = db.get(ImportJob, job_id)
+        return _job_to_dict(job) if job else None
+
+    @staticmethod
+    def get_jobs(db: Session, client_id: int, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Jobs mais recentes do cliente
+        """
+        jobs = (
+            db.query(ImportJob)
+            .filter(ImportJob.client_id == client_id)
+            .order_by(ImportJob.created_at.desc(), ImportJob.id.desc())
+            .limit(limit)
+            .all()
+        )
+        return [_job_to_dict(job) for job in jobs]
+
+    @staticmethod
+    def has_active_jobs(db: Session, client_id: int) -> bool:
+        """
+        Há importações pendentes ou em execução para o cliente
+        """
+        return db.query(ImportJob.id).filter(
+            ImportJob.client_id == client_id,
+            ImportJob.status.in_(ACTIVE_STATUSES)
+        ).first() is not None
@@ -1,11 +1,13 @@
 """
 Serviço de importação de dados com mapeamento de colunas
 """
+import hashlib
+import os
 import pandas as pd
 from sqlalchemy.orm import Session
-from sqlalchemy import text, inspect
-from typing import Dict, List, Optional, Any
-from datetime import datetime
+from sqlalchemy import insert, select, delete, func
+from typing import Callable, Dict, Iterable, List, Optional, Any, Set, Tuple
+from datetime import datetime, date as date_type
 from models.transaction import Transaction, BankStatement
 from models.contract import Contract
 from models.account import AccountPayable, AccountReceivable, ImportMapping
@@ -14,48 +16,191 @@ from models.credit_card import CreditCardInvoice
 from models.card_machine import CardMachineStatement
 from models.inventory import Inventory
 from models.group import Group, Subgroup
-from utils.validators import parse_date, parse_currency
-from config.database import engine
+from models.import_batch import ImportBatch
+from models.import_file import ImportFile, ImportRowFingerprint
+from utils.validators import parse_date_series, parse_currency_series
+from config.migrations import ensure_schema
+from services.ledger_service import LedgerService, TRACKED_MODELS
+from services.report_cache import bump_client_versions
 import json
 
 
-def _ensure_columns_exist(db: Session, table_name: str):
+# Linhas por instrução INSERT (executemany) nas importações em massa
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '5000'))
+
+# Linhas lidas por bloco na importação em fluxo de CSVs grandes
+STREAM_CHUNK_ROWS = int(os.getenv('IMPORT_STREAM_CHUNK_ROWS', '50000'))
+
+# Fingerprints por consulta IN na detecção de sobreposição entre arquivos
+FINGERPRINT_LOOKUP_CHUNK = 500
+
+# Entidades gravadas pelas importações (todas com batch_id)
+IMPORTED_MODELS = [
+    Transaction,
+    BankStatement,
+    Contract,
+    AccountPayable,
+    AccountReceivable,
+    FinancialInvestment,
+    CreditCardInvoice,
+    CardMachineStatement,
+    Inventory,
+]
+
+
+def _records(df: pd.DataFrame, dates: Tuple[str, ...] = (),
+             amounts: Tuple[str, ...] = ()) -> List[Dict[str, Any]]:
     """
-    Garante que as colunas group_id e subgroup_id existem na tabela
+    Linhas do DataFrame como dicionários (muito mais rápido que iterrows)
+    
+    As colunas de data e de valor presentes são convertidas de uma vez, por coluna:
+    datas viram date e valores viram float, com None nas células inválidas.
+    As linhas inválidas são informadas em um único aviso por coluna.
     """
-    try:
-        inspector = inspect(engine)
-        if not inspector.has_table(table_name):
-            return
-        
-        columns = [col['name'] for col in inspector.get_columns(table_name)]
-        
-        if 'group_id' not in columns:
-            try:
-                db.execute(text(f"""
-                    ALTER TABLE {table_name} 
-                    ADD COLUMN group_id INTEGER REFERENCES groups(id)
-                """))
-                db.commit()
-            except Exception as e:
-                db.rollback()
-                # Ignora erro se coluna já existir ou outro problema
-                pass
-        
-        if 'subgroup_id' not in columns:
-            try:
-                db.execute(text(f"""
-                    ALTER TABLE {table_name} 
-                    ADD COLUMN subgroup_id INTEGER REFERENCES subgroups(id)
-                """))
-                db.commit()
-            except Exception as e:
-                db.rollback()
-                # Ignora erro se coluna já existir ou outro problema
-                pass
-    except Exception as e:
-        # Se houver erro, continua - pode ser que as colunas já existam
-        pass
+    parsed = df.copy(deep=False)
+    for column in dates:
+        if column in df:
+            values, valid = parse_date_series(df[column])
+            parsed[column] = values.dt.date.astype(object).where(valid, None)
+            _report_invalid(column, valid)
+    for column in amounts:
+        if column in df:
+            values, valid = parse_currency_series(df[column])
+            parsed[column] = values.astype(object).where(valid, None)
+            _report_invalid(column, valid)
+    return parsed.to_dict('records')
+
+
+def _report_invalid(column: str, valid: pd.Series):
+    """
+    Aviso único com a quantidade (e as primeiras linhas) de valores inválidos da coluna
+    """
+    invalid = valid.index[~valid.to_numpy()]
+    if len(invalid):
+        sample = ', '.join(str(i) for i in invalid[:10])
+        print(f"⚠️ Coluna '{column}': {len(invalid)} valor(es) inválido(s) (linhas {sample}{', ...' if len(invalid) > 10 else ''})")
+
+
+def _bulk_insert(db: Session, client_id: int, model, rows: List[Dict[str, Any]],
+                 chunk_size: Optional[int] = None, ignore_conflicts: bool = False) -> int:
+    """
+    Grava as linhas em massa: tuplas já convertidas para o formato do banco e
+    executemany do driver em blocos de chunk_size
+    
+    Com ignore_conflicts, usa INSERT OR IGNORE: linhas que violariam um índice
+    único são descartadas pelo banco. Retorna a quantidade de linhas gravadas.
+
+    Inserções em massa não passam pelo flush da sessão, então o livro-razão
+    mensal dos meses afetados é recalculado e o cache de relatórios do
+    cliente é invalidado aqui.
+    """
+    if not rows:
+        return 0
+
+    table = model.__table__
+    dialect = db.get_bind().dialect
+    names = list(rows[0].keys())
+
+    # Colunas omitidas com default no modelo (ex.: created_at) recebem o
+    # valor calculado uma vez para toda a importação
+    defaults = {}
+    for column in table.columns:
+        if column.name not in names and column.default is not None and not column.primary_key:
+            default = column.default
+            defaults[column.name] = default.arg(None) if default.is_callable else default.arg
+
+    # O INSERT compilado lista as colunas na ordem da tabela
+    columns = [column.name for column in table.columns if column.name in defaults or column.name in names]
+    processors = [table.c[name].type.dialect_impl(dialect).bind_processor(dialect) for name in columns]
+    statement = insert(table)
+    if ignore_conflicts:
+        statement = statement.prefix_with('OR IGNORE', dialect='sqlite')
+    statement = str(statement.compile(dialect=dialect, column_keys=columns))
+
+    # Valores já convertidos por coluna: datas, datas de importação e booleanos se
+    # repetem muito, e os conversores do SQLAlchemy são chamados uma vez por valor distinto
+    converted = [{} for _ in columns]
+
+    def convert_column(chunk, name, process, cache):
+        try:
+            return [
+                None if (value := row[name]) is None
+                else cache[value] if value in cache
+                else cache.setdefault(value, process(value))
+                for row in chunk
+            ]
+        except TypeError:
+            # Valores não hasheáveis: conversão valor a valor
+            return [None if row[name] is None else process(row[name]) for row in chunk]
+
+    def to_params(chunk):
+        # Conversão coluna a coluna (list comprehensions) e transposição em tuplas
+        values = []
+        for name, process, cache in zip(columns, processors, converted):
+            if name in defaults:
+                value = defaults[name]
+                column = [value if process is None or value is None else process(value)] * len(chunk)
+            elif process is None:
+                column = [row[name] for row in chunk]
+            else:
+                column = convert_column(chunk, name, process, cache)
+            values.append(column)
+        return list(zip(*values))
+
+    chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+    connection = db.connection()
+    inserted = 0
+    for start in range(0, len(rows), chunk_size):
+        result = connection.exec_driver_sql(statement, to_params(rows[start:start + chunk_size]))
+        inserted += result.rowcount
+
+    date_attr = TRACKED_MODELS.get(model)
+    if date_attr is not None:
+        months = {r[date_attr].strftime('%Y-%m') for r in rows if r.get(date_attr) is not None}
+        LedgerService.refresh_months(db, client_id, months)
+    bump_client_versions(db, [client_id])
+    return inserted
+
+
+def _statement_key(date: date_type, description: str, value: float, account: Optional[str]) -> Tuple:
+    """
+    Chave de deduplicação de uma linha de extrato: data, descrição normalizada
+    (sem diferença de caixa e espaços), valor absoluto em centavos e conta
+    """
+    return (
+        date.isoformat(),
+        ' '.join(str(description).split()).casefold(),
+        round(abs(value) * 100),
+        ' '.join(str(account or '').split()).casefold()
+    )
+
+
+def _fingerprint(key: Tuple) -> str:
+    """
+    Fingerprint (SHA-256) de uma chave de deduplicação
+    """
+    return hashlib.sha256('|'.join(map(str, key)).encode('utf-8')).hexdigest()
+
+
+def _existing_statement_fingerprints(db: Session, client_id: int, start_date: date_type,
+                                     end_date: date_type) -> Set[str]:
+    """
+    Fingerprints das transações de extrato já gravadas no período (uma consulta);
+    transações anteriores à coluna fingerprint têm o valor calculado aqui
+    """
+    rows = db.execute(
+        select(Transaction.date, Transaction.description, Transaction.value,
+               Transaction.account, Transaction.fingerprint).where(
+            Transaction.client_id == client_id,
+            Transaction.document_type == 'extrato_bancario',
+            Transaction.date >= start_date,
+            Transaction.date <= end_date
+        )
+    ).all()
+    return {
+        row.fingerprint or _fingerprint(_statement_key(row.date, row.description, row.value, row.account))
+        for row in rows
+    }
 
 
 def _get_row_group_subgroup(row, group_id, subgroup_id):
@@ -134,26 +279,219 @@ class ImportService:
         
         return mapped_df
 
+    @staticmethod
+    def file_hash(file_content: bytes) -> str:
+        """
+        SHA-256 do conteúdo enviado (identidade do arquivo no registro de importações)
+        """
+        return hashlib.sha256(file_content).hexdigest()
+
+    @staticmethod
+    def find_imported_file(db: Session, client_id: int, file_content: bytes) -> Optional[ImportFile]:
+        """
+        Importação anterior do mesmo arquivo (mesmo conteúdo) para o cliente, se houver
+        """
+        return db.query(ImportFile).filter(
+            ImportFile.client_id == client_id,
+            ImportFile.file_hash == ImportService.file_hash(file_content)
+        ).order_by(ImportFile.imported_at.desc()).first()
+
+    @staticmethod
+    def row_fingerprints(df: pd.DataFrame, import_type: str) -> List[str]:
+        """
+        Fingerprint (SHA-256) de cada linha, a partir das colunas alvo do tipo de
+        importação, com texto normalizado (sem diferença de caixa e espaços)
+        """
+        columns = [c for c in ImportService.get_target_columns(import_type)
+                   if c in df.columns and c not in ('group_id', 'subgroup_id')]
+        if not columns:
+            columns = sorted(df.columns)
+        
+        normalized = df[columns].astype(object).where(df[columns].notna(), '')
+        normalized = normalized.astype(str).apply(lambda col: col.str.split().str.join(' ').str.casefold())
+        keys = normalized.apply(lambda col: col.name + '=' + col).agg('|'.join, axis=1)
+        return [hashlib.sha256(key.encode('utf-8')).hexdigest() for key in keys]
+
+    @staticmethod
+    def find_overlap(db: Session, client_id: int, import_type: str, df: pd.DataFrame) -> pd.Series:
+        """
+        Máscara das linhas do DataFrame já importadas em arquivos anteriores
+        (sobreposição parcial, ex.: extrato que repete o fim do mês anterior)
+        """
+        fingerprints = ImportService.row_fingerprints(df, import_type) if len(df) else []
+        known = set()
+        unique = list(set(fingerprints))
+        for start in range(0, len(unique), FINGERPRINT_LOOKUP_CHUNK):
+            known.update(db.execute(
+                select(ImportRowFingerprint.fingerprint).where(
+                    ImportRowFingerprint.client_id == client_id,
+                    ImportRowFingerprint.import_type == import_type,
+                    ImportRowFingerprint.fingerprint.in_(unique[start:start + FINGERPRINT_LOOKUP_CHUNK])
+                )
+            ).scalars())
+        return pd.Series([fp in known for fp in fingerprints], index=df.index, dtype=bool)
+
+    @staticmethod
+    def register_file(db: Session, client_id: int, import_type: str, file_content: bytes,
+                      filename: str, df: Optional[pd.DataFrame], rows_imported: int,
+                      rows_skipped: int = 0, batch_id: Optional[int] = None,
+                      rows_total: Optional[int] = None) -> ImportFile:
+        """
+        Registra o arquivo importado (hash do conteúdo, contagens e lote da importação)
+        e os fingerprints das linhas enviadas
+        
+        Sem df (importação em fluxo), registra apenas o arquivo, com rows_total informado.
+        """
+        import_file = ImportFile(
+            client_id=client_id,
+            file_hash=ImportService.file_hash(file_content),
+            filename=filename,
+            file_size=len(file_content),
+            import_type=import_type,
+            batch_id=batch_id,
+            rows_total=rows_total if rows_total is not None else len(df) + rows_skipped,
+            rows_imported=rows_imported,
+            rows_skipped=rows_skipped
+        )
+        db.add(import_file)
+        db.flush()
+        
+        fingerprints = ImportService.row_fingerprints(df, import_type) if df is not None and len(df) else []
+        if fingerprints:
+            db.execute(
+                insert(ImportRowFingerprint).prefix_with('OR IGNORE', dialect='sqlite'),
+                [dict(client_id=client_id, import_type=import_type, fingerprint=fp,
+                      import_file_id=import_file.id) for fp in fingerprints]
+            )
+        db.commit()
+        return import_file
+
+    @staticmethod
+    def start_batch(db: Session, client_id: int, import_type: str, filename: str,
+                    rows_total: int = 0) -> ImportBatch:
+        """
+        Abre um lote de importação; o id deve ser passado como batch_id aos métodos import_*
+        """
+        batch = ImportBatch(
+            client_id=client_id,
+            import_type=import_type,
+            filename=filename,
+            rows_total=rows_total,
+            started_at=datetime.utcnow()
+        )
+        db.add(batch)
+        db.commit()
+        return batch
+
+    @staticmethod
+    def finish_batch(db: Session, batch: ImportBatch, rows_imported: int,
+                     rows_skipped: int = 0) -> ImportBatch:
+        """
+        Conclui o lote registrando contagens e tempo da importação
+        """
+        batch.finished_at = datetime.utcnow()
+        batch.duration_seconds = (batch.finished_at - batch.started_at).total_seconds()
+        batch.rows_imported = rows_imported
+        batch.rows_skipped = rows_skipped
+        batch.status = 'concluido'
+        db.commit()
+        return batch
+
+    @staticmethod
+    def undo_batch(db: Session, batch_id: int) -> Dict[str, int]:
+        """
+        Desfaz uma importação: remove em uma única transação todos os registros do
+        lote (um DELETE por tabela, pelo índice de batch_id) e o registro do arquivo,
+        que pode então ser importado de novo
+        
+        Returns:
+            Quantidade de registros removidos por tabela
+        """
+        batch = db.get(ImportBatch, batch_id)
+        if batch is None or batch.status == 'desfeito':
+            return {}
+        
+        removed = {}
+        try:
+            for model in IMPORTED_MODELS:
+                # Meses do livro-razão afetados, lidos antes de remover
+                date_attr = TRACKED_MODELS.get(model)
+                months = set()
+                if date_attr is not None:
+                    months = set(db.execute(
+                        select(func.strftime('%Y-%m', getattr(model, date_attr))).where(
+                            model.batch_id == batch_id
+                        ).distinct()
+                    ).scalars()) - {None}
+                
+                table = model.__table__
+                result = db.execute(delete(table).where(table.c.batch_id == batch_id))
+                if result.rowcount:
+                    removed[table.name] = result.rowcount
+                LedgerService.refresh_months(db, batch.client_id, months)
+            
+            import_files = select(ImportFile.id).where(ImportFile.batch_id == batch_id)
+            db.execute(delete(ImportRowFingerprint.__table__).where(
+                ImportRowFingerprint.import_file_id.in_(import_files)
+            ))
+            db.execute(delete(ImportFile.__table__).where(ImportFile.batch_id == batch_id))
+            
+            batch.status = 'desfeito'
+            batch.undone_at = datetime.utcnow()
+            bump_client_versions(db, [batch.client_id])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        
+        return removed
+
+    @staticmethod
+    def get_batches(db: Session, client_id: int, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Lotes de importação do cliente (mais recentes primeiro) com estatísticas de tempo
+        """
+        batches = db.query(ImportBatch).filter(
+            ImportBatch.client_id == client_id
+        ).order_by(ImportBatch.started_at.desc()).limit(limit).all()
+        
+        return [{
+            'id': batch.id,
+            'import_type': batch.import_type,
+            'filename': batch.filename,
+            'status': batch.status,
+            'started_at': batch.started_at,
+            'rows_total': batch.rows_total,
+            'rows_imported': batch.rows_imported,
+            'rows_skipped': batch.rows_skipped,
+            'duration_seconds': batch.duration_seconds,
+            'rows_per_second': (batch.rows_imported / batch.duration_seconds
+                                if batch.duration_seconds else None),
+            'undone_at': batch.undone_at
+        } for batch in batches]
+
     @staticmethod
     def import_transactions(db: Session, client_id: int, df: pd.DataFrame,
                           document_type: str, filename: str,
                           group_id: Optional[int] = None,
-                          subgroup_id: Optional[int] = None) -> int:
+                          subgroup_id: Optional[int] = None,
+                          batch_id: Optional[int] = None) -> int:
         """
         Importa transações financeiras
         Colunas esperadas: date, description, value, type (opcional), category (opcional)
         """
         imported_count = 0
+        rows = []
         
-        for _, row in df.iterrows():
+        for row in _records(df, dates=('date',), amounts=('value',)):
             try:
                 # Parse da data
-                date = parse_date(str(row.get('date', '')))
+                date = row.get('date')
                 if not date:
                     continue
                 
                 # Parse do valor
-                value = parse_currency(str(row.get('value', 0)))
+                value = row.get('value', 0.0)
                 if value is None:
                     continue
                 
@@ -166,9 +504,10 @@ class ImportService:
                 row_group_id, row_subgroup_id = _get_row_group_subgroup(row, group_id, subgroup_id)
                 
                 # Cria transação
-                transaction = Transaction(
+                rows.append(dict(
                     client_id=client_id,
-                    date=date.date(),
+                    batch_id=batch_id,
+                    date=date,
                     description=str(row.get('description', '')),
                     value=abs(value),
                     type=trans_type,
@@ -178,15 +517,14 @@ class ImportService:
                     account=str(row.get('account', '')) if 'account' in row else None,
                     document_type=document_type,
                     imported_from=filename
-                )
-                
-                db.add(transaction)
+                ))
                 imported_count += 1
             
             except Exception as e:
                 print(f"Erro ao importar linha: {e}")
                 continue
         
+        _bulk_insert(db, client_id, Transaction, rows)
         db.commit()
         return imported_count
 
@@ -194,177 +532,193 @@ class ImportService:
     def import_bank_statements(db: Session, client_id: int, df: pd.DataFrame,
                               bank_name: str, filename: str,
                               group_id: Optional[int] = None,
-                              subgroup_id: Optional[int] = None) -> Dict[str, int]:
+                              subgroup_id: Optional[int] = None,
+                              batch_id: Optional[int] = None) -> Dict[str, int]:
         """
         Importa extratos bancários
         Salva em bank_statements E cria transações automaticamente
         Colunas esperadas: date, description, value, balance (opcional)
         Retorna: {'statements': count, 'transactions': count}
         """
-        # Garante que as colunas existem antes de importar
-        _ensure_columns_exist(db, 'bank_statements')
+        # Esquema em dia (na prática, só a primeira importação do processo consulta a versão)
+        ensure_schema()
         
         statements_count = 0
         transactions_count = 0
+        statement_rows = []
+        transaction_rows = []
+        imported_at = datetime.utcnow()
         
-        for _, row in df.iterrows():
+        for row in _records(df, dates=('date',), amounts=('value', 'balance')):
             try:
                 # Parse da data
-                date = parse_date(str(row.get('date', '')))
+                date = row.get('date')
                 if not date:
                     continue
                 
                 # Parse do valor
-                value = parse_currency(str(row.get('value', 0)))
+                value = row.get('value', 0.0)
                 if value is None:
                     continue
                 
                 # Parse do saldo (opcional)
                 balance = None
                 if 'balance' in row:
-                    balance = parse_currency(str(row.get('balance', '')))
+                    balance = row.get('balance')
                 
                 account = str(row.get('account', '')) if 'account' in row else None
                 description = str(row.get('description', ''))
-                date_obj = date.date()
+                date_obj = date
                 
                 # Usa group_id e subgroup_id da linha se disponíveis, senão usa os parâmetros
                 row_group_id, row_subgroup_id = _get_row_group_subgroup(row, group_id, subgroup_id)
                 
                 # 1. Salva extrato bancário (para consulta/conciliação)
-                statement = BankStatement(
+                statement_rows.append(dict(
                     client_id=client_id,
+                    batch_id=batch_id,
                     bank_name=bank_name,
                     account=account,
                     date=date_obj,
                     description=description,
                     value=value,
                     balance=balance,
-                    imported_at=datetime.utcnow(),  # Marca como importado
+                    imported_at=imported_at,  # Marca como importado
                     group_id=row_group_id,
                     subgroup_id=row_subgroup_id
-                )
-                
-                db.add(statement)
+                ))
                 statements_count += 1
                 
-                # 2. Cria transação correspondente (para DRE/DFC)
-                # Verifica se já existe para evitar duplicação
-                existing = db.query(Transaction).filter(
-                    Transaction.client_id == client_id,
-                    Transaction.date == date_obj,
-                    Transaction.description == description,
-                    Transaction.value == abs(value),
-                    Transaction.document_type == 'extrato_bancario'
-                ).first()
-                
-                if not existing:
-                    transaction = Transaction(
-                        client_id=client_id,
-                        date=date_obj,
-                        description=description,
-                        value=abs(value),
-                        type='entrada' if value > 0 else 'saida',
-                        account=account,
-                        bank_name=bank_name,  # Salva nome do banco na transação
-                        document_type='extrato_bancario',
-                        imported_from=filename,
-                        group_id=row_group_id,
-                        subgroup_id=row_subgroup_id
-                    )
-                    
-                    db.add(transaction)
-                    transactions_count += 1
+                # 2. Transação correspondente (para DRE/DFC)
+                transaction_rows.append(dict(
+                    client_id=client_id,
+                    batch_id=batch_id,
+                    date=date_obj,
+                    description=description,
+                    value=abs(value),
+                    type='entrada' if value > 0 else 'saida',
+                    account=account,
+                    bank_name=bank_name,  # Salva nome do banco na transação
+                    document_type='extrato_bancario',
+                    imported_from=filename,
+                    fingerprint=_fingerprint(_statement_key(date_obj, description, value, account)),
+                    group_id=row_group_id,
+                    subgroup_id=row_subgroup_id
+                ))
             
             except Exception as e:
                 print(f"Erro ao importar linha: {e}")
                 continue
         
+        # Deduplicação em memória: fingerprints já gravados no período do arquivo
+        # (uma consulta, em vez de uma por linha) e linhas repetidas no próprio arquivo
+        if transaction_rows:
+            seen = _existing_statement_fingerprints(
+                db, client_id,
+                min(r['date'] for r in transaction_rows),
+                max(r['date'] for r in transaction_rows)
+            )
+            unique_rows = []
+            for r in transaction_rows:
+                if r['fingerprint'] not in seen:
+                    seen.add(r['fingerprint'])
+                    unique_rows.append(r)
+            transaction_rows = unique_rows
+        
+        _bulk_insert(db, client_id, BankStatement, statement_rows)
+        # O índice único (client_id, fingerprint) descarta o que uma importação
+        # simultânea já tiver gravado
+        transactions_count = _bulk_insert(db, client_id, Transaction, transaction_rows,
+                                          ignore_conflicts=True)
         db.commit()
         return {'statements': statements_count, 'transactions': transactions_count}
 
     @staticmethod
     def import_contracts(db: Session, client_id: int, df: pd.DataFrame,
                         group_id: Optional[int] = None,
-                        subgroup_id: Optional[int] = None) -> int:
+                        subgroup_id: Optional[int] = None,
+                        batch_id: Optional[int] = None) -> int:
         """
         Importa contratos
         Colunas esperadas: contract_start, event_date, service_value, contractor_name, etc
         """
-        # Garante que as colunas existem antes de importar
-        _ensure_columns_exist(db, 'contracts')
+        # Esquema em dia (na prática, só a primeira importação do processo consulta a versão)
+        ensure_schema()
         
         imported_count = 0
+        rows = []
         
-        for _, row in df.iterrows():
+        for row in _records(df, dates=('contract_start', 'event_date'), amounts=('service_value', 'displacement_value')):
             try:
                 # Parse das datas
-                contract_start = parse_date(str(row.get('contract_start', '')))
-                event_date = parse_date(str(row.get('event_date', '')))
+                contract_start = row.get('contract_start')
+                event_date = row.get('event_date')
                 
                 if not contract_start or not event_date:
                     continue
                 
                 # Parse dos valores
-                service_value = parse_currency(str(row.get('service_value', 0)))
+                service_value = row.get('service_value', 0.0)
                 if service_value is None:
                     continue
                 
                 displacement_value = 0
                 if 'displacement_value' in row:
-                    displacement_value = parse_currency(str(row.get('displacement_value', 0))) or 0
+                    displacement_value = row.get('displacement_value', 0.0) or 0
                 
                 # Usa group_id e subgroup_id da linha se disponíveis, senão usa os parâmetros
                 row_group_id, row_subgroup_id = _get_row_group_subgroup(row, group_id, subgroup_id)
                 
                 # Cria contrato
-                contract = Contract(
+                rows.append(dict(
                     client_id=client_id,
-                    contract_start=contract_start.date(),
-                    event_date=event_date.date(),
+                    batch_id=batch_id,
+                    contract_start=contract_start,
+                    event_date=event_date,
                     service_value=service_value,
                     displacement_value=displacement_value,
                     contractor_name=str(row.get('contractor_name', '')),
                     event_type=str(row.get('event_type', '')) if 'event_type' in row else None,
                     service_sold=str(row.get('service_sold', '')) if 'service_sold' in row else None,
-                    num_guests=int(row.get('num_guests', 0)) if 'num_guests' in row else None,
+                    guests_count=int(row.get('num_guests', 0)) if 'num_guests' in row else None,
                     status=str(row.get('status', 'pendente')) if 'status' in row else 'pendente',
                     group_id=row_group_id,
                     subgroup_id=row_subgroup_id
-                )
-                
-                db.add(contract)
+                ))
                 imported_count += 1
             
             except Exception as e:
                 print(f"Erro ao importar linha: {e}")
                 continue
         
+        _bulk_insert(db, client_id, Contract, rows)
         db.commit()
         return imported_count
 
     @staticmethod
     def import_accounts_payable(db: Session, client_id: int, df: pd.DataFrame,
                                group_id: Optional[int] = None,
-                               subgroup_id: Optional[int] = None) -> int:
+                               subgroup_id: Optional[int] = None,
+                               batch_id: Optional[int] = None) -> int:
         """
         Importa contas a pagar
         Colunas esperadas: account_name, due_date, value, cpf_cnpj (opcional)
         """
-        # Garante que as colunas existem antes de importar
-        _ensure_columns_exist(db, 'accounts_payable')
+        # Esquema em dia (na prática, só a primeira importação do processo consulta a versão)
+        ensure_schema()
         
         imported_count = 0
+        rows = []
         
-        for _, row in df.iterrows():
+        for row in _records(df, dates=('due_date',), amounts=('value', 'total_monthly_outflow')):
             try:
                 # Parse da data
-                due_date = parse_date(str(row.get('due_date', '')))
+                due_date = row.get('due_date')
                 if not due_date:
                     continue
                 
                 # Parse do valor
-                value = parse_currency(str(row.get('value', 0)))
+                value = row.get('value', 0.0)
                 if value is None:
                     continue
                 
@@ -372,171 +726,174 @@ class ImportService:
                 row_group_id, row_subgroup_id = _get_row_group_subgroup(row, group_id, subgroup_id)
                 
                 # Cria conta a pagar
-                account = AccountPayable(
+                rows.append(dict(
                     client_id=client_id,
+                    batch_id=batch_id,
                     account_name=str(row.get('account_name', '')),
                     cpf_cnpj=str(row.get('cpf_cnpj', '')) if 'cpf_cnpj' in row else None,
-                    due_date=due_date.date(),
+                    due_date=due_date,
                     value=value,
                     month_ref=due_date.strftime('%Y-%m'),
                     paid=bool(row.get('paid', False)) if 'paid' in row else False,
                     monthly_installments=int(row.get('monthly_installments', 1)) if 'monthly_installments' in row else None,
-                    total_monthly_outflow=parse_currency(str(row.get('total_monthly_outflow', ''))) if 'total_monthly_outflow' in row else None,
+                    total_monthly_outflow=row.get('total_monthly_outflow') if 'total_monthly_outflow' in row else None,
                     installment_number=int(row.get('installment_number', 1)) if 'installment_number' in row else None,
                     group_id=row_group_id,
                     subgroup_id=row_subgroup_id
-                )
-                
-                db.add(account)
+                ))
                 imported_count += 1
             
             except Exception as e:
                 print(f"Erro ao importar linha: {e}")
                 continue
         
+        _bulk_insert(db, client_id, AccountPayable, rows)
         db.commit()
         return imported_count
 
     @staticmethod
     def import_accounts_receivable(db: Session, client_id: int, df: pd.DataFrame,
                                   group_id: Optional[int] = None,
-                                  subgroup_id: Optional[int] = None) -> int:
+                                  subgroup_id: Optional[int] = None,
+                                  batch_id: Optional[int] = None) -> int:
         """
         Importa contas a receber
         Colunas esperadas: account_name, due_date, value, cpf_cnpj (opcional)
         """
-        # Garante que as colunas existem antes de importar
-        _ensure_columns_exist(db, 'accounts_receivable')
+        # Esquema em dia (na prática, só a primeira importação do processo consulta a versão)
+        ensure_schema()
         
         imported_count = 0
+        rows = []
         
-        for _, row in df.iterrows():
+        for row in _records(df, dates=('due_date', 'event_date'), amounts=('value', 'contract_value', 'total_expected_inflow')):
             try:
                 # Parse da data
-                due_date = parse_date(str(row.get('due_date', '')))
+                due_date = row.get('due_date')
                 if not due_date:
                     continue
                 
                 # Parse do valor
-                value = parse_currency(str(row.get('value', 0)))
+                value = row.get('value', 0.0)
                 if value is None:
                     continue
                 
                 # Parse de data do evento (opcional)
-                event_date = None
-                if 'event_date' in row:
-                    event_date_parsed = parse_date(str(row.get('event_date', '')))
-                    if event_date_parsed:
-                        event_date = event_date_parsed.date()
+                event_date = row.get('event_date')
                 
                 # Usa group_id e subgroup_id da linha se disponíveis, senão usa os parâmetros
                 row_group_id, row_subgroup_id = _get_row_group_subgroup(row, group_id, subgroup_id)
                 
                 # Cria conta a receber
-                account = AccountReceivable(
+                rows.append(dict(
                     client_id=client_id,
+                    batch_id=batch_id,
                     account_name=str(row.get('account_name', '')),
                     cpf_cnpj=str(row.get('cpf_cnpj', '')) if 'cpf_cnpj' in row else None,
-                    due_date=due_date.date(),
+                    due_date=due_date,
                     value=value,
                     month_ref=due_date.strftime('%Y-%m'),
                     received=bool(row.get('received', False)) if 'received' in row else False,
                     event_date=event_date,
-                    contract_value=parse_currency(str(row.get('contract_value', ''))) if 'contract_value' in row else None,
+                    contract_value=row.get('contract_value') if 'contract_value' in row else None,
                     payment_method=str(row.get('payment_method', '')) if 'payment_method' in row else None,
                     monthly_installments=int(row.get('monthly_installments', 1)) if 'monthly_installments' in row else None,
-                    total_expected_inflow=parse_currency(str(row.get('total_expected_inflow', ''))) if 'total_expected_inflow' in row else None,
+                    total_expected_inflow=row.get('total_expected_inflow') if 'total_expected_inflow' in row else None,
                     installment_number=int(row.get('installment_number', 1)) if 'installment_number' in row else None,
                     group_id=row_group_id,
                     subgroup_id=row_subgroup_id
-                )
-                
-                db.add(account)
+                ))
                 imported_count += 1
             
             except Exception as e:
                 print(f"Erro ao importar linha: {e}")
                 continue
         
+        _bulk_insert(db, client_id, AccountReceivable, rows)
         db.commit()
         return imported_count
 
     @staticmethod
     def import_financial_investments(db: Session, client_id: int, df: pd.DataFrame,
                                     group_id: Optional[int] = None,
-                                    subgroup_id: Optional[int] = None) -> int:
+                                    subgroup_id: Optional[int] = None,
+                                    batch_id: Optional[int] = None) -> int:
         """
         Importa extratos de aplicações financeiras
         Colunas esperadas: date, investment_type, institution, operation_type, applied_value, redeemed_value, yield_value
         """
-        # Garante que as colunas existem antes de importar
-        _ensure_columns_exist(db, 'financial_investments')
+        # Esquema em dia (na prática, só a primeira importação do processo consulta a versão)
+        ensure_schema()
         
         imported_count = 0
+        rows = []
         
-        for _, row in df.iterrows():
+        for row in _records(df, dates=('date',), amounts=('applied_value', 'redeemed_value', 'yield_value', 'balance')):
             try:
-                date = parse_date(str(row.get('date', '')))
+                date = row.get('date')
                 if not date:
                     continue
                 
                 # Usa group_id e subgroup_id da linha se disponíveis, senão usa os parâmetros
                 row_group_id, row_subgroup_id = _get_row_group_subgroup(row, group_id, subgroup_id)
                 
-                investment = FinancialInvestment(
+                rows.append(dict(
                     client_id=client_id,
-                    date=date.date(),
+                    batch_id=batch_id,
+                    date=date,
                     investment_type=str(row.get('investment_type', '')) if 'investment_type' in row else None,
                     institution=str(row.get('institution', '')) if 'institution' in row else None,
                     operation_type=str(row.get('operation_type', '')) if 'operation_type' in row else None,
-                    applied_value=parse_currency(str(row.get('applied_value', ''))) if 'applied_value' in row else None,
-                    redeemed_value=parse_currency(str(row.get('redeemed_value', ''))) if 'redeemed_value' in row else None,
-                    yield_value=parse_currency(str(row.get('yield_value', ''))) if 'yield_value' in row else None,
-                    balance=parse_currency(str(row.get('balance', ''))) if 'balance' in row else None,
+                    applied_value=row.get('applied_value') if 'applied_value' in row else None,
+                    redeemed_value=row.get('redeemed_value') if 'redeemed_value' in row else None,
+                    yield_value=row.get('yield_value') if 'yield_value' in row else None,
+                    balance=row.get('balance') if 'balance' in row else None,
                     description=str(row.get('description', '')) if 'description' in row else None,
                     group_id=row_group_id,
                     subgroup_id=row_subgroup_id
-                )
-                
-                db.add(investment)
+                ))
                 imported_count += 1
             
             except Exception as e:
                 print(f"Erro ao importar linha: {e}")
                 continue
         
+        _bulk_insert(db, client_id, FinancialInvestment, rows)
         db.commit()
         return imported_count
 
     @staticmethod
     def import_credit_card_invoices(db: Session, client_id: int, df: pd.DataFrame,
                                    group_id: Optional[int] = None,
-                                   subgroup_id: Optional[int] = None) -> int:
+                                   subgroup_id: Optional[int] = None,
+                                   batch_id: Optional[int] = None) -> int:
         """
         Importa faturas de cartão de crédito
         Colunas esperadas: transaction_date, description, value, category, establishment, installment_number
         """
-        # Garante que as colunas existem antes de importar
-        _ensure_columns_exist(db, 'credit_card_invoices')
+        # Esquema em dia (na prática, só a primeira importação do processo consulta a versão)
+        ensure_schema()
         
         imported_count = 0
+        rows = []
         
-        for _, row in df.iterrows():
+        for row in _records(df, dates=('transaction_date',), amounts=('value',)):
             try:
-                transaction_date = parse_date(str(row.get('transaction_date', '')))
+                transaction_date = row.get('transaction_date')
                 if not transaction_date:
                     continue
                 
-                value = parse_currency(str(row.get('value', 0)))
+                value = row.get('value', 0.0)
                 if value is None:
                     continue
                 
                 # Usa group_id e subgroup_id da linha se disponíveis, senão usa os parâmetros
                 row_group_id, row_subgroup_id = _get_row_group_subgroup(row, group_id, subgroup_id)
                 
-                invoice = CreditCardInvoice(
+                rows.append(dict(
                     client_id=client_id,
-                    transaction_date=transaction_date.date(),
+                    batch_id=batch_id,
+                    transaction_date=transaction_date,
                     description=str(row.get('description', '')),
                     value=value,
                     category=str(row.get('category', '')) if 'category' in row else None,
@@ -546,39 +903,40 @@ class ImportService:
                     card_brand=str(row.get('card_brand', '')) if 'card_brand' in row else None,
                     group_id=row_group_id,
                     subgroup_id=row_subgroup_id
-                )
-                
-                db.add(invoice)
+                ))
                 imported_count += 1
             
             except Exception as e:
                 print(f"Erro ao importar linha: {e}")
                 continue
         
+        _bulk_insert(db, client_id, CreditCardInvoice, rows)
         db.commit()
         return imported_count
 
     @staticmethod
     def import_card_machine_statements(db: Session, client_id: int, df: pd.DataFrame,
                                       group_id: Optional[int] = None,
-                                      subgroup_id: Optional[int] = None) -> int:
+                                      subgroup_id: Optional[int] = None,
+                                      batch_id: Optional[int] = None) -> int:
         """
         Importa extratos de máquina de cartão
         Colunas esperadas: date, gross_value, fee, net_value, card_brand, transaction_type
         """
-        # Garante que as colunas existem antes de importar
-        _ensure_columns_exist(db, 'card_machine_statements')
+        # Esquema em dia (na prática, só a primeira importação do processo consulta a versão)
+        ensure_schema()
         
         imported_count = 0
+        rows = []
         
-        for _, row in df.iterrows():
+        for row in _records(df, dates=('date',), amounts=('gross_value', 'net_value', 'fee')):
             try:
-                date = parse_date(str(row.get('date', '')))
+                date = row.get('date')
                 if not date:
                     continue
                 
-                gross_value = parse_currency(str(row.get('gross_value', 0)))
-                net_value = parse_currency(str(row.get('net_value', 0)))
+                gross_value = row.get('gross_value', 0.0)
+                net_value = row.get('net_value', 0.0)
                 
                 if gross_value is None and net_value is None:
                     continue
@@ -591,50 +949,52 @@ class ImportService:
                 # Usa group_id e subgroup_id da linha se disponíveis, senão usa os parâmetros
                 row_group_id, row_subgroup_id = _get_row_group_subgroup(row, group_id, subgroup_id)
                 
-                statement = CardMachineStatement(
+                rows.append(dict(
                     client_id=client_id,
-                    date=date.date(),
+                    batch_id=batch_id,
+                    date=date,
                     gross_value=gross_value,
-                    fee=parse_currency(str(row.get('fee', ''))) if 'fee' in row else None,
+                    fee=row.get('fee') if 'fee' in row else None,
                     net_value=net_value,
                     card_brand=str(row.get('card_brand', '')) if 'card_brand' in row else None,
                     transaction_type=str(row.get('transaction_type', '')) if 'transaction_type' in row else None,
                     description=str(row.get('description', '')) if 'description' in row else None,
                     group_id=row_group_id,
                     subgroup_id=row_subgroup_id
-                )
-                
-                db.add(statement)
+                ))
                 imported_count += 1
             
             except Exception as e:
                 print(f"Erro ao importar linha: {e}")
                 continue
         
+        _bulk_insert(db, client_id, CardMachineStatement, rows)
         db.commit()
         return imported_count
 
     @staticmethod
     def import_inventory(db: Session, client_id: int, df: pd.DataFrame,
                         group_id: Optional[int] = None,
-                        subgroup_id: Optional[int] = None) -> int:
+                        subgroup_id: Optional[int] = None,
+                        batch_id: Optional[int] = None) -> int:
         """
         Importa controle de estoque
         Colunas esperadas: product_name, quantity, unit_value, movement_date, movement_type
         """
-        # Garante que as colunas existem antes de importar
-        _ensure_columns_exist(db, 'inventory')
+        # Esquema em dia (na prática, só a primeira importação do processo consulta a versão)
+        ensure_schema()
         
         imported_count = 0
+        rows = []
         
-        for _, row in df.iterrows():
+        for row in _records(df, dates=('movement_date',), amounts=('unit_value',)):
             try:
-                movement_date = parse_date(str(row.get('movement_date', '')))
+                movement_date = row.get('movement_date')
                 if not movement_date:
                     continue
                 
                 quantity = float(row.get('quantity', 0))
-                unit_value = parse_currency(str(row.get('unit_value', 0)))
+                unit_value = row.get('unit_value', 0.0)
                 
                 if quantity == 0 or unit_value is None:
                     continue
@@ -647,29 +1007,157 @@ class ImportService:
                 # Usa group_id e subgroup_id da linha se disponíveis, senão usa os parâmetros
                 row_group_id, row_subgroup_id = _get_row_group_subgroup(row, group_id, subgroup_id)
                 
-                inventory = Inventory(
+                rows.append(dict(
                     client_id=client_id,
+                    batch_id=batch_id,
                     product_name=str(row.get('product_name', '')),
                     quantity=abs(quantity),
                     unit_value=unit_value,
                     total_value=total_value,
-                    movement_date=movement_date.date(),
+                    movement_date=movement_date,
                     movement_type=movement_type,
                     description=str(row.get('description', '')) if 'description' in row else None,
                     group_id=row_group_id,
                     subgroup_id=row_subgroup_id
-                )
-                
-                db.add(inventory)
+                ))
                 imported_count += 1
             
             except Exception as e:
                 print(f"Erro ao importar linha: {e}")
                 continue
         
+        _bulk_insert(db, client_id, Inventory, rows)
         db.commit()
         return imported_count
 
+    @staticmethod
+    def import_dataframe(db: Session, client_id: int, import_type: str, df: pd.DataFrame,
+                         filename: str, bank_name: Optional[str] = None,
+                         group_id: Optional[int] = None, subgroup_id: Optional[int] = None,
+                         batch_id: Optional[int] = None) -> Dict[str, int]:
+        """
+        Importa um DataFrame já mapeado com o método import_* do tipo informado
+        
+        Returns:
+            {'imported': registros gravados, 'transactions': transações criadas (extratos)}
+        """
+        if import_type == 'transactions':
+            imported = ImportService.import_transactions(
+                db, client_id, df, 'imported', filename, group_id, subgroup_id, batch_id=batch_id
+            )
+            return {'imported': imported, 'transactions': imported}
+        
+        if import_type == 'bank_statements':
+            result = ImportService.import_bank_statements(
+                db, client_id, df, bank_name or 'Banco', filename, group_id, subgroup_id, batch_id=batch_id
+            )
+            return {'imported': result['statements'], 'transactions': result['transactions']}
+        
+        importers = {
+            'contracts': ImportService.import_contracts,
+            'accounts_payable': ImportService.import_accounts_payable,
+            'accounts_receivable': ImportService.import_accounts_receivable,
+            'financial_investments': ImportService.import_financial_investments,
+            'credit_card_invoices': ImportService.import_credit_card_invoices,
+            'card_machine_statements': ImportService.import_card_machine_statements,
+            'inventory': ImportService.import_inventory,
+        }
+        if import_type not in importers:
+            raise ValueError(f"Tipo de importação inválido: {import_type}")
+        
+        imported = importers[import_type](db, client_id, df, group_id, subgroup_id, batch_id=batch_id)
+        return {'imported': imported, 'transactions': 0}
+
+    @staticmethod
+    def import_csv_stream(db: Session, client_id: int, file_source, import_type: str,
+                          mapping: Dict[str, str], filename: str,
+                          encoding: str = 'utf-8', delimiter: str = ',',
+                          chunksize: Optional[int] = None, bank_name: Optional[str] = None,
+                          group_id: Optional[int] = None, subgroup_id: Optional[int] = None,
+                          batch_id: Optional[int] = None,
+                          progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+        """
+        Importa um CSV grande em fluxo: lê blocos de chunksize linhas e, para cada
+        bloco, aplica o mapeamento, o parse vetorizado e a gravação em massa,
+        com commit por bloco. A memória usada é limitada pelo tamanho do bloco,
+        não pelo tamanho do arquivo.
+        
+        Args:
+            file_source: Conteúdo (bytes) ou arquivo aberto em modo binário
+            mapping: Coluna de origem -> coluna alvo (ver apply_mapping)
+            progress_callback: Chamado após cada bloco com (linhas lidas, registros gravados)
+        
+        Returns:
+            {'rows': linhas lidas, 'imported': registros gravados,
+             'transactions': transações criadas, 'chunks': blocos processados}
+        """
+        from services.parser_service import ParserService
+        
+        chunks = ParserService.iter_csv_chunks(file_source, encoding, delimiter, chunksize or STREAM_CHUNK_ROWS)
+        return ImportService.import_chunks(
+            db, client_id, chunks, import_type, mapping, filename, bank_name,
+            group_id, subgroup_id, batch_id, progress_callback
+        )
+
+    @staticmethod
+    def import_excel_stream(db: Session, client_id: int, file_source, import_type: str,
+                            mapping: Dict[str, str], filename: str,
+                            sheet_name: Optional[str] = None, all_sheets: bool = False,
+                            chunksize: Optional[int] = None, bank_name: Optional[str] = None,
+                            group_id: Optional[int] = None, subgroup_id: Optional[int] = None,
+                            batch_id: Optional[int] = None,
+                            progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+        """
+        Importa um Excel grande em fluxo (ver ParserService.iter_excel_chunks),
+        com o mesmo processamento por bloco de import_csv_stream
+        
+        Args:
+            sheet_name: Aba a importar (padrão: a primeira)
+            all_sheets: Importa todas as abas com o mesmo mapeamento
+        
+        Returns:
+            Mesmos totais de import_csv_stream
+        """
+        from services.parser_service import ParserService
+        
+        chunks = ParserService.iter_excel_chunks(file_source, sheet_name, all_sheets, chunksize or STREAM_CHUNK_ROWS)
+        return ImportService.import_chunks(
+            db, client_id, chunks, import_type, mapping, filename, bank_name,
+            group_id, subgroup_id, batch_id, progress_callback
+        )
+
+    @staticmethod
+    def import_chunks(db: Session, client_id: int, chunks: Iterable[pd.DataFrame], import_type: str,
+                      mapping: Dict[str, str], filename: str, bank_name: Optional[str] = None,
+                      group_id: Optional[int] = None, subgroup_id: Optional[int] = None,
+                      batch_id: Optional[int] = None,
+                      progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+        """
+        Aplica o mapeamento e importa cada bloco lido (commit por bloco)
+        
+        Returns:
+            {'rows': linhas lidas, 'imported': registros gravados,
+             'transactions': transações criadas, 'chunks': blocos processados}
+        """
+        totals = {'rows': 0, 'imported': 0, 'transactions': 0, 'chunks': 0}
+        
+        for chunk in chunks:
+            mapped = ImportService.apply_mapping(chunk, mapping)
+            result = ImportService.import_dataframe(
+                db, client_id, import_type, mapped, filename, bank_name,
+                group_id, subgroup_id, batch_id
+            )
+            
+            totals['rows'] += len(chunk)
+            totals['imported'] += result['imported']
+            totals['transactions'] += result['transactions']
+            totals['chunks'] += 1
+            
+            if progress_callback:
+                progress_callback(totals['rows'], totals['imported'])
+        
+        return totals
+
     @staticmethod
     def get_target_columns(import_type: str) -> List[str]:
         """
@@ -0,0 +1,311 @@
+"""
+Serviço de manutenção do livro-razão mensal (monthly_ledger)
+
+O livro-razão guarda, por (cliente, mês, fonte, tipo, grupo, subgrupo, categoria),
+a soma e a quantidade dos lançamentos realizados. Ele é atualizado de forma
+incremental: a cada flush da sessão, os meses afetados pelos objetos
+inseridos/alterados/removidos são recalculados a partir das tabelas de origem.
+Assim, importações (ImportService) e as páginas de cadastro mantêm o resumo
+em dia sem chamadas explícitas.
+"""
+import calendar
+from datetime import date, timedelta
+from itertools import chain
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import event, func, inspect, literal, or_, and_, select, union_all, insert, delete
+from sqlalchemy.orm import Session
+
+from models.transaction import Transaction
+from models.contract import Contract
+from models.account import AccountPayable, AccountReceivable
+from models.ledger import MonthlyLedger
+
+
+LEDGER_COLUMNS = [
+    'client_id', 'year_month', 'source', 'type', 'group_id',
+    'subgroup_id', 'category', 'total', 'count'
+]
+
+# Atributo de data que define o mês de cada modelo no livro-razão
+TRACKED_MODELS = {
+    Transaction: 'date',
+    Contract: 'event_date',
+    AccountPayable: 'payment_date',
+    AccountReceivable: 'receipt_date',
+}
+
+
+def month_bounds(year_month: str) -> Tuple[date, date]:
+    """
+    Retorna o primeiro e o último dia de um mês no formato YYYY-MM
+    """
+    year, month = int(year_month[:4]), int(year_month[5:7])
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def split_period(start_date: date, end_date: date) -> Tuple[List[str], List[Tuple[date, date]]]:
+    """
+    Divide um período em meses completos (lidos do livro-razão) e
+    trechos parciais nas bordas (lidos das tabelas de origem)
+    """
+    full_months = []
+    partial_ranges = []
+
+    current = date(start_date.year, start_date.month, 1)
+    while current <= end_date:
+        year_month = current.strftime('%Y-%m')
+        first_day, last_day = month_bounds(year_month)
+        range_start = max(first_day, start_date)
+        range_end = min(last_day, end_date)
+
+        if range_start == first_day and range_end == last_day:
+            full_months.append(year_month)
+        else:
+            partial_ranges.append((range_start, range_end))
+
+        current = last_day + timedelta(days=1)
+
+    return full_months, partial_ranges
+
+
+def date_filter(column, ranges: Optional[Iterable[Tuple[date, date]]]):
+    """
+    Filtro (OR) de intervalos de datas; None significa sem restrição de data
+    """
+    if ranges is None:
+        return column.isnot(None)
+    return or_(*[and_(column >= start, column <= end) for start, end in ranges])
+
+
+class LedgerSource(NamedTuple):
+    """
+    Definição de uma fonte de lançamentos realizados do livro-razão
+    """
+    name: str
+    model: type
+    date_column: Any
+    value: Any
+    type: Any
+    category: Any
+    filters: Tuple
+    # Colunas próprias da fonte que entram no GROUP BY além de grupo/subgrupo
+    keys: Tuple
+
+
+# Transações (inclui extratos bancários convertidos automaticamente), contratos
+# concluídos (receita no mês do evento), contas a pagar pagas (despesa no mês
+# do pagamento) e contas a receber recebidas (receita no mês do recebimento)
+LEDGER_SOURCES = [
+    LedgerSource('transactions', Transaction, Transaction.date, Transaction.value,
+                 Transaction.type, Transaction.category, (),
+                 (Transaction.type, Transaction.category)),
+    LedgerSource('contracts', Contract, Contract.event_date,
+                 Contract.service_value + Contract.displacement_value,
+                 literal('entrada'), literal(None), (Contract.status == 'concluido',), ()),
+    LedgerSource('accounts_payable', AccountPayable, AccountPayable.payment_date, AccountPayable.value,
+                 literal('saida'), literal(None), (AccountPayable.paid == True,), ()),
+    LedgerSource('accounts_receivable', AccountReceivable, AccountReceivable.receipt_date, AccountReceivable.value,
+                 literal('entrada'), literal(None), (AccountReceivable.received == True,), ()),
+]
+
+
+def source_selects(client_id: Optional[int] = None,
+                   ranges: Optional[List[Tuple[date, date]]] = None,
+                   period_format: str = '%Y-%m'):
+    """
+    Monta as consultas das quatro fontes agregadas por mês no layout do livro-razão
+    (para uso com UNION ALL)
+
+    Args:
+        client_id: Restringe a um cliente (None = todos)
+        ranges: Intervalos de datas a considerar (None = todo o histórico)
+        period_format: Formato strftime do período agregado (padrão: mês);
+            '%Y-%m-%d' agrega por dia, para relatórios diários/semanais
+    """
+    selects = []
+    for source in LEDGER_SOURCES:
+        model = source.model
+        month = func.strftime(period_format, source.date_column)
+        client_filter = [model.client_id == client_id] if client_id is not None else []
+        selects.append(
+            select(
+                model.client_id.label('client_id'),
+                month.label('year_month'),
+                literal(source.name).label('source'),
+                source.type.label('type'),
+                model.group_id.label('group_id'),
+                model.subgroup_id.label('subgroup_id'),
+                source.category.label('category'),
+                func.sum(source.value).label('total'),
+                func.count(model.id).label('count')
+            ).where(
+                *client_filter,
+                *source.filters,
+                date_filter(source.date_column, ranges)
+            ).group_by(model.client_id, month, model.group_id, model.subgroup_id, *source.keys)
+        )
+    return selects
+
+
+class LedgerService:
+    """
+    Serviço para manter e reconstruir o livro-razão mensal
+    """
+
+    @staticmethod
+    def refresh_months(connection, client_id: int, months: Iterable[str]) -> None:
+        """
+        Recalcula as linhas do livro-razão de um cliente para os meses informados
+
+        Args:
+            connection: Sessão ou conexão SQLAlchemy (dentro da transação corrente)
+            client_id: ID do cliente
+            months: Meses no formato YYYY-MM
+        """
+        months = sorted(set(months))
+        if not months:
+            return
+
+        connection.execute(
+            delete(MonthlyLedger).where(
+                MonthlyLedger.client_id == client_id,
+                MonthlyLedger.year_month.in_(months)
+            )
+        )
+        connection.execute(
+            insert(MonthlyLedger).from_select(
+                LEDGER_COLUMNS,
+                union_all(*source_selects(client_id, [month_bounds(m) for m in months]))
+            )
+        )
+
+    @staticmethod
+    def rebuild(db: Session, client_id: Optional[int] = None) -> int:
+        """
+        Reconstrói o livro-razão do zero (reparo) para um cliente ou para todos
+
+        Returns:
+            Quantidade de linhas geradas
+        """
+        query = delete(MonthlyLedger)
+        if client_id is not None:
+            query = query.where(MonthlyLedger.client_id == client_id)
+        db.execute(query)
+        db.execute(insert(MonthlyLedger).from_select(LEDGER_COLUMNS, union_all(*source_selects(client_id))))
+
+        # Resultados de relatórios em cache deixam de valer
+        from services.report_cache import bump_client_versions
+        from models.client import Client
+        client_ids = [client_id] if client_id is not None else db.execute(select(Client.id)).scalars().all()
+        bump_client_versions(db, client_ids)
+        db.commit()
+
+        count_query = select(func.count(MonthlyLedger.id))
+        if client_id is not None:
+            count_query = count_query.where(MonthlyLedger.client_id == client_id)
+        return db.execute(count_query).scalar() or 0
+
+    @staticmethod
+    def ensure_built(db: Session) -> None:
+        """
+        Popula o livro-razão quando ele está vazio mas já existem lançamentos
+        (bancos criados antes da introdução do resumo mensal)
+        """
+        has_ledger = db.query(MonthlyLedger.id).first() is not None
+        if has_ledger:
+            return
+
+        has_data = any(
+            db.query(model.id).first() is not None
+            for model in TRACKED_MODELS
+        )
+        if has_data:
+            LedgerService.rebuild(db)
+
+
+def attribute_values(state, attr: str) -> List:
+    """
+    Valores atuais e anteriores de um atributo, sem disparar carregamento
+    """
+    history = state.attrs[attr].history
+    return [v for v in chain(history.added or (), history.unchanged or (), history.deleted or ()) if v is not None]
+
+
+def committed_months(session: Session) -> Dict[int, Set[str]]:
+    """
+    (cliente, mês) gravados no banco para os objetos alterados/removidos na sessão
+
+    Depois de um commit os objetos ficam expirados e o histórico dos atributos não
+    guarda o valor anterior: mudar a data (ou o cliente) ou remover o objeto não
+    indicaria o mês antigo. Os valores gravados são lidos por chave primária.
+    """
+    ids_by_model: Dict[type, List[int]] = {}
+    for obj in chain(session.dirty, session.deleted):
+        if type(obj) not in TRACKED_MODELS:
+            continue
+        identity = inspect(obj).identity
+        if identity is not None:
+            ids_by_model.setdefault(type(obj), []).append(identity[0])
+
+    touched: Dict[int, Set[str]] = {}
+    if not ids_by_model:
+        return touched
+
+    connection = session.connection()
+    for model, ids in ids_by_model.items():
+        date_column = getattr(model, TRACKED_MODELS[model])
+        rows = connection.execute(
+            select(model.client_id, date_column).where(model.id.in_(ids), date_column.isnot(None))
+        )
+        for client_id, value in rows:
+            if client_id is not None:
+                touched.setdefault(client_id, set()).add(value.strftime('%Y-%m'))
+    return touched
+
+
+def touched_months(session: Session) -> Dict[int, Set[str]]:
+    """
+    Identifica (cliente, mês) afetados pelos objetos pendentes na sessão
+    (valores carregados na sessão; os gravados no banco vêm de committed_months)
+    """
+    touched: Dict[int, Set[str]] = {}
+    for obj in chain(session.new, session.dirty, session.deleted):
+        date_attr = TRACKED_MODELS.get(type(obj))
+        if date_attr is None:
+            continue
+
+        state = inspect(obj)
+        for client_id in attribute_values(state, 'client_id'):
+            for value in attribute_values(state, date_attr):
+                touched.setdefault(client_id, set()).add(value.strftime('%Y-%m'))
+    return touched
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_committed_months(session, flush_context, instances):
+    """
+    Guarda os meses dos valores gravados antes que o flush os substitua
+    """
+    previous = session.info.setdefault('ledger_committed_months', {})
+    for client_id, months in committed_months(session).items():
+        previous.setdefault(client_id, set()).update(months)
+
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_ledger_after_flush(session, flush_context):
+    """
+    Mantém o livro-razão em dia a cada flush (importações e páginas de cadastro)
+    """
+    touched = touched_months(session)
+    # Meses anteriores (lidos em before_flush) e os recém-gravados dos objetos
+    # alterados, cujos atributos expirados não entram no histórico
+    for previous in (session.info.pop('ledger_committed_months', {}), committed_months(session)):
+        for client_id, months in previous.items():
+            touched.setdefault(client_id, set()).update(months)
+    if not touched:
+        return
+
+    connection = session.connection()
+    for client_id, months in touched.items():
+        LedgerService.refresh_months(connection, client_id, months)
@@ -0,0 +1,349 @@
+"""
+Regras de normalização aplicadas ao arquivo inteiro com operações vetorizadas
+
+A IA analisa uma amostra e devolve regras por coluna (formato de data, convenção
+decimal, sinal, limpeza de texto) e regras de composição do valor e do tipo
+(entrada/saída). As regras são aplicadas a todas as linhas com operações do
+pandas, então o custo de IA é uma chamada pequena por arquivo, qualquer que seja
+o número de linhas. Sem IA, as regras são inferidas localmente da amostra.
+
+Formato das regras:
+{
+    "columns": {
+        "<coluna do arquivo>": {
+            "kind": "date" | "number" | "text",
+            "date_format": "%d/%m/%Y",               # date
+            "decimal": "," | ".",                    # number
+            "thousands": "." | "," | "",             # number
+            "currency_symbols": ["R$"],              # number
+            "negate": false,                         # number: inverte o sinal
+            "strip": true, "collapse_spaces": true,  # text
+            "case": "upper" | "lower" | "title" | "none",
+            "remove_patterns": ["regex"]             # text
+        }
+    },
+    "value": {                                       # composição do campo value
+        "debit_column": "...", "credit_column": "...",      # value = crédito - débito
+        "indicator_column": "...", "debit_markers": ["D"]   # sinal pelo indicador D/C
+    },
+    "type": {                                        # campo type (entrada/saida)
+        "source": "sign" | "indicator" | "description",
+        "keywords": {"entrada": [...], "saida": [...]}
+    }
+}
+"""
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.validators import DATE_FORMATS, parse_date_series
+
+
+# Campos do sistema por natureza (definem a regra inferida quando a IA não está disponível)
+DATE_FIELDS = {'date', 'due_date', 'event_date', 'contract_start', 'movement_date', 'transaction_date'}
+NUMBER_FIELDS = {
+    'value', 'balance', 'service_value', 'displacement_value', 'applied_value', 'redeemed_value',
+    'yield_value', 'gross_value', 'fee', 'net_value', 'quantity', 'unit_value', 'contract_value',
+    'total_monthly_outflow', 'total_expected_inflow',
+}
+
+RULE_KINDS = ('date', 'number', 'text')
+TEXT_CASES = ('upper', 'lower', 'title', 'none')
+TYPE_SOURCES = ('sign', 'indicator', 'description')
+
+_BRAZILIAN_NUMBER = re.compile(r'^-?\(?\d{1,3}(\.\d{3})*(,\d+)?\)?-?$|^-?\d+,\d+$')
+
+
+def _text(series: pd.Series) -> pd.Series:
+    """
+    Coluna como texto sem espaços nas pontas (nulos preservados)
+    """
+    return series.astype('string').str.strip()
+
+
+def _on_distinct(series: pd.Series, transform) -> pd.Series:
+    """
+    Aplica a conversão só aos valores distintos (colunas de extrato repetem muito os
+    mesmos textos) e espalha o resultado pelas linhas
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    if len(uniques) > len(series) // 2:
+        return transform(series)
+    converted = transform(pd.Series(uniques, dtype=series.dtype))
+    return pd.Series(converted.to_numpy().take(codes), index=series.index)
+
+
+def _infer_date_format(series: pd.Series, sample_size: int = 200) -> Optional[str]:
+    """
+    Formato de DATE_FORMATS com mais acertos na amostra de valores distintos
+    """
+    sample = _text(series).dropna().drop_duplicates().head(sample_size)
+    if sample.empty:
+        return None
+    hits = {fmt: pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum() for fmt in DATE_FORMATS}
+    best = max(DATE_FORMATS, key=lambda fmt: hits[fmt])
+    return best if hits[best] else None
+
+
+def _infer_number_rule(series: pd.Series, sample_size: int = 200) -> Dict[str, Any]:
+    """
+    Convenção decimal da coluna: brasileira se a maioria da amostra tiver vírgula decimal
+    """
+    rule = {'kind': 'number', 'decimal': '.', 'thousands': ',', 'currency_symbols': ['R$', '$']}
+    if pd.api.types.is_numeric_dtype(series):
+        return rule
+    sample = _text(series).dropna().str.replace(r'[R$\s]', '', regex=True)
+    sample = sample[sample != ''].head(sample_size)
+    if len(sample) and sample.str.match(_BRAZILIAN_NUMBER).fillna(False).mean() > 0.5:
+        rule.update(decimal=',', thousands='.')
+    return rule
+
+
+def _to_dates(series: pd.Series, date_format: Optional[str]) -> pd.Series:
+    """
+    Datas no formato da regra; valores fora do formato tentam os demais (parse_date_series)
+    """
+    text = _text(series)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        parsed = series
+    else:
+        parsed = pd.to_datetime(text, format=date_format, errors='coerce') if date_format else \
+            pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+        pending = parsed.isna() & text.notna() & (text != '')
+        if pending.any():
+            parsed = parsed.copy()
+            parsed[pending] = parse_date_series(text[pending])[0]
+    return parsed.dt.strftime('%Y-%m-%d').astype(object).where(parsed.notna(), None)
+
+
+def _to_numbers(series: pd.Series, rule: Dict[str, Any]) -> pd.Series:
+    """
+    Números pela convenção da regra: símbolos removidos, milhar e decimal explícitos,
+    negativos como '-1,00', '1,00-' ou '(1,00)'
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        numbers = series.astype(float)
+    else:
+        text = _text(series)
+        for symbol in rule.get('currency_symbols') or []:
+            text = text.str.replace(symbol, '', regex=False)
+        text = text.str.replace(r'\s+', '', regex=True)
+
+        negative = (text.str.startswith('-') | text.str.endswith('-')
+                    | (text.str.startswith('(') & text.str.endswith(')'))).fillna(False)
+        text = text.str.strip('()+-')
+        if rule.get('thousands'):
+            text = text.str.replace(rule['thousands'], '', regex=False)
+        if rule.get('decimal') == ',':
+            text = text.str.replace(',', '.', regex=False)
+
+        numbers = pd.to_numeric(text, errors='coerce').astype(float)
+        numbers = numbers.where(~negative.astype(bool), -numbers)
+
+    if rule.get('negate'):
+        numbers = -numbers
+    return numbers
+
+
+def _clean_text(series: pd.Series, rule: Dict[str, Any]) -> pd.Series:
+    """
+    Limpeza de texto: padrões removidos, espaços e caixa
+    """
+    text = series.astype('string')
+    for pattern in rule.get('remove_patterns') or []:
+        text = text.str.replace(pattern, '', regex=True)
+    if rule.get('collapse_spaces', True):
+        text = text.str.replace(r'\s+', ' ', regex=True)
+    if rule.get('strip', True):
+        text = text.str.strip()
+    case = rule.get('case', 'none')
+    if case == 'upper':
+        text = text.str.upper()
+    elif case == 'lower':
+        text = text.str.lower()
+    elif case == 'title':
+        text = text.str.title()
+    return text.astype(object).where(text.notna(), None)
+
+
+class NormalizationRuleService:
+    """
+    Serviço para validar, inferir e aplicar regras de normalização
+    """
+
+    @staticmethod
+    def sanitize_rules(rules: Dict[str, Any], df: pd.DataFrame) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Mantém apenas regras aplicáveis ao arquivo (colunas existentes, tipos e formatos
+        válidos, expressões que compilam)
+
+        Returns:
+            (regras válidas, avisos sobre as regras descartadas)
+        """
+        clean = {'columns': {}, 'value': {}, 'type': {}}
+        warnings = []
+        if not isinstance(rules, dict):
+            return clean, ['Regras de normalização em formato inválido']
+
+        for column, rule in (rules.get('columns') or {}).items():
+            if column not in df.columns:
+                warnings.append(f"Coluna '{column}' não existe no arquivo")
+                continue
+            if not isinstance(rule, dict) or rule.get('kind') not in RULE_KINDS:
+                warnings.append(f"Coluna '{column}': tipo de regra inválido")
+                continue
+            rule = dict(rule)
+
+            if rule['kind'] == 'date' and rule.get('date_format'):
+                date_format = str(rule['date_format'])
+                try:
+                    datetime(2000, 12, 31).strftime(date_format)
+                    valid = '%' in date_format
+                except ValueError:
+                    valid = False
+                if not valid:
+                    warnings.append(f"Coluna '{column}': formato de data inválido ({date_format})")
+                    rule['date_format'] = None
+            if rule['kind'] == 'number':
+                if rule.get('decimal') not in (',', '.'):
+                    rule['decimal'] = '.'
+                if rule.get('thousands') not in (',', '.', '', ' ', None) or rule.get('thousands') == rule['decimal']:
+                    rule['thousands'] = ',' if rule['decimal'] == '.' else '.'
+            if rule['kind'] == 'text':
+                if rule.get('case') not in TEXT_CASES:
+                    rule['case'] = 'none'
+                patterns = []
+                for pattern in rule.get('remove_patterns') or []:
+                    try:
+                        re.compile(pattern)
+                        patterns.append(pattern)
+                    except (re.error, TypeError):
+                        warnings.append(f"Coluna '{column}': expressão inválida ignorada ({pattern})")
+                rule['remove_patterns'] = patterns
+            clean['columns'][column] = rule
+
+        value_rule = rules.get('value') or {}
+        if isinstance(value_rule, dict):
+            for key in ('debit_column', 'credit_column', 'indicator_column'):
+                column = value_rule.get(key)
+                if column and column in df.columns:
+                    clean['value'][key] = column
+                elif column:
+                    warnings.append(f"Coluna '{column}' ({key}) não existe no arquivo")
+            if 'indicator_column' in clean['value']:
+                markers = value_rule.get('debit_markers') or ['D', '-']
+                clean['value']['debit_markers'] = [str(m).strip().upper() for m in markers]
+
+        type_rule = rules.get('type') or {}
+        if isinstance(type_rule, dict) and type_rule.get('source') in TYPE_SOURCES:
+            clean['type'] = {'source': type_rule['source']}
+            keywords = type_rule.get('keywords') or {}
+            if isinstance(keywords, dict):
+                clean['type']['keywords'] = {
+                    kind: [str(k) for k in keywords.get(kind, []) if str(k).strip()]
+                    for kind in ('entrada', 'saida')
+                }
+
+        return clean, warnings
+
+    @staticmethod
+    def infer_rules(df: pd.DataFrame, mapping: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Regras inferidas localmente da amostra, pelo campo de destino de cada coluna
+        (usadas quando a IA não está disponível ou não devolve regras)
+        """
+        rules = {'columns': {}, 'value': {}, 'type': {'source': 'sign'}}
+        for column, target in mapping.items():
+            if column not in df.columns or not target or target == 'ignore':
+                continue
+            if target in DATE_FIELDS:
+                rules['columns'][column] = {'kind': 'date', 'date_format': _infer_date_format(df[column])}
+            elif target in NUMBER_FIELDS:
+                rules['columns'][column] = _infer_number_rule(df[column])
+            elif not pd.api.types.is_numeric_dtype(df[column]):
+                rules['columns'][column] = {'kind': 'text', 'strip': True, 'collapse_spaces': True}
+        return rules
+
+    @staticmethod
+    def apply_rules(df: pd.DataFrame, mapping: Dict[str, str], rules: Dict[str, Any],
+                    import_type: Optional[str] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """
+        Aplica mapeamento e regras a todas as linhas
+
+        Returns:
+            (DataFrame com os campos do sistema normalizados, resumo com valores inválidos por campo)
+        """
+        rules, warnings = NormalizationRuleService.sanitize_rules(rules, df)
+        column_rules = rules['columns']
+
+        normalized = pd.DataFrame(index=df.index)
+        invalid = {}
+        for column, target in mapping.items():
+            if not target or target == 'ignore' or column not in df.columns:
+                continue
+            source = df[column]
+            rule = column_rules.get(column)
+            if rule is None:
+                normalized[target] = source
+                continue
+
+            if rule['kind'] == 'date':
+                values = _on_distinct(source, lambda s: _to_dates(s, rule.get('date_format')))
+            elif rule['kind'] == 'number':
+                values = _on_distinct(source, lambda s: _to_numbers(s, rule))
+            else:
+                values = _on_distinct(source, lambda s: _clean_text(s, rule))
+            # Valores preenchidos que a regra não conseguiu converter
+            failed = values.isna() & _on_distinct(source, lambda s: (_text(s) != '').fillna(False))
+            normalized[target] = values
+            if failed.any():
+                invalid[target] = int(failed.sum())
+
+        # Valor composto por colunas de débito/crédito ou sinal por indicador D/C
+        value_rule = rules['value']
+        if 'debit_column' in value_rule or 'credit_column' in value_rule:
+            parts = {}
+            for key in ('debit_column', 'credit_column'):
+                column = value_rule.get(key)
+                if column:
+                    rule = column_rules.get(column) or _infer_number_rule(df[column])
+                    parts[key] = _on_distinct(
+                        df[column], lambda s: _to_numbers(s, {**rule, 'negate': False})
+                    ).abs().fillna(0.0)
+            credit = parts.get('credit_column', 0.0)
+            debit = parts.get('debit_column', 0.0)
+            normalized['value'] = credit - debit
+        if 'indicator_column' in value_rule and 'value' in normalized:
+            is_debit = _text(df[value_rule['indicator_column']]).str.upper().isin(value_rule['debit_markers'])
+            value = normalized['value'].astype(float).abs()
+            normalized['value'] = value.where(~is_debit.fillna(False).astype(bool), -value)
+
+        # Tipo (entrada/saída), quando o tipo de importação tem esse campo
+        type_rule = rules['type']
+        wants_type = import_type is None or import_type == 'transactions'
+        if type_rule and wants_type and 'value' in normalized and 'type' not in normalized:
+            value = pd.to_numeric(normalized['value'], errors='coerce')
+            derived = pd.Series(np.where(value < 0, 'saida', 'entrada'), index=df.index, dtype=object)
+            if type_rule['source'] == 'indicator' and 'indicator_column' in value_rule:
+                is_debit = _text(df[value_rule['indicator_column']]).str.upper().isin(value_rule['debit_markers'])
+                derived = pd.Series(np.where(is_debit.fillna(False), 'saida', 'entrada'), index=df.index, dtype=object)
+            elif type_rule['source'] == 'description' and 'description' in normalized:
+                description = normalized['description'].astype('string')
+                for kind in ('entrada', 'saida'):
+                    keywords = type_rule.get('keywords', {}).get(kind)
+                    if keywords:
+                        pattern = '|'.join(re.escape(k) for k in keywords)
+                        matched = description.str.contains(pattern, case=False, regex=True).fillna(False)
+                        derived = derived.where(~matched.astype(bool), kind)
+            normalized['type'] = derived.where(value.notna(), None)
+
+        return normalized, {
+            'total_rows': len(df),
+            'successfully_normalized': int(len(df) - (max(invalid.values()) if invalid else 0)),
+            'invalid_values': invalid,
+            'rules_applied': len(column_rules) + len(value_rule) + (1 if type_rule else 0),
+            'rule_warnings': warnings,
+        }
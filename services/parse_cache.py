@@ -0,0 +1,257 @@
+"""
+Cache em disco dos resultados de parsing de arquivos (PDF, Excel, OFX)
+
+A página de importação é reexecutada pelo Streamlit a cada interação, e o mesmo
+arquivo era lido de novo a cada vez. A chave de cada resultado é o SHA-256 dos
+bytes do arquivo mais o parser e suas opções; DataFrames são gravados em Parquet
+e o restante (texto, metadados, listas) em JSON, uma pasta por entrada. O tamanho
+total da pasta é limitado e as entradas menos usadas são removidas primeiro (LRU
+pela data de último acesso).
+
+Configuração por variáveis de ambiente:
+    PARSE_CACHE_ENABLED  - '0' desativa o cache (padrão: '1')
+    PARSE_CACHE_DIR      - pasta do cache (padrão: data/parse_cache)
+    PARSE_CACHE_MAX_MB   - limite de tamanho em disco em MB (padrão: 256)
+"""
+import functools
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (motor Parquet do pandas)
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+
+_MISS = object()
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'parse_cache')
+
+
+def _encode(value: Any, frames: List[pd.DataFrame]) -> Any:
+    """
+    Converte o resultado em estrutura JSON; DataFrames viram referências a arquivos Parquet
+    """
+    if isinstance(value, pd.DataFrame):
+        frames.append(value)
+        return {'__dataframe__': len(frames) - 1}
+    if isinstance(value, dict):
+        return {'__dict__': [[_encode(k, frames), _encode(v, frames)] for k, v in value.items()]}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v, frames) for v in value]
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    if hasattr(value, 'item'):
+        # Escalares NumPy
+        return value.item()
+    return value
+
+
+def _decode(value: Any, frames: List[pd.DataFrame]) -> Any:
+    """
+    Inverso de _encode
+    """
+    if isinstance(value, list):
+        return [_decode(v, frames) for v in value]
+    if isinstance(value, dict):
+        if '__dataframe__' in value:
+            return frames[value['__dataframe__']]
+        if '__dict__' in value:
+            return {_decode(k, frames): _decode(v, frames) for k, v in value['__dict__']}
+        if '__datetime__' in value:
+            return datetime.fromisoformat(value['__datetime__'])
+        if '__date__' in value:
+            return date.fromisoformat(value['__date__'])
+    return value
+
+
+def _write_frame(df: pd.DataFrame, path: str) -> Dict[str, Any]:
+    """
+    Grava o DataFrame em Parquet; os nomes das colunas (que podem repetir ou ser
+    None em tabelas de PDF) ficam no JSON e as colunas são gravadas por posição
+    """
+    stored = df.copy(deep=False)
+    stored.columns = [str(i) for i in range(len(df.columns))]
+    stored.to_parquet(path, index=True)
+    return {'columns': _encode(list(df.columns), [])}
+
+
+def _read_frame(path: str, info: Dict[str, Any]) -> pd.DataFrame:
+    df = pd.read_parquet(path)
+    df.columns = _decode(info['columns'], [])
+    return df
+
+
+class ParseCache:
+    """
+    Cache LRU em disco com limite de tamanho (uma pasta por entrada)
+    """
+
+    def __init__(self, directory: str, max_bytes: int, enabled: bool = True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled and PARQUET_AVAILABLE
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(name: str, file_content: bytes, options: Any) -> str:
+        """
+        SHA-256 do conteúdo combinado com o parser e suas opções
+        """
+        content_hash = hashlib.sha256(file_content).hexdigest()
+        options_hash = hashlib.sha256(
+            json.dumps([name, _encode(options, [])], sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+        return f"{content_hash[:40]}_{options_hash[:16]}"
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str) -> Any:
+        """
+        Retorna o resultado armazenado ou _MISS
+        """
+        path = self._entry_path(key)
+        try:
+            with open(os.path.join(path, 'result.json'), encoding='utf-8') as f:
+                payload = json.load(f)
+            frames = [_read_frame(os.path.join(path, f'frame_{i}.parquet'), info)
+                      for i, info in enumerate(payload['frames'])]
+            value = _decode(payload['value'], frames)
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return _MISS
+
+        # Marca o acesso para a política LRU
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Armazena o resultado (gravação atômica da pasta) e aplica o limite de tamanho
+        """
+        frames: List[pd.DataFrame] = []
+        encoded = _encode(value, frames)
+
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = os.path.join(self.directory, f".tmp_{uuid.uuid4().hex}")
+        os.makedirs(tmp_path)
+        try:
+            infos = [_write_frame(df, os.path.join(tmp_path, f'frame_{i}.parquet'))
+                     for i, df in enumerate(frames)]
+            with open(os.path.join(tmp_path, 'result.json'), 'w', encoding='utf-8') as f:
+                json.dump({'value': encoded, 'frames': infos}, f, default=str)
+            os.replace(tmp_path, self._entry_path(key))
+        except Exception as e:
+            # Resultado não serializável (ex.: colunas com tipos mistos): não armazena
+            print(f"Cache de parsing: resultado não armazenado ({e})")
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return
+
+        self._evict()
+
+    def _entries(self) -> List[Dict[str, Any]]:
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith('.tmp_') or not os.path.isdir(path):
+                continue
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            entries.append({'path': path, 'size': size, 'accessed': os.path.getmtime(path)})
+        return entries
+
+    def _evict(self) -> None:
+        """
+        Remove as entradas de acesso mais antigo até caber no limite
+        """
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda e: e['accessed'])
+            total = sum(e['size'] for e in entries)
+            for entry in entries:
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(entry['path'], ignore_errors=True)
+                total -= entry['size']
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Remove todas as entradas e zera os contadores
+        """
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Contadores para exibição na página de Administração
+        """
+        entries = self._entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'parquet_available': PARQUET_AVAILABLE,
+                'entries': len(entries),
+                'size_bytes': sum(e['size'] for e in entries),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits / lookups * 100) if lookups else 0.0,
+            }
+
+
+parse_cache = ParseCache(
+    directory=os.getenv('PARSE_CACHE_DIR', DEFAULT_CACHE_DIR),
+    max_bytes=int(float(os.getenv('PARSE_CACHE_MAX_MB', '256')) * 1024 * 1024),
+    enabled=os.getenv('PARSE_CACHE_ENABLED', '1') != '0'
+)
+
+
+def cached_parse(func: Callable) -> Callable:
+    """
+    Decorator para parsers com assinatura (file_content, *opções)
+
+    Os resultados são devolvidos como lidos do disco: cada chamada recebe objetos
+    novos, então alterar o DataFrame retornado não afeta o cache.
+    """
+    @functools.wraps(func)
+    def wrapper(file_content: bytes, *args, **kwargs):
+        if not parse_cache.enabled:
+            return func(file_content, *args, **kwargs)
+
+        key = ParseCache.make_key(func.__qualname__, file_content, [args, kwargs])
+        cached = parse_cache.get(key)
+        if cached is not _MISS:
+            return cached
+
+        result = func(file_content, *args, **kwargs)
+        parse_cache.set(key, result)
+        return result
+
+    return wrapper
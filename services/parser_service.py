@@ -1,13 +1,177 @@
 """
 Serviço de parsing de arquivos (CSV, Excel, PDF, OFX)
 """
+import csv
+import os
 import pandas as pd
 import pdfplumber
+from concurrent.futures import ProcessPoolExecutor
 from ofxparse import OfxParser
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 from io import BytesIO, StringIO
 import re
 
+from services.parse_cache import PARQUET_AVAILABLE as PYARROW_AVAILABLE, cached_parse
+
+try:
+    import python_calamine  # noqa: F401  (leitor de Excel em Rust, opcional)
+    EXCEL_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_ENGINE = None  # padrão do pandas (openpyxl para .xlsx, xlrd para .xls)
+
+
+# Processos usados na extração paralela de páginas de PDF. Padrão 1 (serial): o
+# executável do PyInstaller não chama multiprocessing.freeze_support(), então cada
+# worker reabriria a aplicação, e o pool não mostrou ganho nos extratos medidos.
+# Valores maiores que 1 ativam o modo paralelo (opt-in).
+PDF_PARSE_WORKERS = int(os.getenv('PDF_PARSE_WORKERS', '1'))
+
+# PDFs com menos páginas que isso são extraídos em série (o pool não compensa)
+PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '8'))
+
+# Bytes do início do CSV inspecionados para descobrir encoding, delimitador e cabeçalho
+CSV_SNIFF_BYTES = int(os.getenv('CSV_SNIFF_BYTES', str(64 * 1024)))
+
+CSV_DELIMITERS = [',', ';', '\t', '|']
+
+# Marcas de ordem de bytes (BOM) e o encoding que cada uma indica
+_BOMS = [
+    (b'\xef\xbb\xbf', 'utf-8-sig'),
+    (b'\xff\xfe', 'utf-16-le'),
+    (b'\xfe\xff', 'utf-16-be'),
+]
+
+# Assinatura ZIP dos arquivos .xlsx (lidos em modo streaming pelo openpyxl)
+_XLSX_SIGNATURE = b'PK\x03\x04'
+
+
+def _extract_page(page) -> Tuple[str, List]:
+    """
+    Texto e tabelas de uma página
+    
+    extract_table() não é usado como alternativa: ele escolhe a maior das
+    tabelas que extract_tables() encontra com as mesmas configurações, então
+    nunca acha uma tabela quando extract_tables() não achou nenhuma.
+    """
+    return page.extract_text() or '', page.extract_tables() or []
+
+
+def _extract_page_range(args: Tuple[bytes, int, int]) -> List[Tuple[str, List]]:
+    """
+    Extrai as páginas [start, end) com um handle pdfplumber próprio (executado nos
+    processos do pool)
+    """
+    file_content, start, end = args
+    with pdfplumber.open(BytesIO(file_content)) as pdf:
+        return [_extract_page(pdf.pages[i]) for i in range(start, end)]
+
+
+def _page_ranges(num_pages: int, parts: int) -> List[Tuple[int, int]]:
+    """
+    Divide as páginas em até parts faixas contíguas de tamanho parecido
+    """
+    parts = max(1, min(parts, num_pages))
+    size, extra = divmod(num_pages, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _sniff_encoding(sample: bytes, preferred: Optional[str] = None) -> Tuple[str, int]:
+    """
+    Escolhe o encoding pela amostra: BOM, depois o encoding pedido, UTF-8 válido,
+    cp1252 e por fim latin-1 (que aceita qualquer byte)
+    
+    Returns:
+        (encoding, tamanho do BOM em bytes)
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding, len(bom)
+    
+    # A amostra pode cortar um caractere multibyte no fim
+    body = sample[:-4] if len(sample) > 4 else sample
+    candidates = [preferred] if preferred else []
+    for encoding in candidates + ['utf-8', 'cp1252']:
+        try:
+            body.decode(encoding)
+            return encoding, 0
+        except (UnicodeDecodeError, LookupError):
+            continue
+    return 'latin-1', 0
+
+
+def _sniff_delimiter(lines: List[str]) -> Tuple[str, int]:
+    """
+    Delimitador que divide o maior número de linhas na mesma quantidade de campos
+    (respeitando aspas); em empate, o que gera mais colunas
+    
+    Returns:
+        (delimitador, número de colunas da tabela)
+    """
+    best = (',', 1)
+    best_score = (0, 0)
+    for delimiter in CSV_DELIMITERS:
+        widths = [len(row) for row in csv.reader(lines, delimiter=delimiter)]
+        if not widths:
+            continue
+        width = max(set(widths), key=lambda w: (widths.count(w), w))
+        if width < 2:
+            continue
+        score = (widths.count(width), width)
+        if score > best_score:
+            best, best_score = (delimiter, width), score
+    return best
+
+
+def _header_names(row: Tuple) -> List[str]:
+    """
+    Nomes de colunas a partir da linha de cabeçalho, como o pandas faria:
+    células vazias viram 'Unnamed: i' e repetidos ganham sufixo '.1', '.2'...
+    """
+    names = []
+    seen: Dict[str, int] = {}
+    for i, value in enumerate(row):
+        name = f"Unnamed: {i}" if value is None or str(value).strip() == '' else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _iter_sheet_chunks(rows: Iterator[Tuple], chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Agrupa as linhas de uma aba (a primeira não vazia é o cabeçalho) em
+    DataFrames de até chunksize linhas; linhas totalmente vazias são ignoradas
+    """
+    header = None
+    batch = []
+    for row in rows:
+        if all(value is None or value == '' for value in row):
+            continue
+        if header is None:
+            # O modo streaming pode reportar colunas vazias à direita da tabela
+            width = len(row)
+            while width > 0 and row[width - 1] in (None, ''):
+                width -= 1
+            header = _header_names(row[:width])
+            continue
+        # Linhas podem vir mais curtas ou mais longas que o cabeçalho
+        row = tuple(row[:len(header)])
+        batch.append(row + (None,) * (len(header) - len(row)))
+        if len(batch) >= chunksize:
+            yield pd.DataFrame(batch, columns=header)
+            batch = []
+    if batch:
+        yield pd.DataFrame(batch, columns=header)
+
 
 class ParserService:
     """
@@ -15,29 +179,124 @@ class ParserService:
     """
 
     @staticmethod
-    def parse_csv(file_content: bytes, encoding: str = 'utf-8', delimiter: str = ',') -> pd.DataFrame:
+    def sniff_csv(file_content: bytes, encoding: Optional[str] = None,
+                  sample_size: int = CSV_SNIFF_BYTES) -> Dict[str, Any]:
+        """
+        Inspeciona uma única amostra do início do arquivo e resolve as opções de leitura
+        
+        Args:
+            encoding: Encoding preferido (usado se decodificar a amostra)
+        
+        Returns:
+            {'encoding', 'delimiter', 'header_row', 'columns', 'offset'}
+            header_row é a linha do cabeçalho (linhas anteriores, como títulos de
+            extratos, são ignoradas) e offset é a posição em bytes onde ele começa
+        """
+        sample = file_content[:sample_size]
+        encoding, bom_size = _sniff_encoding(sample, encoding)
+        text = sample[bom_size:].decode(encoding, errors='replace')
+        
+        lines = text.splitlines(keepends=True)
+        if len(sample) < len(file_content) and len(lines) > 1:
+            # Última linha da amostra pode estar incompleta
+            lines = lines[:-1]
+        
+        delimiter, width = _sniff_delimiter([line for line in lines if line.strip()])
+        
+        # Cabeçalho: primeira linha com o número de colunas da tabela
+        header_row = 0
+        for i, line in enumerate(lines):
+            if line.strip() and len(next(csv.reader([line], delimiter=delimiter))) == width:
+                header_row = i
+                break
+        
+        # Mede as linhas ignoradas em bytes (sem repetir o BOM, já contado)
+        prefix = ''.join(lines[:header_row]).encode('utf-8' if encoding == 'utf-8-sig' else encoding, errors='replace')
+        return {
+            'encoding': encoding,
+            'delimiter': delimiter,
+            'header_row': header_row,
+            'columns': width,
+            'offset': bom_size + len(prefix),
+        }
+
+    @staticmethod
+    def parse_csv(file_content: bytes, encoding: Optional[str] = None,
+                  delimiter: Optional[str] = None) -> pd.DataFrame:
         """
         Faz parse de arquivo CSV
+        
+        As opções são resolvidas uma vez por sniff_csv e o arquivo é lido com uma
+        única chamada a read_csv (motor pyarrow quando instalado). encoding e
+        delimiter, quando informados, prevalecem sobre os detectados. Todas as
+        colunas são lidas como texto: datas com ponto (01.02.2024) e números de
+        documento (12.345) não podem virar inteiros; valores e datas são
+        convertidos depois por parse_currency_series/parse_date_series.
         """
         try:
-            # Tenta diferentes encodings
-            encodings = [encoding, 'utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
+            options = ParserService.sniff_csv(file_content, encoding)
+            if delimiter:
+                options['delimiter'] = delimiter
+            
+            read_kwargs = {
+                'sep': options['delimiter'],
+                'dtype': str,
+            }
+            content = file_content[options['offset']:]
             
-            for enc in encodings:
+            if PYARROW_AVAILABLE:
                 try:
-                    df = pd.read_csv(BytesIO(file_content), encoding=enc, delimiter=delimiter)
-                    return df
+                    return pd.read_csv(BytesIO(content), engine='pyarrow', encoding=options['encoding'], **read_kwargs)
+                except Exception:
+                    # Linhas irregulares ou bytes inválidos fora da amostra: motor padrão
+                    pass
+            
+            # Amostra em UTF-8 válido não garante o resto do arquivo: cp1252 como última opção
+            encodings = [options['encoding']]
+            if options['encoding'] == 'utf-8':
+                encodings.append('cp1252')
+            for enc in encodings[:-1]:
+                try:
+                    return pd.read_csv(BytesIO(content), encoding=enc, **read_kwargs)
                 except UnicodeDecodeError:
                     continue
-            
-            # Se nenhum encoding funcionou, tenta com errors='ignore'
-            df = pd.read_csv(BytesIO(file_content), encoding='utf-8', delimiter=delimiter, errors='ignore')
-            return df
+            return pd.read_csv(BytesIO(content), encoding=encodings[-1], encoding_errors='replace', **read_kwargs)
+        
+        except Exception as e:
+            raise Exception(f"Erro ao fazer parse do CSV: {str(e)}")
+
+    @staticmethod
+    def iter_csv_chunks(file_source, encoding: str = 'utf-8', delimiter: str = ',',
+                        chunksize: int = 50000) -> Iterator[pd.DataFrame]:
+        """
+        Lê um CSV em blocos de chunksize linhas (todas as colunas como texto)
+        
+        O encoding e a linha do cabeçalho são resolvidos por sniff_csv em uma
+        amostra do início do arquivo, já que não é possível trocar de encoding no
+        meio da leitura em fluxo.
+        
+        Args:
+            file_source: Conteúdo (bytes) ou arquivo aberto em modo binário
+        """
+        stream = BytesIO(file_source) if isinstance(file_source, (bytes, bytearray)) else file_source
+        start = stream.tell()
+        # Um byte a mais indica a sniff_csv que a amostra não é o arquivo inteiro
+        options = ParserService.sniff_csv(stream.read(CSV_SNIFF_BYTES + 1), encoding)
         
+        # Começa no cabeçalho (depois do BOM e de eventuais linhas de título)
+        stream.seek(start + options['offset'])
+        
+        try:
+            reader = pd.read_csv(stream, encoding=options['encoding'], delimiter=delimiter, dtype=str,
+                                 chunksize=chunksize, encoding_errors='replace')
+            with reader:
+                for chunk in reader:
+                    yield chunk
         except Exception as e:
             raise Exception(f"Erro ao fazer parse do CSV: {str(e)}")
 
     @staticmethod
+    @cached_parse
     def parse_excel(file_content: bytes, sheet_name: Optional[str] = None, all_sheets: bool = False) -> pd.DataFrame:
         """
         Faz parse de arquivo Excel
@@ -45,12 +304,11 @@ class ParserService:
         """
         try:
             if all_sheets:
-                # Lê todas as abas e combina
-                excel_file = pd.ExcelFile(BytesIO(file_content))
+                # Lê todas as abas abrindo a pasta de trabalho uma única vez
+                sheets = pd.read_excel(BytesIO(file_content), sheet_name=None, engine=EXCEL_ENGINE)
                 all_dfs = []
                 
-                for sheet in excel_file.sheet_names:
-                    df_sheet = pd.read_excel(excel_file, sheet_name=sheet)
+                for sheet, df_sheet in sheets.items():
                     if not df_sheet.empty:
                         # Adiciona coluna indicando a aba de origem
                         df_sheet['_sheet_name'] = sheet
@@ -63,10 +321,10 @@ class ParserService:
                 else:
                     return pd.DataFrame()
             elif sheet_name:
-                df = pd.read_excel(BytesIO(file_content), sheet_name=sheet_name)
+                df = pd.read_excel(BytesIO(file_content), sheet_name=sheet_name, engine=EXCEL_ENGINE)
             else:
                 # Lê apenas a primeira aba (comportamento padrão)
-                df = pd.read_excel(BytesIO(file_content))
+                df = pd.read_excel(BytesIO(file_content), engine=EXCEL_ENGINE)
             
             return df
         
@@ -74,16 +332,78 @@ class ParserService:
             raise Exception(f"Erro ao fazer parse do Excel: {str(e)}")
 
     @staticmethod
+    @cached_parse
     def get_excel_sheets(file_content: bytes) -> List[str]:
         """
         Retorna lista de planilhas em um arquivo Excel
         """
         try:
+            if file_content.startswith(_XLSX_SIGNATURE):
+                # Em modo somente leitura os nomes vêm do índice, sem carregar as células
+                from openpyxl import load_workbook
+                workbook = load_workbook(BytesIO(file_content), read_only=True)
+                try:
+                    return workbook.sheetnames
+                finally:
+                    workbook.close()
             excel_file = pd.ExcelFile(BytesIO(file_content))
             return excel_file.sheet_names
         except Exception as e:
             raise Exception(f"Erro ao ler planilhas do Excel: {str(e)}")
 
+    @staticmethod
+    def iter_excel_chunks(file_source, sheet_name: Optional[str] = None, all_sheets: bool = False,
+                          chunksize: int = 50000) -> Iterator[pd.DataFrame]:
+        """
+        Lê um Excel em blocos de chunksize linhas, aba por aba
+        
+        Arquivos .xlsx são abertos uma vez com o openpyxl em modo somente leitura
+        (streaming): as linhas são lidas do XML sob demanda, sem montar a planilha
+        inteira na memória. Arquivos .xls (formato binário antigo) não têm leitura
+        em fluxo e são lidos por inteiro e entregues em blocos.
+        
+        Args:
+            file_source: Conteúdo (bytes) ou arquivo aberto em modo binário
+            sheet_name: Aba a ler (padrão: a primeira)
+            all_sheets: Lê todas as abas, com a coluna _sheet_name como em parse_excel
+        """
+        stream = BytesIO(file_source) if isinstance(file_source, (bytes, bytearray)) else file_source
+        start = stream.tell()
+        is_xlsx = stream.read(len(_XLSX_SIGNATURE)) == _XLSX_SIGNATURE
+        stream.seek(start)
+        
+        try:
+            if not is_xlsx:
+                sheets = pd.read_excel(stream, sheet_name=None if all_sheets else (sheet_name or 0))
+                if not all_sheets:
+                    sheets = {sheet_name: sheets}
+                for sheet, df_sheet in sheets.items():
+                    if all_sheets:
+                        df_sheet['_sheet_name'] = sheet
+                    for begin in range(0, len(df_sheet), chunksize):
+                        yield df_sheet.iloc[begin:begin + chunksize].reset_index(drop=True)
+                return
+            
+            from openpyxl import load_workbook
+            workbook = load_workbook(stream, read_only=True, data_only=True)
+            try:
+                if all_sheets:
+                    names = workbook.sheetnames
+                else:
+                    names = [sheet_name or workbook.sheetnames[0]]
+                
+                for name in names:
+                    rows = workbook[name].iter_rows(values_only=True)
+                    for chunk in _iter_sheet_chunks(rows, chunksize):
+                        if all_sheets:
+                            chunk['_sheet_name'] = name
+                        yield chunk
+            finally:
+                workbook.close()
+        
+        except Exception as e:
+            raise Exception(f"Erro ao fazer parse do Excel: {str(e)}")
+
     @staticmethod
     def parse_pdf(file_content: bytes) -> Dict[str, Any]:
         """
@@ -115,10 +435,18 @@ class ParserService:
             raise Exception(f"Erro ao fazer parse do PDF: {str(e)}")
     
     @staticmethod
-    def parse_pdf_complete(file_content: bytes) -> Dict[str, Any]:
+    @cached_parse
+    def parse_pdf_complete(file_content: bytes, parallel: Optional[bool] = None,
+                           max_workers: Optional[int] = None) -> Dict[str, Any]:
         """
         Extrai informações completas de um PDF incluindo texto, tabelas, metadados e contexto
         
+        Com parallel=True as páginas são divididas em faixas distribuídas em um pool
+        de processos (cada um abre o próprio handle do pdfplumber) e os resultados
+        são juntados na ordem das páginas. Por padrão (None), o modo paralelo só é
+        usado quando PDF_PARSE_WORKERS (ou max_workers) é maior que 1, a partir de
+        PDF_PARALLEL_MIN_PAGES páginas.
+        
         Retorna estrutura rica com:
         - dataframe: DataFrame com tabelas extraídas
         - full_text: Todo o texto do PDF
@@ -142,22 +470,34 @@ class ParserService:
                     'num_pages': len(pdf.pages)
                 }
                 
+                num_pages = len(pdf.pages)
+                workers = max_workers or PDF_PARSE_WORKERS
+                if parallel is None:
+                    parallel = workers > 1 and num_pages >= PDF_PARALLEL_MIN_PAGES
+                
+                extracted = None
+                if parallel and workers > 1 and num_pages > 1:
+                    try:
+                        ranges = _page_ranges(num_pages, workers)
+                        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+                            extracted = [
+                                page for part in pool.map(
+                                    _extract_page_range, [(file_content, start, end) for start, end in ranges]
+                                )
+                                for page in part
+                            ]
+                    except Exception as e:
+                        # Ambientes sem suporte a processos: segue em série
+                        print(f"Extração paralela do PDF indisponível, usando modo serial: {e}")
+                        extracted = None
+                
+                if extracted is None:
+                    extracted = [_extract_page(page) for page in pdf.pages]
+                
                 # Processa cada página
-                for page_num, page in enumerate(pdf.pages, 1):
-                    page_text = page.extract_text() or ''
+                for page_num, (page_text, page_tables) in enumerate(extracted, 1):
                     full_text_parts.append(page_text)
                     
-                    # Extrai tabelas da página
-                    page_tables = page.extract_tables()
-                    if not page_tables:
-                        # Tenta extrair tabela única
-                        try:
-                            single_table = page.extract_table()
-                            if single_table:
-                                page_tables = [single_table]
-                        except:
-                            pass
-                    
                     # Extrai texto ao redor das tabelas para contexto
                     table_contexts = []
                     if page_tables:
@@ -168,7 +508,7 @@ class ParserService:
                     
                     # Detecta cabeçalho e rodapé (primeira e última página)
                     has_header = page_num == 1
-                    has_footer = page_num == len(pdf.pages)
+                    has_footer = page_num == num_pages
                     
                     if has_header and page_text:
                         # Primeiras linhas como possível cabeçalho
@@ -370,6 +710,7 @@ class ParserService:
                 raise Exception(f"Erro ao extrair tabela do PDF: {str(e)}")
 
     @staticmethod
+    @cached_parse
     def parse_ofx(file_content: bytes) -> Dict[str, Any]:
         """
         Faz parse de arquivo OFX (extratos bancários)
@@ -561,24 +902,13 @@ class ParserService:
         }
 
     @staticmethod
-    def detect_delimiter(file_content: bytes, sample_size: int = 1024) -> str:
+    def detect_delimiter(file_content: bytes, sample_size: int = CSV_SNIFF_BYTES) -> str:
         """
-        Detecta o delimitador de um arquivo CSV
+        Detecta o delimitador de um arquivo CSV (ver sniff_csv)
         """
         try:
-            sample = file_content[:sample_size].decode('utf-8', errors='ignore')
-            
-            delimiters = [',', ';', '\t', '|']
-            delimiter_counts = {}
-            
-            for delimiter in delimiters:
-                count = sample.count(delimiter)
-                delimiter_counts[delimiter] = count
-            
-            # Retorna o delimitador mais comum
-            return max(delimiter_counts, key=delimiter_counts.get)
-        
-        except:
+            return ParserService.sniff_csv(file_content, sample_size=sample_size)['delimiter']
+        except Exception:
             return ','
 
     @staticmethod
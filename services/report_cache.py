@@ -0,0 +1,219 @@
+"""
+Cache de resultados de relatórios com invalidação por versão dos dados do cliente
+
+A chave de cada resultado é (função, client_id, argumentos/filtros, versão dos dados
+do cliente). Toda gravação que afeta um cliente (importações e páginas de cadastro,
+via flush da sessão) incrementa a versão, de modo que resultados antigos deixam de
+ser encontrados e saem do cache pela política LRU.
+
+Configuração por variáveis de ambiente:
+    REPORT_CACHE_ENABLED      - '0' desativa o cache (padrão: '1')
+    REPORT_CACHE_MAX_MB       - limite de memória em MB (padrão: 64)
+    REPORT_CACHE_MAX_ENTRIES  - limite de entradas (padrão: 512)
+"""
+import functools
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Set
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models.data_version import ClientDataVersion
+from models.group import Group, Subgroup
+from services.ledger_service import attribute_values
+
+
+_MISS = object()
+
+
+class ReportCache:
+    """
+    Cache LRU em memória com limite de tamanho (resultados armazenados serializados)
+    """
+
+    def __init__(self, max_bytes: int, max_entries: int, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: 'OrderedDict[Any, bytes]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key) -> Any:
+        """
+        Retorna uma cópia do valor armazenado ou _MISS
+        """
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return _MISS
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return pickle.loads(payload)
+
+    def set(self, key, value: Any) -> None:
+        """
+        Armazena o valor, removendo os menos usados se os limites forem excedidos
+        """
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+
+            self._entries[key] = payload
+            self._size += len(payload)
+
+            while self._entries and (self._size > self.max_bytes or len(self._entries) > self.max_entries):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Remove todas as entradas e zera os contadores
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Contadores para exibição na página de Administração
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'size_bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits / lookups * 100) if lookups else 0.0,
+            }
+
+
+report_cache = ReportCache(
+    max_bytes=int(float(os.getenv('REPORT_CACHE_MAX_MB', '64')) * 1024 * 1024),
+    max_entries=int(os.getenv('REPORT_CACHE_MAX_ENTRIES', '512')),
+    enabled=os.getenv('REPORT_CACHE_ENABLED', '1') != '0'
+)
+
+
+def get_client_version(db: Session, client_id: int) -> int:
+    """
+    Versão atual dos dados do cliente (0 se nunca houve gravação registrada)
+    """
+    version = db.execute(
+        select(ClientDataVersion.version).where(ClientDataVersion.client_id == client_id)
+    ).scalar()
+    return version or 0
+
+
+def bump_client_versions(connection, client_ids: Iterable[int]) -> None:
+    """
+    Incrementa a versão dos dados dos clientes informados
+
+    Deve ser chamada por caminhos de gravação que não passam pelo flush da
+    sessão (inserções em massa, DELETE/UPDATE diretos).
+    """
+    for client_id in sorted(set(client_ids)):
+        connection.execute(
+            sqlite_insert(ClientDataVersion).values(client_id=client_id, version=1).on_conflict_do_update(
+                index_elements=['client_id'],
+                set_={'version': ClientDataVersion.version + 1}
+            )
+        )
+
+
+def _freeze(value: Any) -> Any:
+    """
+    Converte listas/dicionários de argumentos em estruturas imutáveis para a chave
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def cached_report(func: Callable) -> Callable:
+    """
+    Decorator para métodos de relatório com assinatura (db, client_id, *filtros)
+    """
+    @functools.wraps(func)
+    def wrapper(db: Session, client_id: int, *args, **kwargs):
+        if not report_cache.enabled:
+            return func(db, client_id, *args, **kwargs)
+
+        key = (
+            func.__qualname__,
+            client_id,
+            _freeze(args),
+            _freeze(kwargs),
+            get_client_version(db, client_id)
+        )
+        cached = report_cache.get(key)
+        if cached is not _MISS:
+            return cached
+
+        result = func(db, client_id, *args, **kwargs)
+        report_cache.set(key, result)
+        return result
+
+    return wrapper
+
+
+def touched_clients(session: Session) -> Set[int]:
+    """
+    Clientes afetados pelos objetos pendentes na sessão
+    """
+    clients: Set[int] = set()
+    subgroup_groups: Set[int] = set()
+
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, ClientDataVersion):
+            continue
+
+        state = inspect(obj)
+        if isinstance(obj, Subgroup):
+            subgroup_groups.update(attribute_values(state, 'group_id'))
+        elif 'client_id' in state.mapper.attrs:
+            clients.update(attribute_values(state, 'client_id'))
+
+    if subgroup_groups:
+        clients.update(
+            session.connection().execute(
+                select(Group.client_id).where(Group.id.in_(subgroup_groups))
+            ).scalars()
+        )
+
+    return clients
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_versions_after_flush(session, flush_context):
+    """
+    Invalida os relatórios em cache dos clientes alterados neste flush
+    """
+    clients = touched_clients(session)
+    if clients:
+        bump_client_versions(session.connection(), clients)
@@ -1,16 +1,351 @@
 """
 Serviço de geração de relatórios e análises
 """
-from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, select, union_all, literal, case
 from models.transaction import Transaction, BankStatement
 from models.account import AccountPayable, AccountReceivable
 from models.contract import Contract
+from models.group import Group, Subgroup
+from models.ledger import MonthlyLedger
+from services.ledger_service import LEDGER_SOURCES, date_filter, split_period, source_selects
+from services.report_cache import cached_report
 from datetime import datetime, date, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+import numpy as np
 import pandas as pd
 
 
+# Granularidades aceitas pelos relatórios de fluxo de caixa
+GRANULARITIES = ('daily', 'weekly', 'monthly')
+
+FACT_COLUMNS = [
+    'year_month', 'source', 'type', 'group_id', 'subgroup_id', 'category', 'total', 'count',
+    'group_name', 'subgroup_name', 'subgroup_group_name'
+]
+
+
+def _fact_sources(client_id: int, start_date: Optional[date], end_date: Optional[date]) -> List:
+    """
+    Consultas que compõem os fatos mensais de um período: meses completos vêm do
+    livro-razão mensal e os trechos parciais nas bordas vêm das tabelas de origem
+    """
+    ledger = select(
+        MonthlyLedger.client_id,
+        MonthlyLedger.year_month,
+        MonthlyLedger.source,
+        MonthlyLedger.type,
+        MonthlyLedger.group_id,
+        MonthlyLedger.subgroup_id,
+        MonthlyLedger.category,
+        MonthlyLedger.total,
+        MonthlyLedger.count
+    ).where(MonthlyLedger.client_id == client_id)
+
+    if start_date is None or end_date is None:
+        return [ledger]
+
+    full_months, partial_ranges = split_period(start_date, end_date)
+
+    sources = []
+    if full_months:
+        sources.append(ledger.where(MonthlyLedger.year_month.in_(full_months)))
+    if partial_ranges:
+        sources.extend(source_selects(client_id, partial_ranges))
+    return sources
+
+
+def _with_names(facts, *columns):
+    """
+    Junta aos fatos os nomes do grupo, do subgrupo e do grupo do subgrupo
+    """
+    group = aliased(Group)
+    subgroup = aliased(Subgroup)
+    subgroup_group = aliased(Group)
+
+    return select(
+        *columns,
+        group.name.label('group_name'),
+        subgroup.name.label('subgroup_name'),
+        subgroup_group.name.label('subgroup_group_name')
+    ).select_from(facts).outerjoin(
+        group, group.id == facts.c.group_id
+    ).outerjoin(
+        subgroup, subgroup.id == facts.c.subgroup_id
+    ).outerjoin(
+        subgroup_group, subgroup_group.id == subgroup.group_id
+    )
+
+
+def _fetch_facts(db: Session, client_id: int, start_date: Optional[date] = None,
+                 end_date: Optional[date] = None, granularity: str = 'monthly') -> pd.DataFrame:
+    """
+    Executa a consulta única de fatos mensais (UNION ALL) e devolve um DataFrame
+    com os totais por mês/fonte/tipo/classificação e os nomes de grupo/subgrupo
+
+    Com granularidade diária ou semanal os fatos são lidos por dia diretamente das
+    tabelas de origem (o livro-razão é mensal) e a coluna year_month traz a data.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Granularidade inválida: {granularity}")
+
+    if granularity == 'monthly':
+        sources = _fact_sources(client_id, start_date, end_date)
+    else:
+        ranges = [(start_date, end_date)] if start_date is not None and end_date is not None else None
+        sources = source_selects(client_id, ranges, period_format='%Y-%m-%d')
+    if not sources:
+        return pd.DataFrame(columns=FACT_COLUMNS)
+
+    facts = union_all(*sources).subquery('monthly_facts')
+    query = _with_names(
+        facts,
+        facts.c.year_month,
+        facts.c.source,
+        facts.c.type,
+        facts.c.group_id,
+        facts.c.subgroup_id,
+        facts.c.category,
+        facts.c.total,
+        facts.c.count
+    )
+
+    facts = pd.DataFrame(db.execute(query).all(), columns=FACT_COLUMNS)
+    facts['total'] = facts['total'].astype(float).fillna(0.0)
+    return facts
+
+
+def _period_columns(in_period: List, total, count) -> List:
+    """
+    Colunas condicionais (soma e quantidade por período) de um ramo da consulta
+    multi-período; períodos sem trecho neste ramo recebem zero
+    """
+    totals = [
+        (func.sum(case((condition, total), else_=0)) if condition is not None else literal(0)).label(f'total_{i}')
+        for i, condition in enumerate(in_period)
+    ]
+    counts = [
+        (func.sum(case((condition, count), else_=0)) if condition is not None else literal(0)).label(f'count_{i}')
+        for i, condition in enumerate(in_period)
+    ]
+    return totals + counts
+
+
+def _fetch_period_facts(db: Session, client_id: int,
+                        periods: List[Tuple[date, date]]) -> List[List[Dict[str, Any]]]:
+    """
+    Fatos agregados de vários períodos em uma única consulta
+
+    Cada período vira um par de colunas condicionais (soma e quantidade) sobre
+    uma só leitura do livro-razão (união dos meses completos) e das tabelas de
+    origem (união dos trechos parciais). Retorna as linhas de cada período como
+    dicionários com as colunas de FACT_COLUMNS e os meses já somados (year_month
+    nulo): o resultado tem poucas centenas de linhas, e montar DataFrames custava
+    mais que a própria consulta nos clientes pequenos.
+    """
+    splits = [split_period(start, end) for start, end in periods]
+    all_months = sorted({month for full_months, _ in splits for month in full_months})
+    all_ranges = [r for _, partial_ranges in splits for r in partial_ranges]
+
+    sources = []
+    if all_months:
+        in_period = [MonthlyLedger.year_month.in_(full_months) if full_months else None
+                     for full_months, _ in splits]
+        sources.append(
+            select(
+                MonthlyLedger.source,
+                MonthlyLedger.type,
+                MonthlyLedger.group_id,
+                MonthlyLedger.subgroup_id,
+                MonthlyLedger.category,
+                *_period_columns(in_period, MonthlyLedger.total, MonthlyLedger.count)
+            ).where(
+                MonthlyLedger.client_id == client_id,
+                MonthlyLedger.year_month.in_(all_months)
+            ).group_by(
+                MonthlyLedger.source, MonthlyLedger.type, MonthlyLedger.group_id,
+                MonthlyLedger.subgroup_id, MonthlyLedger.category
+            )
+        )
+
+    if all_ranges:
+        for source in LEDGER_SOURCES:
+            model = source.model
+            in_period = [date_filter(source.date_column, partial_ranges) if partial_ranges else None
+                         for _, partial_ranges in splits]
+            sources.append(
+                select(
+                    literal(source.name).label('source'),
+                    source.type.label('type'),
+                    model.group_id.label('group_id'),
+                    model.subgroup_id.label('subgroup_id'),
+                    source.category.label('category'),
+                    *_period_columns(in_period, source.value, literal(1))
+                ).where(
+                    model.client_id == client_id,
+                    *source.filters,
+                    date_filter(source.date_column, all_ranges)
+                ).group_by(model.group_id, model.subgroup_id, *source.keys)
+            )
+
+    if not sources:
+        return [[] for _ in periods]
+
+    facts = union_all(*sources).subquery('period_facts')
+    keys = [facts.c.source, facts.c.type, facts.c.group_id, facts.c.subgroup_id, facts.c.category]
+    totals = [func.sum(facts.c[f'total_{i}']).label(f'total_{i}') for i in range(len(periods))]
+    counts = [func.sum(facts.c[f'count_{i}']).label(f'count_{i}') for i in range(len(periods))]
+    facts = select(*keys, *totals, *counts).group_by(*keys).subquery('facts')
+
+    query = _with_names(facts, *facts.c)
+    result = db.execute(query)
+    columns = list(result.keys())
+    rows = result.all()
+
+    # Colunas comuns aos períodos, montadas uma vez por linha (acesso por posição)
+    shared = [(name, columns.index(name)) for name in FACT_COLUMNS if name in columns]
+    base = [{name: row[position] for name, position in shared} for row in rows]
+
+    results = []
+    for i in range(len(periods)):
+        total_at, count_at = columns.index(f'total_{i}'), columns.index(f'count_{i}')
+        results.append([
+            {**fact, 'year_month': None, 'total': float(row[total_at] or 0.0), 'count': row[count_at]}
+            for fact, row in zip(base, rows) if (row[count_at] or 0) > 0
+        ])
+    return results
+
+
+def _sum_by(facts: List[Dict[str, Any]], keys: List[str]) -> List[tuple]:
+    """
+    Soma a coluna 'total' por chave, na mesma ordem de um GROUP BY do SQLite (nulos primeiro)
+    """
+    sums: Dict[tuple, float] = {}
+    for row in facts:
+        key = tuple(row[k] for k in keys)
+        sums[key] = sums.get(key, 0.0) + row['total']
+    ordered = sorted(sums, key=lambda key: tuple((v is not None, v if v is not None else '') for v in key))
+    return [(*key, sums[key]) for key in ordered]
+
+
+def _bucket_periods(dates: pd.Series, granularity: str) -> pd.Series:
+    """
+    Rótulo do período de cada data: 'YYYY-MM' (mensal), 'YYYY-MM-DD' (diário) ou
+    a segunda-feira da semana em 'YYYY-MM-DD' (semanal)
+    """
+    dates = pd.to_datetime(dates)
+    if granularity == 'monthly':
+        return dates.dt.strftime('%Y-%m')
+    if granularity == 'weekly':
+        dates = dates - pd.to_timedelta(dates.dt.weekday, unit='D')
+    return dates.dt.strftime('%Y-%m-%d')
+
+
+def _cash_flow(periods: pd.Series, inflows: np.ndarray, outflows: np.ndarray,
+               by: Optional[pd.Series] = None,
+               columns: Tuple[str, str] = ('entradas', 'saidas')) -> pd.DataFrame:
+    """
+    Soma entradas e saídas por período (e opcionalmente por uma chave, ex.: grupo)
+    e calcula o saldo do período e o saldo acumulado com cumsum vetorizado
+    """
+    entradas, saidas = columns
+    keys = ['mes'] if by is None else ['chave', 'mes']
+    frame = pd.DataFrame({'mes': periods.to_numpy(), entradas: inflows, saidas: outflows})
+    if by is not None:
+        frame['chave'] = by.to_numpy()
+
+    flow = frame.groupby(keys, sort=True)[[entradas, saidas]].sum().reset_index()
+    flow['saldo_mes'] = flow[entradas] - flow[saidas]
+    if by is None:
+        flow['saldo_acumulado'] = flow['saldo_mes'].cumsum()
+    else:
+        flow['saldo_acumulado'] = flow.groupby('chave', sort=False)['saldo_mes'].cumsum()
+    return flow
+
+
+def _flow_records(flow: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Converte o DataFrame de fluxo na lista de dicionários dos relatórios
+    """
+    return [
+        {key: (float(value) if key != 'mes' else value) for key, value in row.items()}
+        for row in flow.drop(columns=['chave'], errors='ignore').to_dict('records')
+    ]
+
+
+def _build_dre(facts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Monta o dicionário da DRE a partir dos fatos agregados (linhas de _fetch_period_facts)
+    """
+    def total(source: str, trans_type: str) -> float:
+        return float(sum(f['total'] for f in facts if f['source'] == source and f['type'] == trans_type))
+
+    receitas_trans = total('transactions', 'entrada')
+    despesas_trans = total('transactions', 'saida')
+    receitas_contratos = total('contracts', 'entrada')
+    despesas_contas_pagar = total('accounts_payable', 'saida')
+    receitas_contas_receber = total('accounts_receivable', 'entrada')
+
+    # Total
+    receitas = receitas_trans + receitas_contratos + receitas_contas_receber
+    despesas = despesas_trans + despesas_contas_pagar
+
+    # Resultado
+    resultado = receitas - despesas
+    margem = (resultado / receitas * 100) if receitas > 0 else 0
+
+    def select_facts(trans_type: str, condition) -> List[Dict[str, Any]]:
+        return [f for f in facts if f['type'] == trans_type and condition(f)]
+
+    # Consolidar por grupo (CLASSIFICAÇÃO PRINCIPAL), na ordem transações > contratos > contas
+    def consolidate(sources: List[str], trans_type: str) -> Dict[str, float]:
+        consolidated = {}
+        for source in sources:
+            rows = select_facts(trans_type, lambda f: f['source'] == source and f['group_name'] is not None)
+            for grupo, valor in _sum_by(rows, ['group_name']):
+                grupo = grupo or 'Sem grupo'
+                consolidated[grupo] = consolidated.get(grupo, 0) + float(valor)
+        return consolidated
+
+    receitas_por_grupo = consolidate(['transactions', 'contracts', 'accounts_receivable'], 'entrada')
+    despesas_por_grupo = consolidate(['transactions', 'accounts_payable'], 'saida')
+
+    # Subgrupos (apenas transações; grupo resolvido a partir do subgrupo)
+    subgroup_keys = ['subgroup_group_name', 'subgroup_name']
+
+    def with_subgroup(f):
+        return (f['source'] == 'transactions' and f['subgroup_name'] is not None
+                and f['subgroup_group_name'] is not None)
+
+    receitas_por_subgrupo = _sum_by(select_facts('entrada', with_subgroup), subgroup_keys)
+    despesas_por_subgrupo = _sum_by(select_facts('saida', with_subgroup), subgroup_keys)
+
+    # Categoria (FALLBACK - apenas para transações sem grupo/subgrupo)
+    def without_group(f):
+        return f['source'] == 'transactions' and f['group_id'] is None
+
+    receitas_por_categoria = _sum_by(select_facts('entrada', without_group), ['category'])
+    despesas_por_categoria = _sum_by(select_facts('saida', without_group), ['category'])
+
+    return {
+        'receitas': float(receitas),
+        'despesas': float(despesas),
+        'resultado': float(resultado),
+        'margem': float(margem),
+        # Classificação PRINCIPAL: Grupo e Subgrupo
+        'receitas_por_grupo': [{'grupo': grupo, 'valor': valor} for grupo, valor in receitas_por_grupo.items()],
+        'despesas_por_grupo': [{'grupo': grupo, 'valor': valor} for grupo, valor in despesas_por_grupo.items()],
+        'receitas_por_subgrupo': [{'grupo': r[0] or 'Sem grupo', 'subgrupo': r[1] or 'Sem subgrupo', 'valor': float(r[2])} for r in receitas_por_subgrupo],
+        'despesas_por_subgrupo': [{'grupo': d[0] or 'Sem grupo', 'subgrupo': d[1] or 'Sem subgrupo', 'valor': float(d[2])} for d in despesas_por_subgrupo],
+        # Classificação SECUNDÁRIA: Categoria (apenas para transações sem grupo/subgrupo)
+        'receitas_por_categoria': [{'categoria': r[0] or 'Sem categoria', 'valor': float(r[1])} for r in receitas_por_categoria],
+        'despesas_por_categoria': [{'categoria': d[0] or 'Sem categoria', 'valor': float(d[1])} for d in despesas_por_categoria],
+        'receitas_contratos': float(receitas_contratos),
+        'receitas_contas_receber': float(receitas_contas_receber),
+        'despesas_contas_pagar': float(despesas_contas_pagar)
+    }
+
+
 class ReportService:
     """
     Serviço para gerar relatórios e análises financeiras
@@ -21,217 +356,37 @@ class ReportService:
         """
         Gera dados para DRE (Demonstração do Resultado do Exercício)
         Inclui transações (que já incluem extratos convertidos), contratos, contas a pagar e contas a receber
-        """
-        # Receitas de transações (inclui extratos bancários convertidos automaticamente)
-        receitas_trans = db.query(
-            func.sum(Transaction.value)
-        ).filter(
-            Transaction.client_id == client_id,
-            Transaction.type == 'entrada',
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        ).scalar() or 0
-        
-        # Despesas de transações (inclui extratos bancários convertidos automaticamente)
-        despesas_trans = db.query(
-            func.sum(Transaction.value)
-        ).filter(
-            Transaction.client_id == client_id,
-            Transaction.type == 'saida',
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        ).scalar() or 0
-        
-        # Receitas de contratos concluídos
-        receitas_contratos = db.query(
-            func.sum(Contract.service_value + Contract.displacement_value)
-        ).filter(
-            Contract.client_id == client_id,
-            Contract.status == 'concluido',
-            Contract.event_date >= start_date,
-            Contract.event_date <= end_date
-        ).scalar() or 0
-        
-        # Despesas de contas a pagar pagas
-        despesas_contas_pagar = db.query(
-            func.sum(AccountPayable.value)
-        ).filter(
-            AccountPayable.client_id == client_id,
-            AccountPayable.paid == True,
-            AccountPayable.payment_date >= start_date,
-            AccountPayable.payment_date <= end_date
-        ).scalar() or 0
-        
-        # Receitas de contas a receber recebidas
-        receitas_contas_receber = db.query(
-            func.sum(AccountReceivable.value)
-        ).filter(
-            AccountReceivable.client_id == client_id,
-            AccountReceivable.received == True,
-            AccountReceivable.receipt_date >= start_date,
-            AccountReceivable.receipt_date <= end_date
-        ).scalar() or 0
-        
-        # Total
-        receitas = receitas_trans + receitas_contratos + receitas_contas_receber
-        despesas = despesas_trans + despesas_contas_pagar
-        
-        # Resultado
-        resultado = receitas - despesas
-        margem = (resultado / receitas * 100) if receitas > 0 else 0
-        
-        # Agregação por grupos e subgrupos (CLASSIFICAÇÃO PRINCIPAL)
-        from models.group import Group, Subgroup
-        
-        # Receitas por grupo
-        receitas_por_grupo = db.query(
-            Group.name,
-            func.sum(Transaction.value).label('total')
-        ).join(Transaction, Transaction.group_id == Group.id).filter(
-            Transaction.client_id == client_id,
-            Transaction.type == 'entrada',
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        ).group_by(Group.name).all()
-        
-        # Despesas por grupo
-        despesas_por_grupo = db.query(
-            Group.name,
-            func.sum(Transaction.value).label('total')
-        ).join(Transaction, Transaction.group_id == Group.id).filter(
-            Transaction.client_id == client_id,
-            Transaction.type == 'saida',
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        ).group_by(Group.name).all()
-        
-        # Receitas por subgrupo
-        receitas_por_subgrupo = db.query(
-            Group.name.label('grupo'),
-            Subgroup.name.label('subgrupo'),
-            func.sum(Transaction.value).label('total')
-        ).join(Transaction, Transaction.subgroup_id == Subgroup.id).join(
-            Group, Subgroup.group_id == Group.id
-        ).filter(
-            Transaction.client_id == client_id,
-            Transaction.type == 'entrada',
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        ).group_by(Group.name, Subgroup.name).all()
-        
-        # Despesas por subgrupo
-        despesas_por_subgrupo = db.query(
-            Group.name.label('grupo'),
-            Subgroup.name.label('subgrupo'),
-            func.sum(Transaction.value).label('total')
-        ).join(Transaction, Transaction.subgroup_id == Subgroup.id).join(
-            Group, Subgroup.group_id == Group.id
-        ).filter(
-            Transaction.client_id == client_id,
-            Transaction.type == 'saida',
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        ).group_by(Group.name, Subgroup.name).all()
         
-        # Agregação por grupos/subgrupos para contratos
-        receitas_por_grupo_contratos = db.query(
-            Group.name,
-            func.sum(Contract.service_value + Contract.displacement_value).label('total')
-        ).join(Contract, Contract.group_id == Group.id).filter(
-            Contract.client_id == client_id,
-            Contract.status == 'concluido',
-            Contract.event_date >= start_date,
-            Contract.event_date <= end_date
-        ).group_by(Group.name).all()
-        
-        # Agregação por grupos/subgrupos para contas a pagar
-        despesas_por_grupo_contas_pagar = db.query(
-            Group.name,
-            func.sum(AccountPayable.value).label('total')
-        ).join(AccountPayable, AccountPayable.group_id == Group.id).filter(
-            AccountPayable.client_id == client_id,
-            AccountPayable.paid == True,
-            AccountPayable.payment_date >= start_date,
-            AccountPayable.payment_date <= end_date
-        ).group_by(Group.name).all()
-        
-        # Agregação por grupos/subgrupos para contas a receber
-        receitas_por_grupo_contas_receber = db.query(
-            Group.name,
-            func.sum(AccountReceivable.value).label('total')
-        ).join(AccountReceivable, AccountReceivable.group_id == Group.id).filter(
-            AccountReceivable.client_id == client_id,
-            AccountReceivable.received == True,
-            AccountReceivable.receipt_date >= start_date,
-            AccountReceivable.receipt_date <= end_date
-        ).group_by(Group.name).all()
-        
-        # Consolidar receitas por grupo (todas as fontes)
-        receitas_por_grupo_consolidado = {}
-        for r in receitas_por_grupo:
-            grupo = r[0] or 'Sem grupo'
-            receitas_por_grupo_consolidado[grupo] = receitas_por_grupo_consolidado.get(grupo, 0) + float(r[1])
-        for r in receitas_por_grupo_contratos:
-            grupo = r[0] or 'Sem grupo'
-            receitas_por_grupo_consolidado[grupo] = receitas_por_grupo_consolidado.get(grupo, 0) + float(r[1])
-        for r in receitas_por_grupo_contas_receber:
-            grupo = r[0] or 'Sem grupo'
-            receitas_por_grupo_consolidado[grupo] = receitas_por_grupo_consolidado.get(grupo, 0) + float(r[1])
-        
-        # Consolidar despesas por grupo (todas as fontes)
-        despesas_por_grupo_consolidado = {}
-        for d in despesas_por_grupo:
-            grupo = d[0] or 'Sem grupo'
-            despesas_por_grupo_consolidado[grupo] = despesas_por_grupo_consolidado.get(grupo, 0) + float(d[1])
-        for d in despesas_por_grupo_contas_pagar:
-            grupo = d[0] or 'Sem grupo'
-            despesas_por_grupo_consolidado[grupo] = despesas_por_grupo_consolidado.get(grupo, 0) + float(d[1])
-        
-        # Receitas por categoria (FALLBACK - apenas para transações sem grupo/subgrupo)
-        receitas_por_categoria = db.query(
-            Transaction.category,
-            func.sum(Transaction.value).label('total')
-        ).filter(
-            Transaction.client_id == client_id,
-            Transaction.type == 'entrada',
-            Transaction.date >= start_date,
-            Transaction.date <= end_date,
-            Transaction.group_id.is_(None)  # Apenas transações sem grupo
-        ).group_by(Transaction.category).all()
-        
-        # Despesas por categoria (FALLBACK - apenas para transações sem grupo/subgrupo)
-        despesas_por_categoria = db.query(
-            Transaction.category,
-            func.sum(Transaction.value).label('total')
-        ).filter(
-            Transaction.client_id == client_id,
-            Transaction.type == 'saida',
-            Transaction.date >= start_date,
-            Transaction.date <= end_date,
-            Transaction.group_id.is_(None)  # Apenas transações sem grupo
-        ).group_by(Transaction.category).all()
-        
-        return {
-            'receitas': float(receitas),
-            'despesas': float(despesas),
-            'resultado': float(resultado),
-            'margem': float(margem),
-            # Classificação PRINCIPAL: Grupo e Subgrupo
-            'receitas_por_grupo': [{'grupo': grupo, 'valor': valor} for grupo, valor in receitas_por_grupo_consolidado.items()],
-            'despesas_por_grupo': [{'grupo': grupo, 'valor': valor} for grupo, valor in despesas_por_grupo_consolidado.items()],
-            'receitas_por_subgrupo': [{'grupo': r[0] or 'Sem grupo', 'subgrupo': r[1] or 'Sem subgrupo', 'valor': float(r[2])} for r in receitas_por_subgrupo],
-            'despesas_por_subgrupo': [{'grupo': d[0] or 'Sem grupo', 'subgrupo': d[1] or 'Sem subgrupo', 'valor': float(d[2])} for d in despesas_por_subgrupo],
-            # Classificação SECUNDÁRIA: Categoria (apenas para transações sem grupo/subgrupo)
-            'receitas_por_categoria': [{'categoria': r[0] or 'Sem categoria', 'valor': float(r[1])} for r in receitas_por_categoria],
-            'despesas_por_categoria': [{'categoria': d[0] or 'Sem categoria', 'valor': float(d[1])} for d in despesas_por_categoria],
-            'receitas_contratos': float(receitas_contratos),
-            'receitas_contas_receber': float(receitas_contas_receber),
-            'despesas_contas_pagar': float(despesas_contas_pagar)
-        }
+        Todas as fontes são lidas em uma única consulta (livro-razão mensal + bordas
+        parciais) e os totais, grupos, subgrupos e categorias são derivados das linhas.
+        """
+        return ReportService.get_dre_multi(db, client_id, [(start_date, end_date)])[0]
 
     @staticmethod
+    @cached_report
+    def get_dre_multi(db: Session, client_id: int,
+                      periods: Sequence[Tuple[date, date]]) -> List[Dict[str, Any]]:
+        """
+        Gera a DRE de vários períodos (ex.: atual, acumulado do ano e anterior)
+        com uma única leitura das fontes, usando agregação condicional por período
+
+        Args:
+            db: Sessão do banco
+            client_id: ID do cliente
+            periods: Lista de (data_inicial, data_final)
+
+        Returns:
+            Lista de DREs no mesmo formato de get_dre_data, na ordem dos períodos
+        """
+        periods = [tuple(period) for period in periods]
+        if not periods:
+            return []
+        return [_build_dre(facts) for facts in _fetch_period_facts(db, client_id, periods)]
+
+    @staticmethod
+    @cached_report
     def get_dfc_data(db: Session, client_id: int, start_date: date, end_date: date, 
-                     group_id: Optional[int] = None) -> Dict[str, Any]:
+                     group_id: Optional[int] = None, granularity: str = 'monthly') -> Dict[str, Any]:
         """
         Gera dados para DFC (Demonstração do Fluxo de Caixa)
         Inclui transações (que já incluem extratos convertidos), contratos, contas a pagar e contas a receber
@@ -242,203 +397,68 @@ class ReportService:
             start_date: Data inicial
             end_date: Data final
             group_id: ID do grupo para filtrar (opcional). Se None, retorna todos os grupos
+            granularity: 'monthly' (padrão, chave 'mes' = YYYY-MM), 'weekly' (segunda-feira
+                da semana, YYYY-MM-DD) ou 'daily' (YYYY-MM-DD)
         """
-        # Filtro base
-        transaction_filter = [
-            Transaction.client_id == client_id,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
+        # Fatos de todas as fontes (livro-razão + bordas parciais, ou diários)
+        facts = _fetch_facts(db, client_id, start_date, end_date, granularity)
+        periods = _bucket_periods(facts['year_month'], granularity)
+        totals = facts['total'].to_numpy(dtype=float)
+        is_inflow = (facts['type'] == 'entrada').to_numpy()
+        inflows = np.where(is_inflow, totals, 0.0)
+        outflows = np.where(is_inflow, 0.0, totals)
+        is_transaction = facts['source'] == 'transactions'
+        
+        # Fluxo por grupo (para análises detalhadas) - apenas transações com grupo
+        grouped = (is_transaction & facts['group_name'].notna()).to_numpy()
+        group_flow = _cash_flow(
+            periods[grouped], inflows[grouped], outflows[grouped], by=facts['group_name'][grouped]
+        )
+        fluxo_por_grupo_list = [
+            {
+                'grupo': grupo,
+                'fluxo_mensal': _flow_records(flow),
+                'saldo_final': float(flow['saldo_acumulado'].iloc[-1])
+            }
+            for grupo, flow in group_flow.groupby('chave', sort=True)
         ]
         
-        # Adiciona filtro por grupo se fornecido
+        # Filtro por grupo (opcional) aplicado às transações; contratos concluídos e
+        # contas a receber recebidas (entradas) e contas a pagar pagas (saídas) sempre entram
+        selected = np.ones(len(facts), dtype=bool)
         if group_id is not None:
-            transaction_filter.append(Transaction.group_id == group_id)
-        
-        # Fluxo por mês - Transações (inclui extratos bancários convertidos automaticamente)
-        transactions = db.query(
-            extract('year', Transaction.date).label('year'),
-            extract('month', Transaction.date).label('month'),
-            Transaction.type,
-            func.sum(Transaction.value).label('total')
-        ).filter(*transaction_filter).group_by('year', 'month', Transaction.type).all()
-        
-        # Fluxo por grupo (para análises detalhadas)
-        from models.group import Group
-        fluxo_por_grupo = {}
-        
-        transactions_por_grupo = db.query(
-            Group.name.label('grupo'),
-            extract('year', Transaction.date).label('year'),
-            extract('month', Transaction.date).label('month'),
-            Transaction.type,
-            func.sum(Transaction.value).label('total')
-        ).join(Transaction, Transaction.group_id == Group.id).filter(
-            Transaction.client_id == client_id,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        ).group_by(Group.name, 'year', 'month', Transaction.type).all()
-        
-        # Organiza fluxo por grupo
-        for trans in transactions_por_grupo:
-            grupo = trans.grupo or 'Sem grupo'
-            month_key = f"{int(trans.year)}-{int(trans.month):02d}"
-            
-            if grupo not in fluxo_por_grupo:
-                fluxo_por_grupo[grupo] = {}
-            
-            if month_key not in fluxo_por_grupo[grupo]:
-                fluxo_por_grupo[grupo][month_key] = {'entradas': 0, 'saidas': 0}
-            
-            if trans.type == 'entrada':
-                fluxo_por_grupo[grupo][month_key]['entradas'] += float(trans.total)
-            else:
-                fluxo_por_grupo[grupo][month_key]['saidas'] += float(trans.total)
-        
-        # Fluxo por mês - Contratos concluídos
-        contracts = db.query(
-            extract('year', Contract.event_date).label('year'),
-            extract('month', Contract.event_date).label('month'),
-            func.sum(Contract.service_value + Contract.displacement_value).label('total')
-        ).filter(
-            Contract.client_id == client_id,
-            Contract.status == 'concluido',
-            Contract.event_date >= start_date,
-            Contract.event_date <= end_date
-        ).group_by('year', 'month').all()
-        
-        # Fluxo por mês - Contas a pagar pagas
-        accounts_payable = db.query(
-            extract('year', AccountPayable.payment_date).label('year'),
-            extract('month', AccountPayable.payment_date).label('month'),
-            func.sum(AccountPayable.value).label('total')
-        ).filter(
-            AccountPayable.client_id == client_id,
-            AccountPayable.paid == True,
-            AccountPayable.payment_date >= start_date,
-            AccountPayable.payment_date <= end_date
-        ).group_by('year', 'month').all()
-        
-        # Fluxo por mês - Contas a receber recebidas
-        accounts_receivable = db.query(
-            extract('year', AccountReceivable.receipt_date).label('year'),
-            extract('month', AccountReceivable.receipt_date).label('month'),
-            func.sum(AccountReceivable.value).label('total')
-        ).filter(
-            AccountReceivable.client_id == client_id,
-            AccountReceivable.received == True,
-            AccountReceivable.receipt_date >= start_date,
-            AccountReceivable.receipt_date <= end_date
-        ).group_by('year', 'month').all()
-        
-        # Organiza por mês
-        fluxo_mensal = {}
-        
-        # Adiciona transações
-        for trans in transactions:
-            month_key = f"{int(trans.year)}-{int(trans.month):02d}"
-            if month_key not in fluxo_mensal:
-                fluxo_mensal[month_key] = {'entradas': 0, 'saidas': 0}
-            
-            if trans.type == 'entrada':
-                fluxo_mensal[month_key]['entradas'] += float(trans.total)
-            else:
-                fluxo_mensal[month_key]['saidas'] += float(trans.total)
-        
-        # Adiciona contratos concluídos (entradas)
-        for contract in contracts:
-            month_key = f"{int(contract.year)}-{int(contract.month):02d}"
-            if month_key not in fluxo_mensal:
-                fluxo_mensal[month_key] = {'entradas': 0, 'saidas': 0}
-            fluxo_mensal[month_key]['entradas'] += float(contract.total)
-        
-        # Adiciona contas a pagar pagas (saídas)
-        for account in accounts_payable:
-            month_key = f"{int(account.year)}-{int(account.month):02d}"
-            if month_key not in fluxo_mensal:
-                fluxo_mensal[month_key] = {'entradas': 0, 'saidas': 0}
-            fluxo_mensal[month_key]['saidas'] += float(account.total)
-        
-        # Adiciona contas a receber recebidas (entradas)
-        for account in accounts_receivable:
-            month_key = f"{int(account.year)}-{int(account.month):02d}"
-            if month_key not in fluxo_mensal:
-                fluxo_mensal[month_key] = {'entradas': 0, 'saidas': 0}
-            fluxo_mensal[month_key]['entradas'] += float(account.total)
-        
-        # Calcula saldo acumulado
-        saldo_acumulado = 0
-        fluxo_list = []
-        
-        for month_key in sorted(fluxo_mensal.keys()):
-            entradas = fluxo_mensal[month_key]['entradas']
-            saidas = fluxo_mensal[month_key]['saidas']
-            saldo_mes = entradas - saidas
-            saldo_acumulado += saldo_mes
-            
-            fluxo_list.append({
-                'mes': month_key,
-                'entradas': entradas,
-                'saidas': saidas,
-                'saldo_mes': saldo_mes,
-                'saldo_acumulado': saldo_acumulado
-            })
+            selected = (~is_transaction | (facts['group_id'] == group_id)).to_numpy()
         
-        # Converte fluxo por grupo para lista
-        fluxo_por_grupo_list = []
-        for grupo, meses in fluxo_por_grupo.items():
-            grupo_fluxo = []
-            saldo_grupo = 0
-            for month_key in sorted(meses.keys()):
-                entradas = meses[month_key]['entradas']
-                saidas = meses[month_key]['saidas']
-                saldo_mes = entradas - saidas
-                saldo_grupo += saldo_mes
-                
-                grupo_fluxo.append({
-                    'mes': month_key,
-                    'entradas': entradas,
-                    'saidas': saidas,
-                    'saldo_mes': saldo_mes,
-                    'saldo_acumulado': saldo_grupo
-                })
-            
-            fluxo_por_grupo_list.append({
-                'grupo': grupo,
-                'fluxo_mensal': grupo_fluxo,
-                'saldo_final': saldo_grupo
-            })
+        flow = _cash_flow(periods[selected], inflows[selected], outflows[selected])
+        fluxo_list = _flow_records(flow)
         
         return {
             'fluxo_mensal': fluxo_list,
-            'saldo_final': saldo_acumulado,
+            'saldo_final': fluxo_list[-1]['saldo_acumulado'] if fluxo_list else 0,
             'fluxo_por_grupo': fluxo_por_grupo_list  # Agrupamento opcional por grupo
         }
 
     @staticmethod
+    @cached_report
     def get_seasonality_data(db: Session, client_id: int) -> Dict[str, Any]:
         """
         Analisa sazonalidade dos dados
         """
-        # Receitas por mês (todos os anos)
-        receitas_mensal = db.query(
-            extract('year', Transaction.date).label('year'),
-            extract('month', Transaction.date).label('month'),
-            func.sum(Transaction.value).label('total')
-        ).filter(
-            Transaction.client_id == client_id,
-            Transaction.type == 'entrada'
-        ).group_by('year', 'month').all()
+        # Receitas por mês (todos os anos), lidas do livro-razão mensal
+        facts = _fetch_facts(db, client_id)
+        receitas = facts[(facts['source'] == 'transactions') & (facts['type'] == 'entrada')]
+        receitas_mensal = receitas.groupby('year_month')['total'].sum()
         
         # Organiza por ano e mês
         data_by_year = {}
-        for rec in receitas_mensal:
-            year = int(rec.year)
-            month = int(rec.month)
+        for year_month, total in receitas_mensal.items():
+            year = int(year_month[:4])
+            month = int(year_month[5:7])
             
             if year not in data_by_year:
                 data_by_year[year] = {}
             
-            data_by_year[year][month] = float(rec.total)
+            data_by_year[year][month] = float(total)
         
         # Média por mês (considerando todos os anos)
         month_averages = {}
@@ -466,6 +486,7 @@ class ReportService:
         }
 
     @staticmethod
+    @cached_report
     def get_kpis(db: Session, client_id: int, start_date: date, end_date: date) -> Dict[str, Any]:
         """
         Calcula KPIs principais
@@ -514,6 +535,7 @@ class ReportService:
         }
 
     @staticmethod
+    @cached_report
     def get_bank_statements_data(db: Session, client_id: int, start_date: date, end_date: date) -> Dict[str, Any]:
         """
         Gera dados específicos de extratos bancários
@@ -600,73 +622,99 @@ class ReportService:
         }
     
     @staticmethod
-    def get_dfc_projection(db: Session, client_id: int, start_date: date, end_date: date) -> Dict[str, Any]:
+    @cached_report
+    def get_bank_balances(db: Session, client_id: int, end_date: date) -> Dict[str, Dict[str, Any]]:
         """
-        Gera projeção de DFC baseada em contas a receber e contas a pagar futuras
-        Usa parcelas mensais para projetar fluxo de caixa
+        Calcula o saldo de cada banco até a data informada
+        Uma única consulta agrupada por (banco, conta) sobre os extratos bancários,
+        com sinal: entradas somam e saídas subtraem
+        
+        Returns:
+            Dict {nome do banco: {'account': conta, 'balance': saldo}}, do banco
+            com movimentação mais recente para o mais antigo
         """
-        from dateutil.relativedelta import relativedelta
+        signed_value = case(
+            (Transaction.type == 'entrada', Transaction.value),
+            else_=-Transaction.value
+        )
         
-        # Busca contas a receber não recebidas (futuras)
-        accounts_receivable = db.query(AccountReceivable).filter(
+        balances = db.query(
+            Transaction.bank_name,
+            Transaction.account,
+            func.sum(signed_value).label('balance'),
+            func.max(Transaction.date).label('last_date')
+        ).filter(
+            Transaction.client_id == client_id,
+            Transaction.document_type == 'extrato_bancario',
+            Transaction.date <= end_date
+        ).group_by(
+            Transaction.bank_name, Transaction.account
+        ).order_by(func.max(Transaction.date).desc()).all()
+        
+        # Contas do mesmo banco são somadas; 'account' é a de movimentação mais recente
+        bank_balances = {}
+        for row in balances:
+            bank_name = row.bank_name or row.account or 'Banco'
+            if bank_name not in bank_balances:
+                bank_balances[bank_name] = {'account': row.account or '', 'balance': 0.0}
+            bank_balances[bank_name]['balance'] += float(row.balance or 0)
+        
+        return bank_balances
+    
+    @staticmethod
+    @cached_report
+    def get_dfc_projection(db: Session, client_id: int, start_date: date, end_date: date,
+                           granularity: str = 'monthly') -> Dict[str, Any]:
+        """
+        Gera projeção de DFC baseada em contas a receber e contas a pagar futuras
+        Usa parcelas mensais para projetar fluxo de caixa (ou semanais/diárias,
+        conforme a granularidade)
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Granularidade inválida: {granularity}")
+        
+        # Contas a receber não recebidas e contas a pagar não pagas (futuras),
+        # lidas como colunas (vencimento, valor, é entrada)
+        receivable = select(
+            AccountReceivable.due_date, AccountReceivable.value, literal(True)
+        ).where(
             AccountReceivable.client_id == client_id,
             AccountReceivable.received == False,
             AccountReceivable.due_date >= start_date,
             AccountReceivable.due_date <= end_date
-        ).order_by(AccountReceivable.due_date).all()
-        
-        # Busca contas a pagar não pagas (futuras)
-        accounts_payable = db.query(AccountPayable).filter(
+        )
+        payable = select(
+            AccountPayable.due_date, AccountPayable.value, literal(False)
+        ).where(
             AccountPayable.client_id == client_id,
             AccountPayable.paid == False,
             AccountPayable.due_date >= start_date,
             AccountPayable.due_date <= end_date
-        ).order_by(AccountPayable.due_date).all()
-        
-        # Organiza por mês
-        projection = {}
-        
-        # Adiciona entradas previstas (contas a receber)
-        for ar in accounts_receivable:
-            month_key = ar.due_date.strftime('%Y-%m')
-            if month_key not in projection:
-                projection[month_key] = {'entradas_previstas': 0, 'saidas_previstas': 0, 'saldo_projetado': 0}
-            projection[month_key]['entradas_previstas'] += float(ar.value)
-        
-        # Adiciona saídas previstas (contas a pagar)
-        for ap in accounts_payable:
-            month_key = ap.due_date.strftime('%Y-%m')
-            if month_key not in projection:
-                projection[month_key] = {'entradas_previstas': 0, 'saidas_previstas': 0, 'saldo_projetado': 0}
-            projection[month_key]['saidas_previstas'] += float(ap.value)
-        
-        # Calcula saldo projetado por mês
-        saldo_acumulado = 0
-        projection_list = []
-        
-        for month_key in sorted(projection.keys()):
-            entradas = projection[month_key]['entradas_previstas']
-            saidas = projection[month_key]['saidas_previstas']
-            saldo_mes = entradas - saidas
-            saldo_acumulado += saldo_mes
-            
-            projection_list.append({
-                'mes': month_key,
-                'entradas_previstas': entradas,
-                'saidas_previstas': saidas,
-                'saldo_mes': saldo_mes,
-                'saldo_acumulado': saldo_acumulado
-            })
+        )
+        rows = pd.DataFrame(
+            db.execute(union_all(receivable, payable)).all(),
+            columns=['due_date', 'value', 'is_inflow']
+        )
+        
+        values = rows['value'].astype(float).fillna(0.0).to_numpy()
+        is_inflow = rows['is_inflow'].astype(bool).to_numpy()
+        flow = _cash_flow(
+            _bucket_periods(rows['due_date'], granularity),
+            np.where(is_inflow, values, 0.0),
+            np.where(is_inflow, 0.0, values),
+            columns=('entradas_previstas', 'saidas_previstas')
+        )
+        projection_list = _flow_records(flow)
         
         # Identifica possíveis déficits (meses com saldo negativo)
         deficits = [p for p in projection_list if p['saldo_acumulado'] < 0]
         
         return {
             'projecao_mensal': projection_list,
-            'saldo_final_projetado': saldo_acumulado,
+            'saldo_final_projetado': projection_list[-1]['saldo_acumulado'] if projection_list else 0,
             'deficits': deficits,
-            'total_entradas_previstas': sum(p['entradas_previstas'] for p in projection_list),
-            'total_saidas_previstas': sum(p['saidas_previstas'] for p in projection_list)
+            'total_entradas_previstas': float(flow['entradas_previstas'].sum()),
+            'total_saidas_previstas': float(flow['saidas_previstas'].sum())
         }
 
     @staticmethod
@@ -686,6 +734,7 @@ class ReportService:
         return output.getvalue()
     
     @staticmethod
+    @cached_report
     def get_consolidated_financial_data(
         db: Session, 
         client_id: int, 
@@ -696,32 +745,22 @@ class ReportService:
         Retorna dados financeiros consolidados para relatórios gerenciais
         Inclui disponíveis financeiros, obrigações, entradas/saídas detalhadas, etc.
         """
-        # Dados do DRE
-        dre_data = ReportService.get_dre_data(db, client_id, start_date, end_date)
+        # Dados do DRE: período, acumulado do ano e período anterior (uma única leitura)
+        year_start = date(start_date.year, 1, 1)
+        period_days = (end_date - start_date).days
+        previous_start = start_date - timedelta(days=period_days + 1)
+        previous_end = start_date - timedelta(days=1)
+        dre_data, dre_year, dre_previous = ReportService.get_dre_multi(db, client_id, [
+            (start_date, end_date),
+            (year_start, end_date),
+            (previous_start, previous_end)
+        ])
         
         # Dados do DFC
         dfc_data = ReportService.get_dfc_data(db, client_id, start_date, end_date)
         
         # Disponíveis financeiros (saldo bancário)
-        bank_balances = {}
-        bank_transactions = db.query(Transaction).filter(
-            Transaction.client_id == client_id,
-            Transaction.document_type == 'extrato_bancario',
-            Transaction.date <= end_date
-        ).order_by(Transaction.date.desc(), Transaction.id.desc()).all()
-        
-        for trans in bank_transactions:
-            bank_name = trans.bank_name or trans.account or 'Banco'
-            if bank_name not in bank_balances:
-                balance = db.query(func.sum(Transaction.value)).filter(
-                    Transaction.client_id == client_id,
-                    Transaction.account == trans.account,
-                    Transaction.date <= end_date
-                ).scalar() or 0
-                bank_balances[bank_name] = {
-                    'account': trans.account or '',
-                    'balance': float(balance)
-                }
+        bank_balances = ReportService.get_bank_balances(db, client_id, end_date)
         
         total_bank_balance = sum(b['balance'] for b in bank_balances.values())
         
@@ -771,19 +810,6 @@ class ReportService:
             AccountReceivable.due_date > end_date
         ).scalar() or 0
         
-        # Dados acumulados do ano
-        year_start = date(start_date.year, 1, 1)
-        dre_year = ReportService.get_dre_data(db, client_id, year_start, end_date)
-        
-        # Comparação com período anterior
-        from datetime import timedelta
-        period_days = (end_date - start_date).days
-        previous_start = start_date - timedelta(days=period_days + 1)
-        previous_end = start_date - timedelta(days=1)
-        dre_previous = ReportService.get_dre_data(
-            db, client_id, previous_start, previous_end
-        )
-        
         return {
             'dre': dre_data,
             'dfc': dfc_data,
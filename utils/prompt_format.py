@@ -0,0 +1,169 @@
+"""
+Serialização de dados tabulares para prompts de IA e estimativa local de tokens
+
+Os prompts embutiam as linhas com json.dumps(indent=2), repetindo o nome de cada
+coluna em todas as linhas: indentação e chaves custavam mais tokens que os dados.
+Formatos disponíveis:
+    json         - lista de objetos indentada (formato original)
+    compact_json - lista de objetos sem espaços
+    csv          - cabeçalho uma vez e uma linha por registro
+    columns      - objeto {coluna: [valores]}, nomes das colunas uma vez
+
+Configuração por variáveis de ambiente:
+    AI_PROMPT_FORMAT        - formato dos dados nos prompts (padrão: csv)
+    AI_CHUNK_TOKEN_BUDGET   - tokens de dados por bloco; 0 usa o limite do provedor (padrão: 0)
+"""
+import csv
+import io
+import json
+import math
+import os
+import re
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+
+PROMPT_FORMATS = ('json', 'compact_json', 'csv', 'columns')
+
+AI_PROMPT_FORMAT = os.getenv('AI_PROMPT_FORMAT', 'csv')
+
+# Tokens de dados por prompt de processamento, por provedor (o restante da janela fica
+# para as instruções e para a resposta, limitada por max_tokens)
+PROVIDER_TOKEN_BUDGETS = {
+    'openai': 6000,
+    'gemini': 8000,
+    'groq': 4000,
+    'ollama': 1500,  # janela de contexto padrão pequena
+}
+DEFAULT_TOKEN_BUDGET = 4000
+AI_CHUNK_TOKEN_BUDGET = int(os.getenv('AI_CHUNK_TOKEN_BUDGET', '0'))
+
+# Palavras, números, quebras de linha com a indentação seguinte e cada sinal de
+# pontuação (aproximação dos tokenizadores BPE)
+_TOKEN_PATTERN = re.compile(r"[^\W\d_]+|\d+|\n\s*|[^\w\s]")
+
+_FORMAT_NOTES = {
+    'csv': "(CSV: primeira linha com os nomes das colunas; valores vazios = nulos)",
+    'columns': "(JSON por colunas: cada coluna com a lista de valores, na ordem das linhas)",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimativa local de tokens, sem tokenizador do provedor: palavras contam um token a
+    cada ~4 letras, números um a cada 3 dígitos; cada quebra de linha (com a indentação)
+    e cada sinal de pontuação contam um token
+    """
+    tokens = 0
+    for piece in _TOKEN_PATTERN.findall(text):
+        if piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif piece[0].isalpha():
+            tokens += math.ceil(len(piece) / 4)
+        else:
+            tokens += 1
+    return tokens
+
+
+def token_budget(provider: Optional[str] = None) -> int:
+    """
+    Tokens de dados por bloco para o provedor (AI_CHUNK_TOKEN_BUDGET tem precedência)
+    """
+    if AI_CHUNK_TOKEN_BUDGET:
+        return AI_CHUNK_TOKEN_BUDGET
+    return PROVIDER_TOKEN_BUDGETS.get(provider, DEFAULT_TOKEN_BUDGET)
+
+
+def _plain(value: Any) -> Any:
+    """
+    Valor serializável: nulos do pandas viram None e datas viram texto ISO
+    """
+    if value is None or (pd.api.types.is_scalar(value) and not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, (datetime, date)):
+        text = value.isoformat()
+        return text[:-9] if text.endswith('T00:00:00') else text
+    if hasattr(value, 'item'):
+        # Escalares NumPy
+        return value.item()
+    return value
+
+
+def format_records(records: Sequence[Dict[str, Any]], columns: Optional[Iterable[Any]] = None,
+                   fmt: Optional[str] = None) -> str:
+    """
+    Serializa registros (linhas) no formato pedido, com uma nota de leitura
+    para os formatos que não são lista de objetos
+
+    Args:
+        records: Linhas como dicionários (ex.: df.to_dict('records'))
+        columns: Ordem das colunas (padrão: chaves do primeiro registro)
+        fmt: Um de PROMPT_FORMATS (padrão: AI_PROMPT_FORMAT)
+    """
+    fmt = fmt or AI_PROMPT_FORMAT
+    if fmt not in PROMPT_FORMATS:
+        raise ValueError(f"Formato de prompt desconhecido: {fmt}")
+    columns = list(columns) if columns is not None else (list(records[0].keys()) if records else [])
+
+    if fmt == 'json':
+        return json.dumps([{str(c): _plain(r.get(c)) for c in columns} for r in records],
+                          indent=2, default=str, ensure_ascii=False)
+    if fmt == 'compact_json':
+        return json.dumps([{str(c): _plain(r.get(c)) for c in columns} for r in records],
+                          separators=(',', ':'), default=str, ensure_ascii=False)
+    if fmt == 'columns':
+        body = json.dumps({str(c): [_plain(r.get(c)) for r in records] for c in columns},
+                          separators=(',', ':'), default=str, ensure_ascii=False)
+        return f"{_FORMAT_NOTES[fmt]}\n{body}"
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow([str(c) for c in columns])
+    for record in records:
+        writer.writerow(['' if (value := _plain(record.get(c))) is None else value for c in columns])
+    return f"{_FORMAT_NOTES[fmt]}\n{buffer.getvalue()}"
+
+
+def format_frame(df: pd.DataFrame, fmt: Optional[str] = None) -> str:
+    """
+    Serializa o DataFrame inteiro no formato pedido (ver format_records)
+    """
+    return format_records(df.to_dict('records'), df.columns, fmt)
+
+
+def record_tokens(records: Sequence[Dict[str, Any]], columns: Optional[Iterable[Any]] = None,
+                  fmt: Optional[str] = None) -> List[int]:
+    """
+    Tokens estimados de cada registro no formato pedido (sem o cabeçalho)
+    """
+    fmt = fmt or AI_PROMPT_FORMAT
+    columns = list(columns) if columns is not None else (list(records[0].keys()) if records else [])
+    if fmt in ('json', 'compact_json'):
+        # Cada registro repete os nomes das colunas
+        return [estimate_tokens(format_records([r], columns, fmt)) for r in records]
+    # csv e columns: só os valores de cada linha
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    tokens = []
+    for record in records:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(['' if (value := _plain(record.get(c))) is None else value for c in columns])
+        tokens.append(estimate_tokens(buffer.getvalue()))
+    return tokens
+
+
+def sample_rows_within(df: pd.DataFrame, max_rows: int, budget: int, fmt: Optional[str] = None) -> int:
+    """
+    Quantas das primeiras max_rows linhas cabem em budget tokens (ao menos uma)
+    """
+    head = df.head(max_rows)
+    records = head.to_dict('records')
+    used = estimate_tokens(' '.join(str(c) for c in head.columns))
+    for count, tokens in enumerate(record_tokens(records, head.columns, fmt), start=1):
+        used += tokens
+        if used > budget and count > 1:
+            return count - 1
+    return max(len(records), 1) if records else 0
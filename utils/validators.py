@@ -2,8 +2,10 @@
 Validadores de dados
 """
 import re
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import Optional, Tuple
+
+import pandas as pd
 
 
 def validate_cpf(cpf: str) -> bool:
@@ -76,33 +78,95 @@ def validate_cpf_cnpj(value: str) -> bool:
     return False
 
 
+# Formatos de data aceitos, na ordem de tentativa do parse por valor
+DATE_FORMATS = [
+    '%d/%m/%Y',
+    '%d-%m-%Y',
+    '%Y-%m-%d',
+    '%d/%m/%y',
+    '%d-%m-%y',
+    '%Y/%m/%d',
+    '%d.%m.%Y',
+    '%Y.%m.%d',
+]
+
+
 def parse_date(date_str: str) -> Optional[datetime]:
     """
     Tenta fazer parse de uma data em vários formatos
+    (versão por valor de parse_date_series)
     """
-    formats = [
-        '%d/%m/%Y',
-        '%d-%m-%Y',
-        '%Y-%m-%d',
-        '%d/%m/%y',
-        '%d-%m-%y',
-        '%Y/%m/%d',
-        '%d.%m.%Y',
-        '%Y.%m.%d',
-    ]
-    
-    for fmt in formats:
+    text = str(date_str).strip()
+    for fmt in DATE_FORMATS:
         try:
-            return datetime.strptime(str(date_str).strip(), fmt)
+            return datetime.strptime(text, fmt)
         except:
             continue
     
     return None
 
 
+def parse_date_series(values: pd.Series, sample_size: int = 500) -> Tuple[pd.Series, pd.Series]:
+    """
+    Faz o parse de uma coluna inteira de datas
+    
+    O formato dominante é inferido de uma amostra dos valores distintos e aplicado
+    à coluna toda de uma vez; apenas as linhas que falharem tentam os demais
+    formatos. Os valores são tratados como texto, como em parse_date(str(valor)).
+    Colunas já tipadas (datetime64, ou objetos datetime/date, como as células das
+    planilhas lidas em fluxo) são usadas diretamente, sem a hora.
+    
+    Returns:
+        (datas como datetime64 - NaT quando inválidas, máscara de validade)
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        parsed = values.dt.tz_localize(None) if values.dt.tz is not None else values
+        parsed = parsed.astype('datetime64[ns]').dt.normalize()
+        return parsed, parsed.notna()
+    
+    if values.dtype == object:
+        typed = values.map(lambda value: isinstance(value, (datetime, date)))
+        if typed.any():
+            parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+            parsed[typed] = pd.to_datetime(values[typed]).dt.normalize()
+            if not typed.all():
+                parsed[~typed] = _parse_date_text(values[~typed], sample_size)
+            return parsed, parsed.notna()
+    
+    parsed = _parse_date_text(values, sample_size)
+    return parsed, parsed.notna()
+
+
+def _parse_date_text(values: pd.Series, sample_size: int) -> pd.Series:
+    """
+    Datas a partir do texto dos valores (ver parse_date_series)
+    """
+    # Colunas de data repetem muito os mesmos textos: converte só os valores distintos
+    codes, uniques = pd.factorize(values.astype(str).str.strip(), use_na_sentinel=False)
+    text = pd.Series(uniques, dtype=object)
+    
+    # Ordena os formatos pela quantidade de acertos na amostra (empate: ordem padrão)
+    sample = text.head(sample_size)
+    hits = {
+        fmt: pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum()
+        for fmt in DATE_FORMATS
+    }
+    formats = sorted(DATE_FORMATS, key=lambda fmt: -hits[fmt])
+    
+    parsed = pd.Series(pd.NaT, index=text.index, dtype='datetime64[ns]')
+    for fmt in formats:
+        pending = parsed.isna()
+        if not pending.any():
+            break
+        parsed[pending] = pd.to_datetime(text[pending], format=fmt, errors='coerce')
+    
+    return pd.Series(parsed.to_numpy().take(codes), index=values.index)
+
+
 def parse_currency(value: str) -> Optional[float]:
     """
     Converte string de moeda para float
+    (versão por valor de parse_currency_series)
     """
     if isinstance(value, (int, float)):
         return float(value)
@@ -131,6 +195,40 @@ def parse_currency(value: str) -> Optional[float]:
         return None
 
 
-
-
-
+def parse_currency_series(values: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """
+    Converte uma coluna inteira de valores monetários para float
+    
+    Mesmas regras de parse_currency, com operações de texto vetorizadas:
+    símbolos removidos, '1.234,56' (brasileiro) e '1,234.56' (americano)
+    decididos pela posição do último separador e vírgula isolada como decimal.
+    Colunas já numéricas são apenas convertidas. Valores vazios (NaN) são inválidos.
+    
+    Returns:
+        (valores float - NaN quando inválidos, máscara de validade)
+    """
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        parsed = values.astype(float)
+        return parsed, parsed.notna()
+    
+    text = values.astype(str).str.strip()
+    
+    # Cada substituição é aplicada só às linhas que precisam dela
+    has_symbol = text.str.contains('$', regex=False).fillna(False).to_numpy(dtype=bool)
+    if has_symbol.any():
+        text[has_symbol] = text[has_symbol].str.replace('R$', '', regex=False).str.replace('$', '', regex=False).str.strip()
+    
+    last_comma = text.str.rfind(',').to_numpy(dtype=float, na_value=-1)
+    last_dot = text.str.rfind('.').to_numpy(dtype=float, na_value=-1)
+    # Vírgula depois do último ponto (ou vírgula isolada): formato brasileiro
+    brazilian = (last_comma >= 0) & (last_comma > last_dot)
+    # Ponto depois da última vírgula: formato americano
+    american = (last_comma >= 0) & (last_dot > last_comma)
+    
+    if brazilian.any():
+        text[brazilian] = text[brazilian].str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    if american.any():
+        text[american] = text[american].str.replace(',', '', regex=False)
+    
+    parsed = pd.to_numeric(text, errors='coerce').astype(float)
+    return parsed, parsed.notna()